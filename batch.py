@@ -0,0 +1,333 @@
+import os
+import re
+import sys
+import csv
+import json
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import engine
+import storage
+from kurs_table import parse_tanggal, format_tanggal, parse_kurs
+from tariff import parse_kode_hs, format_kode_hs
+
+
+# Tanpa PySide6 sama sekali: modul ini dipakai `main.py batch ...` di
+# server dan cron job.
+
+CHUNK_ROWS = 20000
+# Di bawah ukuran ini memulai process pool lebih mahal daripada hasilnya
+PARALLEL_MIN_BYTES = 32 << 20
+
+MAX_REPORTED = 20
+
+# Angka dengan pemisah ribuan "." atau "," yang konsisten, lalu boleh ada
+# bagian desimal 1-2 digit dengan pemisah yang lain
+_HARGA = re.compile(
+    r"(?P<bulat>\d+|\d{1,3}(?P<ribuan>[.,])\d{3}(?:(?P=ribuan)\d{3})*)"
+    r"(?:(?P<desimal>[.,])(?P<sen>\d{1,2}))?"
+)
+
+
+def parse_harga(text):
+    """Harga rupiah dari teks CSV, boleh berisi "Rp" dan pemisah ribuan.
+
+    Rupiah selalu bulat: bagian desimal hanya diterima jika nol (mis.
+    "1500000.00"), selain itu ValueError, begitu juga harga <= 0.
+    """
+    if text.isdigit():
+        return check_harga(int(text), text)
+    cleaned = text.strip()
+    if cleaned[:2].lower() == "rp":
+        cleaned = cleaned[2:]
+    cleaned = "".join(cleaned.split())
+    match = _HARGA.fullmatch(cleaned)
+    if match is None or (
+        match["desimal"] is not None and match["desimal"] == match["ribuan"]
+    ):
+        raise ValueError(f"Harga tidak valid: {text!r}")
+    if match["sen"] is not None and int(match["sen"]):
+        raise ValueError(f"Harga harus rupiah bulat: {text!r}")
+    return check_harga(int(re.sub(r"[.,]", "", match["bulat"])), text)
+
+
+def check_harga(harga, text):
+    # Sama dengan validasi input di GUI
+    if harga <= 0:
+        raise ValueError(f"Harga harus > 0: {text!r}")
+    return harga
+
+
+class Skipped:
+    """Hitungan baris yang dilewati, beserta beberapa contoh pertamanya."""
+
+    def __init__(self):
+        self.count = 0
+        self.examples = []
+
+    def add(self, message):
+        self.count += 1
+        if len(self.examples) < MAX_REPORTED:
+            self.examples.append(message)
+
+
+def _parse_tanggal_cell(text):
+    # YYYY-MM-DD, atau YYYYMMDD seperti yang disimpan di database
+    text = text.strip()
+    if text.isdigit():
+        return int(text)
+    return parse_tanggal(text)
+
+
+# Kolom opsional CSV selain harga: nama header -> (field, pengurai)
+_OPTIONAL_COLUMNS = {
+    "tanggal": ("tanggal", _parse_tanggal_cell),
+    "kode_hs": ("kode_hs", parse_kode_hs),
+}
+
+
+def read_csv_rows(f, skipped):
+    """Yield (nama, record input); baris yang tidak valid dicatat di
+    `skipped`. Kolom tanggal dan kode_hs opsional dan hanya dikenali lewat
+    header.
+    """
+    reader = csv.reader(f)
+    name_col, price_col = 0, 1
+    optional = []
+    for line, row in enumerate(reader, 1):
+        if not any(row):
+            continue
+        if line == 1:
+            header = [cell.strip().lower() for cell in row]
+            if "harga_idr" in header or "harga" in header:
+                price_col = header.index(
+                    "harga_idr" if "harga_idr" in header else "harga"
+                )
+                name_col = header.index("nama") if "nama" in header else 0
+                optional = [
+                    (header.index(name), field, parse)
+                    for name, (field, parse) in _OPTIONAL_COLUMNS.items()
+                    if name in header
+                ]
+                continue
+        try:
+            record = {"harga_idr": parse_harga(row[price_col])}
+            for col, field, parse in optional:
+                if col < len(row):
+                    record[field] = parse(row[col])
+            yield row[name_col], record
+        except (IndexError, ValueError) as e:
+            skipped.add(f"baris {line}: {e}")
+
+
+def read_json_rows(f, skipped):
+    for nama, record in storage.iter_json_object(f):
+        try:
+            inputs = {field: int(record.get(field, 0)) for field in engine.INPUT_FIELDS}
+            inputs["harga_idr"] = check_harga(
+                int(record["harga_idr"]), record["harga_idr"]
+            )
+            yield nama, inputs
+        except (KeyError, TypeError, ValueError) as e:
+            skipped.add(f"{nama}: {type(e).__name__}: {e}")
+
+
+def chunked(rows, size=CHUNK_ROWS):
+    """Kelompokkan (nama, record) menjadi (names, kolom per INPUT_FIELDS)."""
+    names = []
+    records = []
+    for nama, record in rows:
+        names.append(nama)
+        records.append(record)
+        if len(names) >= size:
+            yield names, engine.input_columns(records)
+            names = []
+            records = []
+    if names:
+        yield names, engine.input_columns(records)
+
+
+def format_chunk(names, inputs, config, fmt, first=False):
+    """Hitung satu potongan dan kembalikan teksnya, siap ditulis berurutan.
+
+    Dijalankan juga di proses pekerja, jadi pemformatan ikut terbagi.
+    """
+    columns = engine.hitung_pajak_kolom(inputs, config)
+    # ndarray diubah ke list supaya angkanya tertulis sebagai int/float biasa
+    columns = [
+        columns[field].tolist() if engine.np is not None else columns[field]
+        for field in engine.FIELDS
+    ]
+    dates = inputs["tanggal"]
+    codes = inputs["kode_hs"]
+    if fmt == "csv":
+        out = _CsvText()
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerows(
+            zip(
+                names,
+                map(format_tanggal, dates),
+                map(format_kode_hs, codes),
+                *columns,
+            )
+        )
+        return out.text()
+
+    # Sama dengan storage._dump_mapping supaya hasilnya bisa dibuka aplikasi
+    parts = []
+    for i, nama in enumerate(names):
+        record = dict(zip(engine.FIELDS, (column[i] for column in columns)))
+        record["tanggal"] = dates[i]
+        record["kode_hs"] = codes[i]
+        record = json.dumps(record, indent=4).replace("\n", "\n    ")
+        if not (first and i == 0):
+            parts.append(",")
+        parts.append(f"\n    {json.dumps(nama)}: {record}")
+    return "".join(parts)
+
+
+class _CsvText:
+    def __init__(self):
+        self._parts = []
+
+    def write(self, text):
+        self._parts.append(text)
+
+    def text(self):
+        return "".join(self._parts)
+
+
+def price_stream(rows, out, config, fmt, workers=1):
+    """Tulis hasil untuk setiap (nama, record input) di `rows` ke `out`.
+
+    Memori tetap: paling banyak dua potongan per pekerja yang sedang
+    dihitung, dan hasilnya ditulis sesuai urutan masukan. Mengembalikan
+    jumlah baris.
+    """
+    count = 0
+    if fmt == "csv":
+        header = ("nama", "tanggal", "kode_hs") + engine.FIELDS
+        csv.writer(out, lineterminator="\n").writerow(header)
+    else:
+        out.write("{")
+
+    chunks = chunked(rows)
+    if workers <= 1:
+        for names, inputs in chunks:
+            out.write(format_chunk(names, inputs, config, fmt, count == 0))
+            count += len(names)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for names, inputs in chunks:
+                pending.append(
+                    pool.submit(format_chunk, names, inputs, config, fmt, count == 0)
+                )
+                count += len(names)
+                if len(pending) >= workers * 2:
+                    out.write(pending.popleft().result())
+            while pending:
+                out.write(pending.popleft().result())
+
+    if fmt == "json":
+        out.write("\n}" if count else "}")
+    return count
+
+
+def _format_of(path, given):
+    if given:
+        return given
+    if path and path.lower().endswith(".json"):
+        return "json"
+    return "csv"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="main.py batch",
+        description="Hitung pajak impor untuk file CSV/JSON tanpa membuka jendela.",
+    )
+    parser.add_argument(
+        "input", help="file CSV (nama,harga[,tanggal,kode_hs]) atau database JSON"
+    )
+    parser.add_argument("-o", "--output", default=None, help="default: stdout")
+    parser.add_argument("--input-format", choices=("csv", "json"), default=None)
+    parser.add_argument("--output-format", choices=("csv", "json"), default=None)
+    parser.add_argument(
+        "--config", default=None, help="config.json aplikasi sebagai nilai awal"
+    )
+    parser.add_argument("--kurs", type=parse_kurs, default=None, help="kurs pajak")
+    parser.add_argument("--pembebasan", type=int, default=None)
+    parser.add_argument(
+        "--npwp", dest="npwp", action="store_true", default=None, help="punya NPWP"
+    )
+    parser.add_argument("--tanpa-npwp", dest="npwp", action="store_false")
+    parser.add_argument(
+        "--aritmetika",
+        choices=engine.ARITMETIKA,
+        default=None,
+        help="tetap = bilangan bulat dengan pembulatan dari --config",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="jumlah proses; default semua core untuk file besar",
+    )
+    args = parser.parse_args(argv)
+
+    config = engine.PajakConfig(16275, 500, True)
+    if args.config:
+        from bulk import config_from_file
+
+        config = config_from_file(args.config)
+    if args.kurs is not None:
+        config = config._replace(kurs_pajak=args.kurs)
+    if args.pembebasan is not None:
+        config = config._replace(pembebasan=args.pembebasan)
+    if args.npwp is not None:
+        config = config._replace(npwp=args.npwp)
+    if args.aritmetika is not None:
+        config = config._replace(aritmetika=args.aritmetika)
+
+    workers = args.workers
+    if workers is None:
+        big = os.path.getsize(args.input) >= PARALLEL_MIN_BYTES
+        workers = (os.cpu_count() or 1) if big else 1
+
+    in_format = _format_of(args.input, args.input_format)
+    out_format = _format_of(args.output, args.output_format)
+    skipped = Skipped()
+
+    def run(out):
+        if in_format == "json":
+            with open(args.input, "rb") as f:
+                rows = read_json_rows(f, skipped)
+                return price_stream(rows, out, config, out_format, workers)
+        with open(args.input, "r", newline="", encoding="utf-8-sig") as f:
+            rows = read_csv_rows(f, skipped)
+            return price_stream(rows, out, config, out_format, workers)
+
+    count = 0
+
+    def write(out):
+        nonlocal count
+        count = run(out)
+
+    if args.output:
+        storage.write_atomic(args.output, write)
+    else:
+        write(sys.stdout)
+
+    for example in skipped.examples:
+        print(f"Dilewati: {example}", file=sys.stderr)
+    if skipped.count > len(skipped.examples):
+        rest = skipped.count - len(skipped.examples)
+        print(f"... dan {rest:,} baris lain", file=sys.stderr)
+    print(f"{count:,} baris dihitung", file=sys.stderr)
+    return 1 if skipped.count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
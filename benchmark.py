@@ -0,0 +1,564 @@
+import os
+import gc
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+from decimal import Decimal, ROUND_CEILING, ROUND_HALF_UP
+from statistics import median
+
+import engine
+import storage
+from record_store import RecordStore
+
+
+# Benchmark yang bisa diulang: database sintetis berbentuk example.json,
+# hasilnya ditulis ke laporan JSON yang bisa dibandingkan antar commit.
+#
+#   python benchmark.py -o sebelum.json
+#   python benchmark.py -o sesudah.json --baseline sebelum.json
+#
+# Tabel dan startup butuh PySide6 dan dijalankan dengan platform Qt
+# "offscreen", jadi tidak perlu layar.
+
+REPORT_VERSION = 1
+DEFAULT_SIZES = "1k,100k,1m"
+SUITES = ("engine", "storage", "table", "startup")
+STORAGE_FORMATS = {
+    "json": ".json",
+    "journal": ".json",
+    "sqlite": ".db",
+    "binary": ".bcdb",
+}
+SEED = 20250210
+EDITS = 20
+# Batas jumlah baris yang ditulis ulang untuk semua edit dalam satu putaran;
+# format yang menulis ulang seluruh file cukup diedit beberapa kali saja
+EDIT_ROW_BUDGET = 2000000
+# Batch yang sama dengan DataLoader
+STREAM_BATCH = 5000
+STARTUP_TIMEOUT = 300
+# Selisih di bawah ini dianggap derau, berapa pun persentasenya
+NOISE_FLOOR = 0.002
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_SUFFIXES = {"k": 1000, "m": 1000000}
+
+
+def parse_size(text):
+    """"1k" -> 1000, "1m" -> 1000000, "2500" -> 2500."""
+    text = text.strip().lower()
+    factor = _SUFFIXES.get(text[-1:], 1)
+    if factor != 1:
+        text = text[:-1]
+    if not text.isdigit():
+        raise ValueError(f"Ukuran tidak valid: {text!r}")
+    return int(text) * factor
+
+
+def format_size(n):
+    for suffix, factor in (("m", 1000000), ("k", 1000)):
+        if n >= factor and n % factor == 0:
+            return f"{n // factor}{suffix}"
+    return str(n)
+
+
+def synthetic_data(n, seed=SEED):
+    """n barang berbentuk example.json: nama model dan harga yang bervariasi.
+
+    Hasilnya selalu sama untuk n dan seed yang sama.
+    """
+    with open(os.path.join(_HERE, "example.json"), "r") as f:
+        base = list(json.load(f).items())
+    rng = random.Random(seed + n)
+    data = {}
+    for i in range(n):
+        nama, record = base[i % len(base)]
+        harga = int(record["harga_idr"] * rng.uniform(0.8, 1.2)) // 1000 * 1000
+        data[f"{nama} #{i}"] = {"harga_idr": harga}
+    return data
+
+
+def measure(run, repeat, setup=None):
+    """Jalankan `run` sebanyak `repeat` kali; kembalikan durasi tiap putaran.
+
+    `setup` (jika ada) dijalankan sebelum setiap putaran, di luar hitungan.
+    """
+    runs = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        runs.append(time.perf_counter() - start)
+    return runs
+
+
+class Report:
+    def __init__(self, sizes, repeat):
+        self.results = {}
+        self.meta = {
+            "version": REPORT_VERSION,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git("rev-parse", "--short", "HEAD"),
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "sizes": sizes,
+            "repeat": repeat,
+            "environment": _environment(),
+        }
+
+    def add(self, name, runs, rows=None):
+        best = min(runs)
+        result = {"seconds": best, "median": median(runs), "runs": runs}
+        line = f"{name:<34} {best * 1000:11.2f} ms"
+        if rows:
+            result["rows"] = rows
+            result["rows_per_second"] = rows / best if best > 0 else None
+            if best > 0:
+                line += f"  {rows / best:14,.0f} baris/s"
+        self.results[name] = result
+        print(line, file=sys.stderr, flush=True)
+
+    def as_dict(self):
+        return {**self.meta, "results": self.results}
+
+
+def _git(*args):
+    try:
+        output = subprocess.run(
+            ["git", *args],
+            cwd=_HERE,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.strip()
+
+
+def _environment():
+    environment = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": engine.np.__version__ if engine.np is not None else None,
+    }
+    try:
+        import PySide6
+
+        environment["pyside6"] = PySide6.__version__
+    except ImportError:
+        environment["pyside6"] = None
+    return environment
+
+
+# Rumus pajak
+
+
+def bench_engine(report, n, data, repeat):
+    config = engine.PajakConfig(16275, 500, True)
+    prices = [record["harga_idr"] for record in data.values()]
+    args = (config.kurs_pajak, config.pembebasan, config.npwp)
+
+    def scalar():
+        for harga in prices:
+            engine.hitung_pajak(harga, *args)
+
+    def tetap_scalar():
+        for harga in prices:
+            engine.hitung_pajak_tetap(harga, *args)
+
+    def decimal():
+        for harga in prices:
+            _hitung_pajak_decimal(harga, *args)
+
+    label = format_size(n)
+    report.add(f"engine.scalar/{label}", measure(scalar, repeat), n)
+    report.add(
+        f"engine.batch/{label}",
+        measure(lambda: engine.hitung_pajak_batch(prices, *args), repeat),
+        n,
+    )
+    report.add(f"engine.tetap.scalar/{label}", measure(tetap_scalar, repeat), n)
+    report.add(
+        f"engine.tetap.batch/{label}",
+        measure(lambda: engine.hitung_pajak_tetap_batch(prices, *args), repeat),
+        n,
+    )
+    report.add(f"engine.decimal/{label}", measure(decimal, repeat), n)
+
+
+def _hitung_pajak_decimal(harga_idr, kurs_pajak, pembebasan, npwp):
+    # Pembanding: aturan mode tetap (pembulatan default, tarif umum) dengan
+    # decimal.Decimal, cara biasa untuk angka uang yang pasti
+    pembulatan = engine.PEMBULATAN_DEFAULT
+    satuan = Decimal(pembulatan.satuan)
+    kurs = Decimal(kurs_pajak)
+
+    def pungutan(dasar, rate):
+        return (dasar * rate / satuan).to_integral_value(ROUND_CEILING) * satuan
+
+    def mili_usd(nilai):
+        return (nilai * 1000 / kurs).to_integral_value(ROUND_HALF_UP)
+
+    dasar = max(Decimal(0), Decimal(harga_idr) - pembebasan * kurs)
+    bea_masuk = pungutan(dasar, _DECIMAL_RATES["bea_masuk"])
+    nilai_impor = dasar + bea_masuk
+    ppn = pungutan(nilai_impor, _DECIMAL_RATES["ppn"])
+    pph = pungutan(nilai_impor, _DECIMAL_RATES["pph" if npwp else "pph_non_npwp"])
+    total = bea_masuk + ppn + pph
+    return {
+        "harga_idr": harga_idr,
+        "selisih_pembebasan": mili_usd(dasar),
+        "bea_masuk": mili_usd(bea_masuk),
+        "ppn_idr": int(ppn),
+        "pph_idr": int(pph),
+        "ppnbm_idr": 0,
+        "total_usd": mili_usd(total),
+        "total_idr": int(total),
+    }
+
+
+_DECIMAL_RATES = {
+    "bea_masuk": Decimal(str(engine.BEA_MASUK_RATE)),
+    "ppn": Decimal(str(engine.PPN_RATE)),
+    "pph": Decimal(str(engine.PPH_RATE_NPWP)),
+    "pph_non_npwp": Decimal(str(engine.PPH_RATE_NON_NPWP)),
+}
+
+
+# Storage: muat dan simpan per format
+
+
+def bench_storage(report, n, data, repeat, workdir):
+    label = format_size(n)
+    json_path = os.path.join(workdir, f"storage-{label}.json")
+    storage.write_json_atomic(json_path, data)
+    rng = random.Random(SEED)
+    names = list(data)
+    edits = max(1, min(EDITS, EDIT_ROW_BUDGET // max(n, 1)))
+
+    for fmt, ext in STORAGE_FORMATS.items():
+        path = os.path.join(workdir, f"storage-{label}-{fmt}{ext}")
+        _remove_database(path)
+        _convert(json_path, path)
+        mode = "json" if fmt == "json" else "journal"
+        db = storage.open_storage(path, mode)
+
+        def load():
+            # SQLite dan biner memuat malas; satu putaran penuh atas semua
+            # record membuat angkanya sebanding dengan format JSON
+            for _ in db.load().items():
+                pass
+
+        def save():
+            db.write(dict(data))
+            storage.background_writer().flush()
+
+        loaded = None
+
+        def load_for_edit():
+            nonlocal loaded
+            loaded = db.load()
+
+        def edit():
+            # Setara save_data(op) setelah satu barang diubah
+            for _ in range(edits):
+                nama = rng.choice(names)
+                op = storage.op_set(nama, {"harga_idr": rng.randrange(1, 10**8)})
+                storage.apply_op(loaded, op)
+                db.write(loaded, (op,))
+                storage.background_writer().flush()
+
+        try:
+            report.add(f"storage.{fmt}.load/{label}", measure(load, repeat), n)
+            report.add(f"storage.{fmt}.save/{label}", measure(save, repeat), n)
+            runs = measure(edit, repeat, setup=load_for_edit)
+            report.add(f"storage.{fmt}.edit/{label}", [run / edits for run in runs])
+        finally:
+            db.close()
+            _remove_database(path)
+    _remove_database(json_path)
+
+
+def _convert(json_path, path):
+    if path.endswith(".db"):
+        from sqlite_storage import json_to_sqlite
+
+        json_to_sqlite(json_path, path)
+    elif path.endswith(".bcdb"):
+        from binary_storage import json_to_binary
+
+        json_to_binary(json_path, path)
+    else:
+        shutil.copyfile(json_path, path)
+
+
+def _remove_database(path):
+    for related in [path, *storage.related_paths(path)]:
+        if os.path.exists(related):
+            os.remove(related)
+
+
+# Tabel di jendela utama
+
+
+class TableBench:
+    """Satu jendela BeaCukaiApp di folder sementara untuk semua ukuran."""
+
+    def __init__(self, workdir):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        os.environ["APPDATA"] = os.path.join(workdir, "table")
+        os.makedirs(os.environ["APPDATA"], exist_ok=True)
+        from PySide6.QtWidgets import QApplication
+
+        import main
+
+        self.app = QApplication.instance() or QApplication([])
+        self.window = main.BeaCukaiApp()
+        self.window.show()
+        self.wait(lambda: self.window.tree_ready and self.window.loader is None)
+
+    def wait(self, done, timeout=60):
+        end = time.monotonic() + timeout
+        while not done():
+            if time.monotonic() > end:
+                raise TimeoutError("Jendela tidak siap")
+            self.app.processEvents()
+            time.sleep(0.001)
+
+    def paint(self):
+        self.app.processEvents()
+        self.window.table.viewport().repaint()
+
+    def run(self, report, n, data, repeat):
+        label = format_size(n)
+        items = list(data.items())
+        window = self.window
+
+        def clear():
+            window.data = RecordStore()
+            window.update_table()
+            self.paint()
+
+        def update_table():
+            # Database yang sudah termuat penuh, mis. SQLite dan biner
+            window.data = RecordStore(items)
+            window.update_table()
+            self.paint()
+
+        def stream():
+            # Jalur DataLoader: tabel kosong lalu diisi per batch
+            window.data = RecordStore()
+            window.update_table()
+            for start in range(0, len(items), STREAM_BATCH):
+                window.table_model.extend_rows(items[start : start + STREAM_BATCH])
+                self.app.processEvents()
+            self.paint()
+
+        report.add(
+            f"table.update_table/{label}", measure(update_table, repeat, clear), n
+        )
+        report.add(f"table.stream/{label}", measure(stream, repeat, clear), n)
+        clear()
+
+
+# Startup di proses terpisah
+
+
+def bench_startup(report, n, data, repeat, workdir):
+    label = format_size(n)
+    appdata = os.path.join(workdir, f"startup-{label}")
+    folder = os.path.join(appdata, "kalkulator-bea-cukai")
+    os.makedirs(folder, exist_ok=True)
+    storage.write_json_atomic(os.path.join(folder, "database.json"), data)
+    with open(os.path.join(folder, storage.CONFIG_FILE), "w") as f:
+        json.dump({"LAST_OPENED_FILE": "database.json"}, f)
+
+    # Putaran pertama membuat cache rekap, katalog, dan indeks; tidak dihitung
+    _startup_once(appdata)
+    runs = [_startup_once(appdata) for _ in range(repeat)]
+    report.add(f"startup.window/{label}", [run["window"] for run in runs])
+    report.add(f"startup.loaded/{label}", [run["loaded"] for run in runs], n)
+
+
+def _startup_once(appdata):
+    env = dict(os.environ, APPDATA=appdata, QT_QPA_PLATFORM="offscreen")
+    started = time.time()
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--startup-child"],
+        cwd=_HERE,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=STARTUP_TIMEOUT,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Startup gagal:\n{result.stderr}")
+    times = json.loads(result.stdout.strip().splitlines()[-1])
+    # Dihitung dari sebelum proses dibuat, termasuk interpreter dan impor
+    return {phase: at - started for phase, at in times.items()}
+
+
+def _startup_child():
+    from PySide6.QtCore import QTimer, QEventLoop
+    from PySide6.QtWidgets import QApplication
+
+    import main
+
+    app = QApplication([])
+    app.setStyle("Fusion")
+    window = main.BeaCukaiApp()
+    window.show()
+    # Kondisi hanya berubah di dalam event handler; timer ini sekadar
+    # membangunkan loop jika tidak ada event lain
+    wake = QTimer()
+    wake.start(100)
+    times = {}
+    while "loaded" not in times:
+        app.processEvents(QEventLoop.WaitForMoreEvents)
+        if window.tree_ready and "window" not in times:
+            times["window"] = time.time()
+        if window.tree_ready and window.loader is None:
+            times["loaded"] = time.time()
+    print(json.dumps(times), flush=True)
+    # Thread latar (rekap, indeks) tidak perlu ditunggu
+    os._exit(0)
+
+
+# Perbandingan laporan
+
+
+def compare(baseline, current, threshold):
+    """Cetak perubahan per hasil; kembalikan daftar nama yang melambat."""
+    regressions = []
+    print(
+        f"{'':<34} {'dasar (ms)':>12} {'kini (ms)':>12} {'ubah':>8}",
+        file=sys.stderr,
+    )
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        before, after = base["seconds"], result["seconds"]
+        change = (after - before) / before if before > 0 else 0.0
+        slower = change > threshold and after - before > NOISE_FLOOR
+        if slower:
+            regressions.append(name)
+        print(
+            f"{name:<34} {before * 1000:12.2f} {after * 1000:12.2f} {change:+8.1%}"
+            + ("  REGRESI" if slower else ""),
+            file=sys.stderr,
+        )
+    missing = sorted(set(baseline["results"]) - set(current["results"]))
+    if missing:
+        print(f"Tidak diukur ulang: {', '.join(missing)}", file=sys.stderr)
+    return regressions
+
+
+def run_suites(sizes, suites, repeat, workdir):
+    report = Report([format_size(n) for n in sizes], repeat)
+    table = None
+    for n in sizes:
+        data = synthetic_data(n)
+        if "engine" in suites:
+            bench_engine(report, n, data, repeat)
+        if "storage" in suites:
+            bench_storage(report, n, data, repeat, workdir)
+        if "table" in suites:
+            if table is None:
+                table = TableBench(workdir)
+            table.run(report, n, data, repeat)
+        if "startup" in suites:
+            bench_startup(report, n, data, repeat, workdir)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="benchmark.py",
+        description="Benchmark rumus pajak, storage, tabel, dan startup.",
+    )
+    parser.add_argument(
+        "--sizes",
+        default=DEFAULT_SIZES,
+        help=f"jumlah barang, dipisah koma (default {DEFAULT_SIZES})",
+    )
+    parser.add_argument(
+        "--suites",
+        default=",".join(SUITES),
+        help=f"bagian yang dijalankan (default {','.join(SUITES)})",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", default=None, help="laporan JSON")
+    parser.add_argument(
+        "--baseline", default=None, help="laporan lama sebagai pembanding"
+    )
+    parser.add_argument(
+        "--report",
+        default=None,
+        help="bandingkan laporan ini dengan --baseline tanpa menjalankan ulang",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.20,
+        help="perlambatan yang dianggap regresi (default 0.20 = 20%%)",
+    )
+    parser.add_argument(
+        "--workdir", default=None, help="folder kerja (default folder sementara)"
+    )
+    parser.add_argument("--startup-child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.startup_child:
+        _startup_child()
+
+    if args.report:
+        if not args.baseline:
+            parser.error("--report butuh --baseline")
+        with open(args.report, "r") as f:
+            report = json.load(f)
+    else:
+        try:
+            sizes = [parse_size(size) for size in args.sizes.split(",")]
+        except ValueError as e:
+            parser.error(str(e))
+        suites = [suite.strip() for suite in args.suites.split(",")]
+        unknown = set(suites) - set(SUITES)
+        if unknown:
+            parser.error(f"Bagian tidak dikenal: {', '.join(sorted(unknown))}")
+
+        workdir = args.workdir or tempfile.mkdtemp(prefix="bea-cukai-bench-")
+        os.makedirs(workdir, exist_ok=True)
+        try:
+            report = run_suites(sizes, suites, args.repeat, workdir).as_dict()
+        finally:
+            if args.workdir is None:
+                shutil.rmtree(workdir, ignore_errors=True)
+        if args.output:
+            storage.write_json_atomic(args.output, report, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        if baseline.get("version") != REPORT_VERSION:
+            print("Versi laporan pembanding berbeda", file=sys.stderr)
+            return 2
+        regressions = compare(baseline, report, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regresi", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+import mmap
+import struct
+import hashlib
+from array import array
+from bisect import bisect_left
+
+from engine import INPUT_FIELDS
+from record_store import RecordStore
+from storage import (
+    JsonStorage,
+    background_writer,
+    read_database,
+    write_atomic,
+    write_json_atomic,
+)
+
+
+# Format biner .bcdb versi 1, little-endian, setiap bagian rata 8 byte:
+#
+#   header    magic, versi, jumlah field, jumlah baris
+#   sections  offset kolom, offset nama, hash, baris-hash, blob nama
+#   fields    nama field (u16 panjang + utf-8) sesuai urutan kolom
+#   kolom     int64 x baris untuk setiap field
+#   offset    u64 x (baris + 1), posisi tiap nama di blob
+#   hash      u64 x baris, hash nama terurut untuk pencarian bisect
+#   baris     u64 x baris, baris milik hash pada posisi yang sama
+#   blob      nama barang utf-8 berurutan
+MAGIC = b"BCDB\r\n\x1a\n"
+VERSION = 1
+_HEADER = struct.Struct("<8sHHIQ")
+_SECTIONS = struct.Struct("<5Q")
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+def _hash_bytes(raw):
+    return int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), "little")
+
+
+def name_hash(nama):
+    return _hash_bytes(nama.encode("utf-8"))
+
+
+def write_binary(path, data):
+    """Tulis data (dict atau RecordStore) ke `path` secara atomik."""
+    names = list(data)
+    if hasattr(data, "column"):
+        columns = [array("q", data.column(field)) for field in INPUT_FIELDS]
+    else:
+        columns = [
+            array("q", (data[nama].get(field, 0) for nama in names))
+            for field in INPUT_FIELDS
+        ]
+
+    encoded = [nama.encode("utf-8") for nama in names]
+    offsets = array("Q", [0])
+    position = 0
+    for raw in encoded:
+        position += len(raw)
+        offsets.append(position)
+    hashed = [_hash_bytes(raw) for raw in encoded]
+    order = sorted(range(len(names)), key=hashed.__getitem__)
+    hashes = array("Q", (hashed[row] for row in order))
+    hash_rows = array("Q", order)
+
+    fields = b"".join(
+        struct.pack("<H", len(field.encode())) + field.encode()
+        for field in INPUT_FIELDS
+    )
+    rows = len(names)
+    columns_at = _align(_HEADER.size + _SECTIONS.size + len(fields))
+    offsets_at = columns_at + 8 * rows * len(columns)
+    hashes_at = offsets_at + 8 * (rows + 1)
+    hash_rows_at = hashes_at + 8 * rows
+    blob_at = hash_rows_at + 8 * rows
+
+    def write(f):
+        f.write(_HEADER.pack(MAGIC, VERSION, len(INPUT_FIELDS), 0, rows))
+        f.write(
+            _SECTIONS.pack(columns_at, offsets_at, hashes_at, hash_rows_at, blob_at)
+        )
+        f.write(fields)
+        f.write(b"\0" * (columns_at - f.tell()))
+        for column in columns:
+            f.write(column.tobytes())
+        f.write(offsets.tobytes())
+        f.write(hashes.tobytes())
+        f.write(hash_rows.tobytes())
+        for raw in encoded:
+            f.write(raw)
+
+    write_atomic(path, write, "wb")
+
+
+class BinaryRecords:
+    """Isi file .bcdb yang dipetakan ke memori lewat mmap.
+
+    Membuka file hanya membaca header; nama dan harga dibaca langsung dari
+    halaman yang disentuh, dan pencarian nama memakai tabel hash terurut
+    di file. Perubahan pertama menyalin isi ke RecordStore (copy-on-write)
+    lalu melepas mmap; sejak itu semua method diteruskan ke salinan itu.
+    """
+
+    def __init__(self, path):
+        self._store = None
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        try:
+            self._map_sections()
+        except Exception:
+            self.close()
+            raise
+
+    def _map_sections(self):
+        magic, version, field_count, _, rows = _HEADER.unpack_from(self._view)
+        if magic != MAGIC:
+            raise ValueError("Bukan file database biner")
+        if version > VERSION:
+            raise ValueError(f"Versi format biner {version} tidak didukung")
+
+        sections = _SECTIONS.unpack_from(self._view, _HEADER.size)
+        columns_at, offsets_at, hashes_at, hash_rows_at, blob_at = sections
+        position = _HEADER.size + _SECTIONS.size
+        fields = []
+        for _ in range(field_count):
+            (length,) = struct.unpack_from("<H", self._view, position)
+            position += 2
+            fields.append(bytes(self._view[position : position + length]).decode())
+            position += length
+
+        self._rows = rows
+        self._views = []
+        self._columns = {}
+        for i, field in enumerate(fields):
+            start = columns_at + 8 * rows * i
+            self._columns[field] = self._cast(start, rows, "q")
+        self._offsets = self._cast(offsets_at, rows + 1, "Q")
+        self._hashes = self._cast(hashes_at, rows, "Q")
+        self._hash_rows = self._cast(hash_rows_at, rows, "Q")
+        self._blob_at = blob_at
+        # Field baru yang belum ada di file lama bernilai 0
+        for field in INPUT_FIELDS:
+            if field not in self._columns:
+                self._columns[field] = array("q", bytes(8 * rows))
+
+    def _cast(self, start, count, fmt):
+        view = self._view[start : start + 8 * count].cast(fmt)
+        self._views.append(view)
+        return view
+
+    def close(self):
+        if self._mmap is None:
+            return
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._columns = {}
+        self._view.release()
+        self._mmap.close()
+        self._mmap = None
+
+    def materialize(self):
+        """Salin ke RecordStore; setelah ini file boleh ditimpa atau dipindah."""
+        if self._store is None:
+            names = [self._name(row) for row in range(self._rows)]
+            columns = {}
+            for field in INPUT_FIELDS:
+                columns[field] = array("q")
+                columns[field].frombytes(self._columns[field].tobytes())
+            self._store = RecordStore.from_columns(names, columns)
+            self.close()
+        return self._store
+
+    def _name(self, row):
+        start = self._blob_at + self._offsets[row]
+        end = self._blob_at + self._offsets[row + 1]
+        return str(self._view[start:end], "utf-8")
+
+    def _record(self, row):
+        return {field: self._columns[field][row] for field in INPUT_FIELDS}
+
+    def __len__(self):
+        if self._store is not None:
+            return len(self._store)
+        return self._rows
+
+    def __contains__(self, nama):
+        return self.row_of(nama) is not None
+
+    def __iter__(self):
+        if self._store is not None:
+            return iter(self._store)
+        return (self._name(row) for row in range(self._rows))
+
+    def keys(self):
+        return iter(self)
+
+    def __getitem__(self, nama):
+        row = self.row_of(nama)
+        if row is None:
+            raise KeyError(nama)
+        return self.row(row)[1]
+
+    def get(self, nama, default=None):
+        row = self.row_of(nama)
+        if row is None:
+            return default
+        return self.row(row)[1]
+
+    def items(self):
+        if self._store is not None:
+            return self._store.items()
+        return (self.row(row) for row in range(self._rows))
+
+    def values(self):
+        return (record for _, record in self.items())
+
+    def column(self, field):
+        if self._store is not None:
+            return self._store.column(field)
+        return self._columns[field]
+
+    def copy(self):
+        return self.materialize().copy()
+
+    # Perubahan: salin dulu, lalu teruskan
+
+    def __setitem__(self, nama, record):
+        self.materialize()[nama] = record
+
+    def pop(self, nama, *default):
+        return self.materialize().pop(nama, *default)
+
+    def rename(self, old_name, new_name, record):
+        self.materialize().rename(old_name, new_name, record)
+
+    # Antarmuka baris untuk DataTableModel
+
+    def row(self, row):
+        if self._store is not None:
+            return self._store.row(row)
+        if not 0 <= row < self._rows:
+            raise IndexError(row)
+        return self._name(row), self._record(row)
+
+    def name_at(self, row):
+        return self.row(row)[0]
+
+    def row_of(self, nama):
+        if self._store is not None:
+            return self._store.row_of(nama)
+        target = name_hash(nama)
+        i = bisect_left(self._hashes, target)
+        while i < self._rows and self._hashes[i] == target:
+            row = self._hash_rows[i]
+            if self._name(row) == nama:
+                return row
+            i += 1
+        return None
+
+    def appended(self, nama):
+        pass
+
+    def removed(self, row, nama):
+        pass
+
+    def renamed(self, row, old_name, new_name):
+        pass
+
+
+class BinaryStorage(JsonStorage):
+    # Dibuka lewat mmap dalam sekejap, tidak perlu dimuat di latar belakang
+    streaming = False
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.records = None
+
+    def load(self):
+        self.close()
+        self.records = BinaryRecords(self.path)
+        return self.records
+
+    def write(self, data, ops=()):
+        # Ditulis ulang utuh; data sudah berupa kolom jadi murah. Salinan
+        # juga melepas mmap sehingga file bisa diganti di Windows.
+        snapshot = data.copy()
+        background_writer().submit(
+            self.path, lambda: write_binary(self.path, snapshot), self.DELAY
+        )
+
+    def close(self):
+        background_writer().flush()
+        if self.records is not None:
+            self.records.close()
+            self.records = None
+
+
+def json_to_binary(json_path, path):
+    # Perubahan yang masih di jurnal ikut terbawa; sumbernya tidak ditulis
+    write_binary(path, read_database(json_path))
+
+
+def binary_to_json(path, json_path):
+    records = BinaryRecords(path)
+    try:
+        write_json_atomic(json_path, records.materialize())
+    finally:
+        records.close()
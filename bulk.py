@@ -0,0 +1,238 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+import engine
+import storage
+from kurs_table import parse_kurs, parse_riwayat
+from tariff import load_tariff
+
+
+# Laporan rekap ditulis di akar folder; diawali titik supaya tidak tampil
+# di tree aplikasi.
+REPORT_FILE = ".rekap.json"
+APP_FOLDER = "kalkulator-bea-cukai"
+
+
+def _load(path, readonly):
+    if not path.endswith(".json"):
+        return storage.read_database(path), False
+
+    db = storage.JournalStorage(path, readonly=readonly)
+    data = db.load()
+    return data, db.legacy or bool(storage.related_paths(path))
+
+
+def reprice_file(path, config, readonly=False):
+    """Hitung ulang satu database dan kembalikan ringkasannya.
+
+    Kecuali `readonly`, file JSON yang masih berformat lama atau masih
+    punya jurnal ditulis ulang secara atomik menjadi satu snapshot.
+    """
+    start = time.perf_counter()
+    # Diambil sebelum dibaca: perubahan yang masuk selama membaca membuat
+    # ringkasan ini dianggap basi, bukan sebaliknya.
+    signature = storage.file_signature(path)
+    data, rewrite = _load(path, readonly)
+    totals = engine.hitung_total(engine.input_columns(data.values()), config)
+
+    if rewrite and not readonly:
+        storage.write_json_atomic(path, data)
+        for related in storage.related_paths(path):
+            os.remove(related)
+        signature = storage.file_signature(path)
+
+    return {
+        "signature": signature,
+        "entries": len(data),
+        "totals": totals,
+        "rewritten": rewrite and not readonly,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def reprice_shard(paths, config, readonly_paths=()):
+    # Dijalankan di proses pekerja; kegagalan satu file tidak menghentikan
+    # file lain di shard yang sama.
+    results = []
+    for path in paths:
+        try:
+            summary = reprice_file(path, config, path in readonly_paths)
+            results.append((path, summary, None))
+        except Exception as e:
+            results.append((path, None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def make_shards(paths, count):
+    """Bagi file ke `count` shard dengan total ukuran yang kira-kira sama."""
+    sizes = {path: _file_size(path) for path in paths}
+    shards = [[] for _ in range(max(1, min(count, len(paths))))]
+    loads = [0] * len(shards)
+    # File terbesar lebih dulu, selalu ke shard yang paling ringan
+    for path in sorted(paths, key=sizes.get, reverse=True):
+        i = loads.index(min(loads))
+        shards[i].append(path)
+        loads[i] += sizes[path]
+    return [shard for shard in shards if shard]
+
+
+def _file_size(path):
+    return os.path.getsize(path) + sum(
+        os.path.getsize(related) for related in storage.related_paths(path)
+    )
+
+
+def reprice_all(
+    root,
+    config,
+    workers=None,
+    readonly_paths=(),
+    progress=None,
+    cancelled=None,
+):
+    """Hitung ulang semua database di bawah root memakai process pool.
+
+    `progress(done_files, total_files, rows, elapsed)` dipanggil setiap
+    satu shard selesai; `cancelled()` yang mengembalikan True membatalkan
+    shard yang belum berjalan. Laporan ditulis atomik ke `<root>/.rekap.json`
+    dan juga dikembalikan.
+    """
+    # Dimuat di sini saja: GUI mengimpor modul ini (lewat rollup_cache)
+    # saat startup, padahal process pool baru dipakai saat hitung ulang.
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    start = time.perf_counter()
+    paths = storage.find_databases(root)
+    workers = workers or os.cpu_count() or 1
+    readonly_paths = {os.path.abspath(p) for p in readonly_paths}
+
+    files = {}
+    errors = {}
+    rows = 0
+    done = 0
+    aborted = False
+    # Beberapa shard per pekerja supaya progres tetap mengalir dan pekerja
+    # yang selesai lebih cepat bisa mengambil shard berikutnya.
+    shards = make_shards(paths, workers * 4)
+
+    if shards:
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as pool:
+            futures = [
+                pool.submit(
+                    reprice_shard,
+                    shard,
+                    config,
+                    {p for p in shard if os.path.abspath(p) in readonly_paths},
+                )
+                for shard in shards
+            ]
+            for future in as_completed(futures):
+                for path, summary, error in future.result():
+                    key = os.path.relpath(path, root).replace(os.sep, "/")
+                    if error is not None:
+                        errors[key] = error
+                    else:
+                        files[key] = summary
+                        rows += summary["entries"]
+                    done += 1
+                if progress is not None:
+                    progress(done, len(paths), rows, time.perf_counter() - start)
+                if cancelled is not None and cancelled():
+                    aborted = True
+                    for pending in futures:
+                        pending.cancel()
+                    break
+
+    elapsed = time.perf_counter() - start
+    report = {
+        "config": engine.config_dict(config),
+        "files": files,
+        "errors": errors,
+        "stats": {
+            "files": done,
+            "rows": rows,
+            "seconds": elapsed,
+            "rows_per_second": rows / elapsed if elapsed > 0 else 0.0,
+            "cancelled": aborted,
+        },
+    }
+    if not aborted:
+        storage.write_json_atomic(os.path.join(root, REPORT_FILE), report)
+    return report
+
+
+def default_root():
+    return os.path.join(os.environ.get("APPDATA", ""), APP_FOLDER)
+
+
+def read_config(root):
+    return config_from_file(os.path.join(root, storage.CONFIG_FILE))
+
+
+def config_from_file(path):
+    config = {}
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            config = json.load(f)
+    return engine.PajakConfig(
+        parse_kurs(config.get("KURS_PAJAK", 16275)),
+        int(config.get("PEMBEBASAN", 500)),
+        bool(config.get("NPWP", True)),
+        parse_riwayat(config.get("RIWAYAT_KURS", [])),
+        load_tariff(os.path.dirname(os.path.abspath(path))),
+        engine.parse_aritmetika(config.get("ARITMETIKA")),
+        engine.parse_pembulatan(config.get("PEMBULATAN")),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Hitung ulang semua database Kalkulator Bea Cukai."
+    )
+    parser.add_argument("root", nargs="?", default=None, help="folder database")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--kurs", type=parse_kurs, default=None, help="kurs pajak")
+    parser.add_argument("--pembebasan", type=int, default=None)
+    parser.add_argument(
+        "--npwp", choices=("ya", "tidak"), default=None, help="punya NPWP"
+    )
+    parser.add_argument("--aritmetika", choices=engine.ARITMETIKA, default=None)
+    args = parser.parse_args(argv)
+
+    root = args.root or default_root()
+    config = read_config(root)
+    if args.kurs is not None:
+        config = config._replace(kurs_pajak=args.kurs)
+    if args.pembebasan is not None:
+        config = config._replace(pembebasan=args.pembebasan)
+    if args.npwp is not None:
+        config = config._replace(npwp=args.npwp == "ya")
+    if args.aritmetika is not None:
+        config = config._replace(aritmetika=args.aritmetika)
+
+    def progress(done, total, rows, elapsed):
+        rate = rows / elapsed if elapsed > 0 else 0.0
+        print(
+            f"\r{done}/{total} file, {rows:,} baris, {rate:,.0f} baris/detik",
+            end="",
+            file=sys.stderr,
+            flush=True,
+        )
+
+    report = reprice_all(root, config, workers=args.workers, progress=progress)
+    print(file=sys.stderr)
+    for key, error in report["errors"].items():
+        print(f"Gagal: {key}: {error}", file=sys.stderr)
+    stats = report["stats"]
+    print(
+        f"{stats['files']} file, {stats['rows']:,} baris dalam "
+        f"{stats['seconds']:.2f} detik"
+    )
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+import os
+import json
+import time
+import threading
+
+import storage
+
+
+CATALOG_FILE = ".katalog.json"
+
+
+def walk_databases(root):
+    """Yield (path, stat) untuk semua database di bawah root.
+
+    Rekursif dengan os.scandir, jadi stat dari DirEntry dipakai langsung
+    (di Windows tanpa panggilan sistem tambahan). File dan folder yang
+    diawali titik dilewati, sama seperti storage.find_databases.
+    """
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        try:
+            entries = list(os.scandir(folder))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            try:
+                if entry.is_dir():
+                    stack.append(entry.path)
+                elif entry.is_file() and storage.is_database_file(entry.name):
+                    yield entry.path, entry.stat()
+            except OSError:
+                # Terhapus di tengah pemindaian
+                continue
+
+
+class DatabaseCatalog:
+    """Metadata semua database di bawah root: ukuran, mtime, jumlah barang,
+    dan kapan terakhir dibuka.
+
+    Disimpan di `<root>/.katalog.json` dan dibaca sekali saat startup, jadi
+    memilih database berikutnya, daftar "Buka Terakhir", dan tooltip tree
+    tidak perlu membaca folder. Operasi file di aplikasi memperbarui
+    katalog satu path sekaligus; `scan` mencocokkan ulang seluruh tree
+    dengan disk untuk perubahan dari luar dan dijalankan di thread latar.
+    Jumlah barang diisi dari ringkasan RollupCache; None jika belum
+    diketahui. Semua method aman dipanggil dari thread mana pun.
+    """
+
+    SAVE_DELAY = 2.0
+
+    def __init__(self, root):
+        self.root = root
+        self.path = os.path.join(root, CATALOG_FILE)
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return False
+        with self._lock:
+            self._entries = {
+                os.path.join(self.root, *key.split("/")): entry
+                for key, entry in saved.get("files", {}).items()
+            }
+        return True
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, path):
+        with self._lock:
+            entry = self._entries.get(path)
+            return dict(entry) if entry is not None else None
+
+    def latest(self, exclude=None):
+        """Database yang paling baru dibuka, atau diubah jika belum pernah
+        dibuka; None jika katalog kosong.
+        """
+        with self._lock:
+            candidates = [
+                (entry["opened"], entry["mtime"], path)
+                for path, entry in self._entries.items()
+                if path != exclude
+            ]
+        return max(candidates)[2] if candidates else None
+
+    def recent(self, count=10):
+        """Path yang pernah dibuka, terbaru lebih dulu."""
+        with self._lock:
+            opened = [
+                (entry["opened"], path)
+                for path, entry in self._entries.items()
+                if entry["opened"]
+            ]
+        return [path for _, path in sorted(opened, reverse=True)[:count]]
+
+    # Pembaruan inkremental dari operasi di aplikasi
+
+    def update(self, path, entries=None):
+        """Baca ulang ukuran dan mtime satu file; `entries` jika diketahui."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.remove_path(path)
+            return
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                entry = self._entries[path] = self._new_entry(stat)
+            else:
+                self._set_stat(entry, stat)
+            if entries is not None:
+                entry["entries"] = entries
+        self._save()
+
+    def opened(self, path):
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                try:
+                    entry = self._entries[path] = self._new_entry(os.stat(path))
+                except OSError:
+                    return
+            entry["opened"] = time.time()
+        self._save()
+
+    def rename_path(self, old_path, new_path):
+        """Ganti path file, atau semua file di dalam folder old_path."""
+        with self._lock:
+            prefix = old_path + os.sep
+            for path in list(self._entries):
+                if path == old_path:
+                    moved = new_path
+                elif path.startswith(prefix):
+                    moved = new_path + path[len(old_path) :]
+                else:
+                    continue
+                self._entries[moved] = self._entries.pop(path)
+        self._save()
+
+    def remove_path(self, path):
+        with self._lock:
+            prefix = path + os.sep
+            for known in list(self._entries):
+                if known == path or known.startswith(prefix):
+                    del self._entries[known]
+        self._save()
+
+    def scan(self):
+        """Cocokkan katalog dengan isi disk; dipanggil dari thread latar."""
+        found = dict(walk_databases(self.root))
+        with self._lock:
+            for path in list(self._entries):
+                if path not in found:
+                    del self._entries[path]
+            for path, stat in found.items():
+                entry = self._entries.get(path)
+                if entry is None:
+                    self._entries[path] = self._new_entry(stat)
+                elif (entry["size"], entry["mtime"]) != (stat.st_size, stat.st_mtime):
+                    self._set_stat(entry, stat)
+        self._save()
+
+    # Internal
+
+    @staticmethod
+    def _new_entry(stat):
+        return {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "entries": None,
+            "opened": 0,
+        }
+
+    @staticmethod
+    def _set_stat(entry, stat):
+        if (entry["size"], entry["mtime"]) != (stat.st_size, stat.st_mtime):
+            # Isi berubah di luar sepengetahuan katalog
+            entry["entries"] = None
+        entry["size"] = stat.st_size
+        entry["mtime"] = stat.st_mtime
+
+    def _save(self):
+        storage.background_writer().submit(self.path, self._write, self.SAVE_DELAY)
+
+    def _write(self):
+        with self._lock:
+            saved = {
+                "files": {
+                    os.path.relpath(path, self.root).replace(os.sep, "/"): dict(entry)
+                    for path, entry in self._entries.items()
+                }
+            }
+        storage.write_json_atomic(self.path, saved)
@@ -0,0 +1,50 @@
+import threading
+
+from PySide6.QtCore import QObject, Signal
+
+from qt_compat import emit
+
+
+class DataLoader(QObject):
+    """Memuat database lewat storage.stream() di thread terpisah.
+
+    Sinyal dipancarkan dari thread pekerja dan diterima GUI lewat queued
+    connection, jadi tabel terisi bertahap tanpa membekukan jendela.
+    """
+
+    batch_loaded = Signal(object, float)
+    ops_loaded = Signal(object)
+    loaded = Signal()
+    failed = Signal(object)
+
+    def __init__(self, storage, parent=None):
+        super().__init__(parent)
+        self.storage = storage
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def cancel(self):
+        self._cancelled.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def _run(self):
+        try:
+            for items, ops, progress in self.storage.stream():
+                if self._cancelled.is_set():
+                    return
+                if items:
+                    emit(self.batch_loaded, items, progress)
+                if ops:
+                    emit(self.ops_loaded, ops)
+            if not self._cancelled.is_set():
+                emit(self.loaded)
+        except Exception as e:
+            if not self._cancelled.is_set():
+                emit(self.failed, e)
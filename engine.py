@@ -0,0 +1,563 @@
+from functools import lru_cache
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy opsional, batch jatuh ke loop biasa
+    np = None
+
+from kurs_table import KursTable, dump_riwayat
+from tracing import traced
+from tariff import TARIF_UMUM, Tarif, TariffTable
+
+
+# Tarif bea masuk untuk barang tanpa kode HS atau yang tidak ada di tabel
+BEA_MASUK_RATE = TARIF_UMUM.bea_masuk
+PPN_RATE = 0.11
+PPH_RATE_NPWP = 0.10
+PPH_RATE_NON_NPWP = 0.20
+
+# Mode aritmetika PajakConfig. "float" menghitung dalam USD float seperti
+# semula; "tetap" menghitung dalam bilangan bulat (rupiah, mili-USD, dan
+# tarif per sejuta) dengan pembulatan eksplisit, jadi hasilnya pasti dan
+# sama di mesin mana pun.
+ARITMETIKA_FLOAT = "float"
+ARITMETIKA_TETAP = "tetap"
+ARITMETIKA = (ARITMETIKA_FLOAT, ARITMETIKA_TETAP)
+
+# Pembulatan setiap pungutan (bea masuk, PPN, PPh, PPnBM) di mode tetap:
+# ke kelipatan `satuan` rupiah, ke arah "bawah", "atas", atau "terdekat"
+# (setengah ke atas). Default: ke atas ke ribuan rupiah penuh.
+Pembulatan = namedtuple("Pembulatan", ["satuan", "arah"])
+ARAH_PEMBULATAN = ("bawah", "atas", "terdekat")
+PEMBULATAN_DEFAULT = Pembulatan(1000, "atas")
+
+# Skala bilangan bulat mode tetap
+RATE_SCALE = 1_000_000
+USD_SCALE = 1000
+USD_FIELDS = ("selisih_pembebasan", "bea_masuk", "total_usd")
+
+FIELDS = (
+    "harga_idr",
+    "selisih_pembebasan",
+    "bea_masuk",
+    "ppn_idr",
+    "pph_idr",
+    "ppnbm_idr",
+    "total_usd",
+    "total_idr",
+)
+
+# Hanya field ini yang disimpan; sisanya diturunkan dari konfigurasi.
+# tanggal adalah tanggal transaksi YYYYMMDD (0 = tanpa tanggal) yang
+# menentukan kurs dari riwayat kurs; kode_hs menentukan tarif (lihat
+# tariff.parse_kode_hs, 0 = tanpa kode).
+INPUT_FIELDS = ("harga_idr", "tanggal", "kode_hs")
+
+# riwayat_kurs: tuple (mulai_berlaku, kurs) terurut, lihat KursTable;
+# tarif: TariffTable; aritmetika: salah satu ARITMETIKA; pembulatan:
+# Pembulatan, hanya dipakai mode tetap
+PajakConfig = namedtuple(
+    "PajakConfig",
+    [
+        "kurs_pajak",
+        "pembebasan",
+        "npwp",
+        "riwayat_kurs",
+        "tarif",
+        "aritmetika",
+        "pembulatan",
+    ],
+    defaults=((), TariffTable(), ARITMETIKA_FLOAT, PEMBULATAN_DEFAULT),
+)
+
+
+def input_record(record):
+    return {field: record[field] for field in INPUT_FIELDS if field in record}
+
+
+def input_columns(records):
+    """Kolom INPUT_FIELDS dari sekumpulan record; field yang tidak ada 0."""
+    records = list(records)
+    return {
+        field: [record.get(field, 0) for record in records] for field in INPUT_FIELDS
+    }
+
+
+def pph_rate(npwp):
+    return PPH_RATE_NPWP if npwp else PPH_RATE_NON_NPWP
+
+
+def parse_pembulatan(value):
+    """Pembulatan dari config.json ({"satuan", "arah"}); None -> default."""
+    if not value:
+        return PEMBULATAN_DEFAULT
+    pembulatan = Pembulatan(int(value["satuan"]), str(value["arah"]))
+    if pembulatan.satuan < 1 or pembulatan.arah not in ARAH_PEMBULATAN:
+        raise ValueError(f"Pembulatan tidak valid: {value!r}")
+    return pembulatan
+
+
+def dump_pembulatan(pembulatan):
+    return {"satuan": pembulatan.satuan, "arah": pembulatan.arah}
+
+
+def parse_aritmetika(value):
+    return value if value in ARITMETIKA else ARITMETIKA_FLOAT
+
+
+def config_dict(config):
+    """Bentuk JSON dari PajakConfig, mis. untuk laporan rekap."""
+    config = config._asdict()
+    config["riwayat_kurs"] = dump_riwayat(config["riwayat_kurs"])
+    config["pembulatan"] = dump_pembulatan(config["pembulatan"])
+    # Tabel tarif bisa ribuan baris; cukup sidik jarinya
+    config["tarif"] = {
+        "entries": len(config["tarif"]),
+        "fingerprint": config["tarif"].fingerprint,
+    }
+    return config
+
+
+@lru_cache(maxsize=8)
+def _kurs_table(riwayat_kurs, kurs_pajak):
+    return KursTable(riwayat_kurs, kurs_pajak)
+
+
+def kurs_table(config):
+    # Satu tabel (beserta memonya) untuk setiap konfigurasi yang dipakai
+    return _kurs_table(config.riwayat_kurs, config.kurs_pajak)
+
+
+def hitung_pajak_record(record, config):
+    """hitung_pajak untuk satu record input: kurs sesuai tanggalnya dan
+    tarif sesuai kode HS-nya.
+    """
+    kurs = kurs_table(config).kurs_pada(record.get("tanggal", 0))
+    tarif = config.tarif.lookup(record.get("kode_hs", 0))
+    if config.aritmetika == ARITMETIKA_TETAP:
+        hasil = hitung_pajak_tetap(
+            record["harga_idr"],
+            kurs,
+            config.pembebasan,
+            config.npwp,
+            tarif,
+            config.pembulatan,
+        )
+        return _dari_mili_usd(hasil)
+    return hitung_pajak(
+        record["harga_idr"], kurs, config.pembebasan, config.npwp, tarif
+    )
+
+
+def hitung_pajak_kolom(inputs, config):
+    """hitung_pajak_batch untuk kolom input (dict field -> kolom, lihat
+    input_columns); kolom tanggal dan kode_hs boleh tidak ada.
+    """
+    columns = _hitung_kolom(inputs, config)
+    if config.aritmetika == ARITMETIKA_TETAP:
+        return _dari_mili_usd(columns)
+    return columns
+
+
+def _hitung_kolom(inputs, config):
+    # Mode tetap: nilai USD masih dalam mili-USD
+    harga_idr = inputs["harga_idr"]
+    tanggal = inputs.get("tanggal")
+    kode_hs = inputs.get("kode_hs")
+    kurs = config.kurs_pajak
+    if tanggal is not None:
+        kurs = kurs_table(config).kurs_kolom(tanggal)
+    tarif = TARIF_UMUM
+    if kode_hs is not None:
+        tarif = config.tarif.lookup_column(kode_hs)
+    if config.aritmetika == ARITMETIKA_TETAP:
+        return hitung_pajak_tetap_batch(
+            harga_idr, kurs, config.pembebasan, config.npwp, tarif, config.pembulatan
+        )
+    return hitung_pajak_batch(harga_idr, kurs, config.pembebasan, config.npwp, tarif)
+
+
+@traced("engine.hitung_pajak")
+def hitung_pajak(harga_idr, kurs_pajak, pembebasan, npwp, tarif=TARIF_UMUM):
+    """Hitung pajak impor satu barang, hasilnya dict dengan kunci FIELDS."""
+    harga_usd = harga_idr / kurs_pajak
+    selisih_pembebasan = max(0, harga_usd - pembebasan)
+    bea_masuk = selisih_pembebasan * tarif.bea_masuk
+    nilai_impor = selisih_pembebasan + bea_masuk
+    ppn_usd = nilai_impor * PPN_RATE
+    pph_usd = nilai_impor * pph_rate(npwp)
+    ppnbm_usd = nilai_impor * tarif.ppnbm
+    if tarif.bebas:
+        bea_masuk = ppn_usd = pph_usd = ppnbm_usd = 0.0
+    total_usd = bea_masuk + ppn_usd + pph_usd + ppnbm_usd
+
+    return {
+        "harga_idr": harga_idr,
+        "selisih_pembebasan": selisih_pembebasan,
+        "bea_masuk": bea_masuk,
+        "ppn_idr": int(ppn_usd * kurs_pajak),
+        "pph_idr": int(pph_usd * kurs_pajak),
+        "ppnbm_idr": int(ppnbm_usd * kurs_pajak),
+        "total_usd": total_usd,
+        "total_idr": int(total_usd * kurs_pajak),
+    }
+
+
+@traced("engine.hitung_pajak_batch")
+def hitung_pajak_batch(harga_idr, kurs_pajak, pembebasan, npwp, tarif=TARIF_UMUM):
+    """Versi vektor dari hitung_pajak untuk satu kolom harga sekaligus.
+
+    Hasilnya dict berisi kolom-kolom FIELDS. Dengan numpy setiap kolom
+    berupa ndarray (float64 untuk nilai USD, int64 untuk nilai IDR);
+    tanpa numpy setiap kolom berupa list. Angkanya identik dengan
+    hitung_pajak karena urutan operasinya sama persis. `kurs_pajak` boleh
+    berupa satu angka atau satu kolom (kurs per baris), begitu juga isi
+    `tarif` (lihat TariffTable.lookup_column).
+    """
+    if np is None:
+        return _hitung_pajak_loop(
+            lambda harga, kurs, tarif: hitung_pajak(
+                harga, kurs, pembebasan, npwp, tarif
+            ),
+            harga_idr,
+            kurs_pajak,
+            tarif,
+        )
+
+    harga_idr = np.asarray(harga_idr, dtype=np.int64)
+    kurs = np.asarray(kurs_pajak, dtype=np.float64)
+
+    harga_usd = harga_idr / kurs
+    selisih_pembebasan = np.maximum(0.0, harga_usd - pembebasan)
+    bea_masuk = selisih_pembebasan * tarif.bea_masuk
+    nilai_impor = selisih_pembebasan + bea_masuk
+    ppn_usd = nilai_impor * PPN_RATE
+    pph_usd = nilai_impor * pph_rate(npwp)
+    ppnbm_usd = nilai_impor * tarif.ppnbm
+    if np.any(tarif.bebas):
+        bea_masuk, ppn_usd, pph_usd, ppnbm_usd = (
+            np.where(tarif.bebas, 0.0, column)
+            for column in (bea_masuk, ppn_usd, pph_usd, ppnbm_usd)
+        )
+    total_usd = bea_masuk + ppn_usd + pph_usd + ppnbm_usd
+
+    return {
+        "harga_idr": harga_idr,
+        "selisih_pembebasan": selisih_pembebasan,
+        "bea_masuk": bea_masuk,
+        "ppn_idr": (ppn_usd * kurs).astype(np.int64),
+        "pph_idr": (pph_usd * kurs).astype(np.int64),
+        "ppnbm_idr": (ppnbm_usd * kurs).astype(np.int64),
+        "total_usd": total_usd,
+        "total_idr": (total_usd * kurs).astype(np.int64),
+    }
+
+
+def hitung_total(inputs, config):
+    """Jumlah setiap kolom FIELDS untuk kolom input, sebagai angka Python.
+
+    Di mode tetap penjumlahannya dalam bilangan bulat, jadi totalnya pasti.
+    """
+    columns = _hitung_kolom(inputs, config)
+    total = {
+        field: sum(column) if isinstance(column, list) else column.sum().item()
+        for field, column in columns.items()
+    }
+    if config.aritmetika == ARITMETIKA_TETAP:
+        return _dari_mili_usd(total)
+    return total
+
+
+def _hitung_pajak_loop(hitung, harga_idr, kurs_pajak, tarif):
+    # hitung(harga, kurs, tarif) per baris; kolomnya berupa list
+    columns = {field: [] for field in FIELDS}
+    if not hasattr(kurs_pajak, "__len__"):
+        kurs_pajak = [kurs_pajak] * len(harga_idr)
+    if isinstance(tarif.bebas, bool):
+        tarifs = [tarif] * len(harga_idr)
+    else:
+        tarifs = [Tarif(*values) for values in zip(*tarif)]
+    for harga, kurs, tarif in zip(harga_idr, kurs_pajak, tarifs):
+        hasil = hitung(int(harga), kurs, tarif)
+        for field in FIELDS:
+            columns[field].append(hasil[field])
+    return columns
+
+
+# Aritmetika titik tetap
+
+
+def _bagi(x, d, arah):
+    # x / d dibulatkan ke `arah`; x >= 0, berlaku untuk int dan ndarray int64
+    if arah == "bawah":
+        return x // d
+    if arah == "atas":
+        return -(-x // d)
+    return (x + d // 2) // d
+
+
+def _ppm(rate):
+    """Tarif pecahan -> bilangan bulat per sejuta (0.11 -> 110000)."""
+    if np is not None and not isinstance(rate, (bool, int, float)):
+        return np.rint(np.asarray(rate, dtype=np.float64) * RATE_SCALE).astype(
+            np.int64
+        )
+    return int(round(rate * RATE_SCALE))
+
+
+def _pungutan(dasar_idr, rate_ppm, pembulatan):
+    satuan, arah = pembulatan
+    return _bagi(dasar_idr * rate_ppm, RATE_SCALE * satuan, arah) * satuan
+
+
+@lru_cache(maxsize=256)
+def _tarif_ppm(bea_masuk, ppnbm, npwp):
+    # (bea masuk, PPN, PPh, PPnBM) per sejuta untuk satu tarif skalar
+    return (_ppm(bea_masuk), _ppm(PPN_RATE), _ppm(pph_rate(npwp)), _ppm(ppnbm))
+
+
+def _ke_mili_usd(nilai_idr, kurs):
+    return _bagi(nilai_idr * USD_SCALE, kurs, "terdekat")
+
+
+def _dari_mili_usd(hasil):
+    # Kolom USD mode tetap (mili-USD) -> USD seperti hasil hitung_pajak
+    for field in USD_FIELDS:
+        value = hasil[field]
+        if isinstance(value, list):
+            hasil[field] = [v / USD_SCALE for v in value]
+        else:
+            hasil[field] = value / USD_SCALE
+    return hasil
+
+
+@traced("engine.hitung_pajak_tetap")
+def hitung_pajak_tetap(
+    harga_idr, kurs_pajak, pembebasan, npwp, tarif=TARIF_UMUM, pembulatan=None
+):
+    """hitung_pajak dengan aritmetika titik tetap; semua hasil bilangan bulat.
+
+    Nilai IDR dalam rupiah, nilai USD dalam mili-USD. Dasar pungutan
+    dihitung langsung dalam rupiah (harga dikurangi pembebasan x kurs),
+    setiap pungutan dibulatkan sesuai `pembulatan` (default
+    PEMBULATAN_DEFAULT), dan nilai impor untuk PPN, PPh, dan PPnBM memakai
+    bea masuk yang sudah dibulatkan. Nilai USD hanya konversi untuk
+    tampilan, dibulatkan ke mili-USD terdekat.
+    """
+    satuan, arah = pembulatan or PEMBULATAN_DEFAULT
+    skala = RATE_SCALE * satuan
+    harga_idr = int(harga_idr)
+    kurs_pajak = int(kurs_pajak)
+    dasar = max(0, harga_idr - pembebasan * kurs_pajak)
+    if tarif.bebas:
+        bea_masuk = ppn = pph = ppnbm = 0
+    else:
+        rates = _tarif_ppm(tarif.bea_masuk, tarif.ppnbm, npwp)
+        bea_masuk = _bagi(dasar * rates[0], skala, arah) * satuan
+        nilai_impor = dasar + bea_masuk
+        ppn = _bagi(nilai_impor * rates[1], skala, arah) * satuan
+        pph = _bagi(nilai_impor * rates[2], skala, arah) * satuan
+        ppnbm = _bagi(nilai_impor * rates[3], skala, arah) * satuan
+    total = bea_masuk + ppn + pph + ppnbm
+
+    return {
+        "harga_idr": harga_idr,
+        "selisih_pembebasan": _ke_mili_usd(dasar, kurs_pajak),
+        "bea_masuk": _ke_mili_usd(bea_masuk, kurs_pajak),
+        "ppn_idr": ppn,
+        "pph_idr": pph,
+        "ppnbm_idr": ppnbm,
+        "total_usd": _ke_mili_usd(total, kurs_pajak),
+        "total_idr": total,
+    }
+
+
+@traced("engine.hitung_pajak_tetap_batch")
+def hitung_pajak_tetap_batch(
+    harga_idr, kurs_pajak, pembebasan, npwp, tarif=TARIF_UMUM, pembulatan=None
+):
+    """Versi vektor dari hitung_pajak_tetap dengan kolom int64.
+
+    Hasilnya identik dengan hitung_pajak_tetap per baris. Kolom yang
+    perkaliannya bisa melampaui int64 (harga sekitar di atas 10^12 rupiah)
+    dan lingkungan tanpa numpy dihitung per baris dengan int Python, yang
+    tidak punya batas.
+    """
+    pembulatan = pembulatan or PEMBULATAN_DEFAULT
+    if np is None:
+        return _hitung_tetap_loop(
+            harga_idr, kurs_pajak, pembebasan, npwp, tarif, pembulatan
+        )
+
+    harga_idr = np.asarray(harga_idr, dtype=np.int64)
+    kurs = np.asarray(kurs_pajak, dtype=np.int64)
+    bea_masuk_ppm = _ppm(tarif.bea_masuk)
+    rates = (_ppm(PPN_RATE), _ppm(pph_rate(npwp)), _ppm(tarif.ppnbm))
+    if not _muat_int64(harga_idr, bea_masuk_ppm, rates, pembulatan):
+        columns = _hitung_tetap_loop(
+            harga_idr, kurs_pajak, pembebasan, npwp, tarif, pembulatan
+        )
+        return {field: np.array(column) for field, column in columns.items()}
+
+    dasar = np.maximum(0, harga_idr - pembebasan * kurs)
+    bea_masuk = _pungutan(dasar, bea_masuk_ppm, pembulatan)
+    nilai_impor = dasar + bea_masuk
+    ppn, pph, ppnbm = (_pungutan(nilai_impor, rate, pembulatan) for rate in rates)
+    if np.any(tarif.bebas):
+        bea_masuk, ppn, pph, ppnbm = (
+            np.where(tarif.bebas, 0, column) for column in (bea_masuk, ppn, pph, ppnbm)
+        )
+    total = bea_masuk + ppn + pph + ppnbm
+
+    return {
+        "harga_idr": harga_idr,
+        "selisih_pembebasan": _ke_mili_usd(dasar, kurs),
+        "bea_masuk": _ke_mili_usd(bea_masuk, kurs),
+        "ppn_idr": ppn,
+        "pph_idr": pph,
+        "ppnbm_idr": ppnbm,
+        "total_usd": _ke_mili_usd(total, kurs),
+        "total_idr": total,
+    }
+
+
+def _muat_int64(harga_idr, bea_masuk_ppm, rates, pembulatan):
+    # Batas atas setiap perkalian di hitung_pajak_tetap_batch, dihitung
+    # dengan int Python: nilai impor x tarif dan total x USD_SCALE
+    if not harga_idr.size:
+        return True
+    harga = max(int(harga_idr.max()), 0)
+    bea_masuk = int(np.max(bea_masuk_ppm))
+    rates = [bea_masuk] + [int(np.max(rate)) for rate in rates]
+    nilai_impor = harga + harga * bea_masuk // RATE_SCALE + pembulatan.satuan
+    total = nilai_impor * sum(rates) // RATE_SCALE + len(rates) * pembulatan.satuan
+    terbesar = max(
+        nilai_impor * max(rates) + RATE_SCALE * pembulatan.satuan,
+        total * USD_SCALE,
+        harga * USD_SCALE,
+    )
+    return terbesar < 2**63
+
+
+def _hitung_tetap_loop(harga_idr, kurs_pajak, pembebasan, npwp, tarif, pembulatan):
+    return _hitung_pajak_loop(
+        lambda harga, kurs, tarif: hitung_pajak_tetap(
+            harga, kurs, pembebasan, npwp, tarif, pembulatan
+        ),
+        harga_idr,
+        kurs_pajak,
+        tarif,
+    )
+
+
+class DerivedCache:
+    """Memo kolom turunan (FIELDS) untuk data yang hanya berisi input.
+
+    Memo berlaku untuk satu fingerprint konfigurasi (PajakConfig). Saat
+    fingerprint berubah, seluruh data dict dihitung ulang dalam satu
+    panggilan hitung_pajak_batch; baris yang berubah sesudahnya cukup
+    dibuang dari memo dan dihitung ulang satu per satu saat diminta.
+
+    Untuk store kolom (punya method column(), mis. RecordStore) hasil
+    batch diindeks per baris lewat row_of, tanpa indeks nama sendiri.
+    """
+
+    EXTRA_LIMIT = 65536
+
+    def __init__(self):
+        self.reset({})
+
+    def reset(self, data):
+        self._data = data
+        self._by_row = hasattr(data, "column")
+        self._config = None
+        self._index = {}
+        self._columns = {}
+        self._extra = {}
+        self._batch_rows = 0
+        self._stale = set()
+        self._shifted = False
+
+    def get(self, nama, record, config):
+        if config != self._config or self._outgrown():
+            self._rebuild(config)
+
+        derived = self._extra.get(nama)
+        if derived is not None:
+            return derived
+
+        i = self._lookup(nama)
+        if i is not None:
+            return {field: self._columns[field][i].item() for field in FIELDS}
+
+        if len(self._extra) >= self.EXTRA_LIMIT:
+            self._extra.clear()
+        derived = hitung_pajak_record(record, config)
+        self._extra[nama] = derived
+        return derived
+
+    def invalidate(self, nama):
+        self._index.pop(nama, None)
+        self._extra.pop(nama, None)
+        if self._by_row:
+            self._stale.add(nama)
+
+    def rows_removed(self):
+        # Hasil batch store kolom diindeks per baris; setelah baris bergeser
+        # sisanya dihitung per baris sampai fingerprint berikutnya.
+        self._shifted = True
+
+    def _outgrown(self):
+        # Data yang dimuat bertahap dihitung ulang setiap ukurannya berlipat
+        if np is None or not (self._by_row or isinstance(self._data, dict)):
+            return False
+        return len(self._data) > 2 * self._batch_rows + 1024
+
+    def _lookup(self, nama):
+        if not self._by_row:
+            return self._index.get(nama)
+        if self._shifted or nama in self._stale:
+            return None
+        row = self._data.row_of(nama)
+        if row is None or row >= self._batch_rows:
+            return None
+        return row
+
+    def _rebuild(self, config):
+        self._config = config
+        self._index = {}
+        self._columns = {}
+        self._extra = {}
+        self._batch_rows = 0
+        self._stale = set()
+        self._shifted = False
+        if np is None:
+            return
+
+        if self._by_row:
+            inputs = {
+                field: np.array(self._data.column(field), dtype=np.int64)
+                for field in INPUT_FIELDS
+            }
+            self._columns = hitung_pajak_kolom(inputs, config)
+            self._batch_rows = len(self._data)
+            return
+
+        # Store yang dibaca per halaman dihitung per baris saat dibutuhkan
+        if not isinstance(self._data, dict):
+            return
+
+        names = list(self._data)
+        records = [self._data[nama] for nama in names]
+        inputs = {
+            field: np.fromiter(
+                (record.get(field, 0) for record in records),
+                dtype=np.int64,
+                count=len(names),
+            )
+            for field in INPUT_FIELDS
+        }
+        self._columns = hitung_pajak_kolom(inputs, config)
+        self._index = {nama: i for i, nama in enumerate(names)}
+        self._batch_rows = len(names)
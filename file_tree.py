@@ -0,0 +1,366 @@
+import os
+import itertools
+
+from PySide6.QtCore import (
+    Qt,
+    QAbstractItemModel,
+    QModelIndex,
+    QFileSystemWatcher,
+    QTimer,
+    Signal,
+)
+from PySide6.QtWidgets import QFileIconProvider
+
+import storage
+from qt_compat import no_data, emit
+from tracing import timed
+
+
+class _Node:
+    __slots__ = ("id", "name", "path", "is_dir", "parent", "children", "row")
+
+    def __init__(self, node_id, name, path, is_dir, parent):
+        self.id = node_id
+        self.name = name
+        self.path = path
+        self.is_dir = is_dir
+        self.parent = parent
+        # None = isi folder belum dibaca
+        self.children = None
+        self.row = 0
+
+    def sort_key(self):
+        # Folder dulu, lalu nama tanpa membedakan huruf besar/kecil
+        return (not self.is_dir, self.name.casefold(), self.name)
+
+
+def _sort_key(name, is_dir):
+    return (not is_dir, name.casefold(), name)
+
+
+class FileTreeModel(QAbstractItemModel):
+    """Tree folder dan file database di bawah `root`.
+
+    Pengganti QFileSystemModel yang tidak memindai ulang: operasi file
+    dari aplikasi sendiri diteruskan lewat add_path, remove_path, dan
+    rename_path, yang hanya menyentuh satu folder induk. Isi folder dibaca
+    saat pertama kali dibuka (fetchMore). Perubahan dari luar aplikasi
+    ditangkap QFileSystemWatcher per folder yang sudah dibaca, lalu hanya
+    folder itu yang dibandingkan ulang dengan disk.
+
+    Index menyimpan id simpul, bukan pointer, supaya index lama dari
+    simpul yang sudah dihapus tidak menunjuk ke objek yang sudah bebas.
+    """
+
+    # Nama sama dengan QFileSystemModel; dipancarkan setelah isi folder dibaca
+    directoryLoaded = Signal(str)
+
+    COLUMNS = 4
+    REFRESH_DELAY_MS = 200
+
+    def __init__(self, root, parent=None):
+        super().__init__(parent)
+        root = os.path.normpath(root)
+        self._ids = itertools.count(1)
+        self._nodes = {}
+        self._by_path = {}
+        self._root = self._new_node(os.path.basename(root), root, True, None)
+        self._icons = QFileIconProvider()
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._directory_changed)
+        self._pending = set()
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.timeout.connect(self._refresh_pending)
+
+    # API bergaya QFileSystemModel yang dipakai jendela utama
+
+    def rootPath(self):
+        return self._root.path
+
+    def fileName(self, index):
+        node = self._node(index)
+        return node.name if node is not None else ""
+
+    def filePath(self, index):
+        node = self._node(index)
+        return node.path if node is not None else ""
+
+    def isDir(self, index):
+        node = self._node(index)
+        return node is not None and node.is_dir
+
+    def path_index(self, path, column=0):
+        """Index untuk path; tidak valid jika foldernya belum dibaca."""
+        node = self._by_path.get(os.path.normpath(path))
+        if node is None:
+            return QModelIndex()
+        return self._index(node, column)
+
+    # Perubahan dari operasi aplikasi
+
+    @timed("tree.add_path")
+    def add_path(self, path):
+        path = os.path.normpath(path)
+        parent = self._by_path.get(os.path.dirname(path))
+        if parent is None or parent.children is None or path in self._by_path:
+            # Folder induk yang belum dibaca akan memuatnya saat dibuka
+            return
+        is_dir = os.path.isdir(path)
+        if not self._accepts(os.path.basename(path), is_dir):
+            return
+        self._insert(parent, os.path.basename(path), is_dir)
+
+    @timed("tree.remove_path")
+    def remove_path(self, path):
+        node = self._by_path.get(os.path.normpath(path))
+        if node is None or node is self._root:
+            return
+        parent = node.parent
+        self.beginRemoveRows(self._index(parent), node.row, node.row)
+        del parent.children[node.row]
+        self._renumber(parent, node.row)
+        self._forget(node)
+        self.endRemoveRows()
+
+    @timed("tree.rename_path")
+    def rename_path(self, old_path, new_path):
+        """Ganti nama atau pindahkan file/folder; isi folder ikut pindah."""
+        old_path = os.path.normpath(old_path)
+        new_path = os.path.normpath(new_path)
+        node = self._by_path.get(old_path)
+        new_parent = self._by_path.get(os.path.dirname(new_path))
+        if node is None:
+            self.add_path(new_path)
+            return
+        if new_parent is None or new_parent.children is None:
+            self.remove_path(old_path)
+            return
+
+        name = os.path.basename(new_path)
+        old_parent = node.parent
+        source_row = node.row
+        siblings = [child for child in new_parent.children if child is not node]
+        row = self._insert_row(siblings, _sort_key(name, node.is_dir))
+        # Baris tujuan beginMoveRows dihitung sebelum baris asal dilepas
+        destination = row
+        if new_parent is old_parent and row >= source_row:
+            destination += 1
+        moved = new_parent is not old_parent or destination not in (
+            source_row,
+            source_row + 1,
+        )
+
+        if moved:
+            self.beginMoveRows(
+                self._index(old_parent),
+                source_row,
+                source_row,
+                self._index(new_parent),
+                destination,
+            )
+        del old_parent.children[source_row]
+        new_parent.children.insert(row, node)
+        node.parent = new_parent
+        node.name = name
+        self._move_paths(node, new_path)
+        self._renumber(old_parent)
+        if new_parent is not old_parent:
+            self._renumber(new_parent)
+        if moved:
+            self.endMoveRows()
+        index = self._index(node)
+        emit(self.dataChanged, index, index.siblingAtColumn(self.COLUMNS - 1))
+
+    @timed("tree.refresh_path")
+    def refresh_path(self, path):
+        """Cocokkan ulang satu folder dengan disk."""
+        node = self._by_path.get(os.path.normpath(path))
+        if node is None or node.children is None:
+            return
+        try:
+            found = self._scan(node.path)
+        except OSError:
+            # Folder itu sendiri hilang; induknya akan menyusul lewat watcher
+            return
+        for child in list(node.children):
+            if found.get(child.name) != child.is_dir:
+                self.remove_path(child.path)
+        known = {child.name for child in node.children}
+        for name, is_dir in found.items():
+            if name not in known:
+                self._insert(node, name, is_dir)
+
+    # QAbstractItemModel
+
+    def index(self, row, column, parent=QModelIndex()):
+        node = self._node(parent) if parent.isValid() else self._root
+        if node is None or node.children is None:
+            return QModelIndex()
+        if not 0 <= row < len(node.children) or not 0 <= column < self.COLUMNS:
+            return QModelIndex()
+        return self.createIndex(row, column, node.children[row].id)
+
+    def parent(self, index):
+        node = self._node(index)
+        if node is None or node.parent is None or node.parent is self._root:
+            return QModelIndex()
+        return self.createIndex(node.parent.row, 0, node.parent.id)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        node = self._node(parent) if parent.isValid() else self._root
+        if node is None or node.children is None:
+            return 0
+        return len(node.children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return self.COLUMNS
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self._node(parent) if parent.isValid() else self._root
+        if node is None or not node.is_dir:
+            return False
+        # Folder yang belum dibaca tetap diberi tanda panah seperti di
+        # QFileSystemModel
+        return node.children is None or bool(node.children)
+
+    def canFetchMore(self, parent):
+        node = self._node(parent) if parent.isValid() else self._root
+        return node is not None and node.is_dir and node.children is None
+
+    @timed("tree.fetchMore")
+    def fetchMore(self, parent):
+        node = self._node(parent) if parent.isValid() else self._root
+        if node is None or node.children is not None:
+            return
+        self._load(node, parent)
+
+    def data(self, index, role=Qt.DisplayRole):
+        node = self._node(index)
+        if node is None or index.column() > 0:
+            return no_data()
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return node.name
+        if role == Qt.DecorationRole:
+            kind = QFileIconProvider.Folder if node.is_dir else QFileIconProvider.File
+            return self._icons.icon(kind)
+        return no_data()
+
+    # Internal
+
+    def _node(self, index):
+        if not index.isValid():
+            return None
+        return self._nodes.get(index.internalId())
+
+    def _index(self, node, column=0):
+        if node is self._root:
+            return QModelIndex()
+        return self.createIndex(node.row, column, node.id)
+
+    def _new_node(self, name, path, is_dir, parent):
+        node = _Node(next(self._ids), name, path, is_dir, parent)
+        self._nodes[node.id] = node
+        self._by_path[path] = node
+        return node
+
+    def _accepts(self, name, is_dir):
+        if name.startswith("."):
+            return False
+        return is_dir or storage.is_database_file(name)
+
+    def _scan(self, path):
+        found = {}
+        with os.scandir(path) as entries:
+            for entry in entries:
+                is_dir = entry.is_dir()
+                if self._accepts(entry.name, is_dir):
+                    found[entry.name] = is_dir
+        return found
+
+    def _load(self, node, index):
+        try:
+            found = self._scan(node.path)
+        except OSError:
+            found = {}
+        children = [
+            _Node(None, name, os.path.join(node.path, name), is_dir, node)
+            for name, is_dir in found.items()
+        ]
+        children.sort(key=_Node.sort_key)
+        if children:
+            self.beginInsertRows(index, 0, len(children) - 1)
+        for child in children:
+            child.id = next(self._ids)
+            self._nodes[child.id] = child
+            self._by_path[child.path] = child
+        node.children = children
+        self._renumber(node)
+        if children:
+            self.endInsertRows()
+        self._watcher.addPath(node.path)
+        emit(self.directoryLoaded, node.path)
+
+    def _insert(self, parent, name, is_dir):
+        row = self._insert_row(parent.children, _sort_key(name, is_dir))
+        self.beginInsertRows(self._index(parent), row, row)
+        node = self._new_node(name, os.path.join(parent.path, name), is_dir, parent)
+        parent.children.insert(row, node)
+        self._renumber(parent, row)
+        self.endInsertRows()
+
+    @staticmethod
+    def _insert_row(children, key):
+        low, high = 0, len(children)
+        while low < high:
+            middle = (low + high) // 2
+            if children[middle].sort_key() < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    @staticmethod
+    def _renumber(node, start=0):
+        for row in range(start, len(node.children)):
+            node.children[row].row = row
+
+    def _forget(self, node):
+        # Simpul beserta seluruh isinya dilepas dari tabel id, path, dan watcher
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            self._nodes.pop(current.id, None)
+            if self._by_path.get(current.path) is current:
+                del self._by_path[current.path]
+            if current.children is not None:
+                self._watcher.removePath(current.path)
+                stack.extend(current.children)
+
+    def _move_paths(self, node, new_path):
+        stack = [(node, new_path)]
+        while stack:
+            current, path = stack.pop()
+            if self._by_path.get(current.path) is current:
+                del self._by_path[current.path]
+            if current.children is not None:
+                self._watcher.removePath(current.path)
+                self._watcher.addPath(path)
+                stack.extend(
+                    (child, os.path.join(path, child.name))
+                    for child in current.children
+                )
+            current.path = path
+            self._by_path[path] = current
+
+    def _directory_changed(self, path):
+        # Satu operasi bisa memicu beberapa sinyal; digabung per folder
+        self._pending.add(path)
+        self._refresh_timer.start(self.REFRESH_DELAY_MS)
+
+    def _refresh_pending(self):
+        pending, self._pending = self._pending, set()
+        for path in pending:
+            self.refresh_path(path)
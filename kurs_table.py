@@ -0,0 +1,96 @@
+import datetime
+from bisect import bisect_right
+
+try:
+    import numpy as np
+except ImportError:  # numpy opsional, pencarian jatuh ke bisect per baris
+    np = None
+
+
+# Tanggal disimpan sebagai bilangan YYYYMMDD supaya muat di kolom int64
+# dan urutannya sama dengan urutan kalender; 0 berarti tanpa tanggal.
+
+
+def parse_tanggal(text):
+    """`"2025-02-10"` -> 20250210; teks kosong -> 0."""
+    text = text.strip()
+    if not text:
+        return 0
+    tanggal = datetime.date.fromisoformat(text)
+    return tanggal.year * 10000 + tanggal.month * 100 + tanggal.day
+
+
+def format_tanggal(tanggal):
+    if not tanggal:
+        return ""
+    return f"{tanggal // 10000:04d}-{tanggal // 100 % 100:02d}-{tanggal % 100:02d}"
+
+
+def parse_kurs(value):
+    """Kurs rupiah per USD; ValueError jika bukan bilangan bulat > 0."""
+    kurs = int(value)
+    if kurs <= 0:
+        raise ValueError(f"Kurs harus > 0: {value!r}")
+    return kurs
+
+
+def parse_riwayat(entries):
+    """Riwayat kurs dari config.json (list {"mulai", "kurs"}) -> tuple terurut."""
+    return tuple(
+        sorted(
+            (parse_tanggal(entry["mulai"]), parse_kurs(entry["kurs"]))
+            for entry in entries
+        )
+    )
+
+
+def dump_riwayat(riwayat):
+    return [{"mulai": format_tanggal(mulai), "kurs": kurs} for mulai, kurs in riwayat]
+
+
+class KursTable:
+    """Kurs pajak yang berlaku per tanggal transaksi.
+
+    `riwayat` berisi pasangan (mulai_berlaku, kurs); satu kurs berlaku
+    sejak tanggalnya sampai kurs berikutnya mulai. Tanggal 0 dan tanggal
+    sebelum entri pertama memakai `default` (KURS_PAJAK di config.json).
+    Pencarian satu tanggal memakai bisect dan dimemo; satu kolom tanggal
+    dicari sekaligus dengan numpy.searchsorted.
+    """
+
+    def __init__(self, riwayat, default):
+        riwayat = sorted(riwayat)
+        self.default = default
+        self._dates = [mulai for mulai, _ in riwayat]
+        # Indeks hasil bisect_right: 0 = sebelum entri pertama
+        self._rates = [default] + [kurs for _, kurs in riwayat]
+        self._memo = {}
+        if np is not None:
+            self._np_dates = np.array(self._dates, dtype=np.int64)
+            self._np_rates = np.array(self._rates, dtype=np.int64)
+
+    def __bool__(self):
+        return bool(self._dates)
+
+    def kurs_pada(self, tanggal):
+        if not tanggal or not self._dates:
+            return self.default
+        kurs = self._memo.get(tanggal)
+        if kurs is None:
+            kurs = self._rates[bisect_right(self._dates, tanggal)]
+            self._memo[tanggal] = kurs
+        return kurs
+
+    def kurs_kolom(self, tanggal):
+        """Kurs untuk setiap tanggal di kolom `tanggal`.
+
+        Tanpa riwayat hasilnya skalar `default`; selain itu ndarray int64
+        (atau list tanpa numpy) sepanjang kolomnya.
+        """
+        if not self._dates:
+            return self.default
+        if np is None:
+            return [self.kurs_pada(t) for t in tanggal]
+        tanggal = np.asarray(tanggal, dtype=np.int64)
+        # Tanggal 0 selalu jatuh sebelum entri pertama, jadi ikut default
+        return self._np_rates[np.searchsorted(self._np_dates, tanggal, "right")]
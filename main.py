@@ -1,7 +1,24 @@
 import os
 import sys
 import json
-import shutil
+import time
+import threading
+import multiprocessing
+from functools import partial
+
+# Awal hitungan --profile-startup, sebelum PySide6 dan numpy dimuat
+_STARTED = time.perf_counter()
+
+if __name__ == "__main__" and sys.argv[1:2] in (["batch"], ["serve"]):
+    # Mode baris perintah: tidak perlu Qt maupun APPDATA
+    multiprocessing.freeze_support()
+    if sys.argv[1] == "batch":
+        import batch as command
+    else:
+        import pricing_service as command
+
+    sys.exit(command.main(sys.argv[2:]))
+
 from PySide6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -11,8 +28,8 @@ from PySide6.QtWidgets import (
     QLabel,
     QLineEdit,
     QPushButton,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
+    QAbstractItemView,
     QMessageBox,
     QDialog,
     QHeaderView,
@@ -24,15 +41,63 @@ from PySide6.QtWidgets import (
     QInputDialog,
     QFileDialog,
     QFileSystemModel,
+    QProgressBar,
+    QListWidget,
+    QListWidgetItem,
+    QPlainTextEdit,
+    QTableWidget,
+    QTableWidgetItem,
+    QComboBox,
+)
+from PySide6.QtCore import (
+    Qt,
+    QRegularExpression,
+    QDir,
+    QSortFilterProxyModel,
+    QModelIndex,
+    QTimer,
 )
-from PySide6.QtCore import Qt, QRegularExpression, QDir, QSortFilterProxyModel
 from PySide6.QtGui import (
     QFont,
     QAction,
+    QKeySequence,
     QRegularExpressionValidator,
     QIcon,
 )
 
+import engine
+import storage
+from table_model import DataTableModel, HEADERS as TABLE_HEADERS
+from qt_compat import no_data, forward, emit
+import tracing
+from data_loader import DataLoader
+from file_tree import FileTreeModel
+from catalog import DatabaseCatalog
+from record_store import RecordStore
+from search_index import SearchIndex
+from undo_stack import UndoStack, inverse_ops
+from rollup_cache import RollupCache
+from kurs_table import (
+    parse_tanggal,
+    format_tanggal,
+    parse_kurs,
+    parse_riwayat,
+    dump_riwayat,
+)
+from tariff import (
+    TARIFF_FILE,
+    TariffTable,
+    load_tariff,
+    read_tariff,
+    dump_tariff,
+    parse_kode_hs,
+    format_kode_hs,
+)
+
+
+def _format_time(timestamp):
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(timestamp))
+
 
 class FileFilterProxyModel(QSortFilterProxyModel):
     def filterAcceptsRow(self, source_row, source_parent):
@@ -46,7 +111,21 @@ class FileFilterProxyModel(QSortFilterProxyModel):
 
         return super().filterAcceptsRow(source_row, source_parent)
 
+    # Kolom 1-3 QFileSystemModel (ukuran, tipe, tanggal) diganti rekap
+    # isi database: jumlah barang, total pajak, dan total nilai barang.
+    HEADERS = ["Nama", "Barang", "Pajak (IDR)", "Nilai (IDR)"]
+    rollups = None
+    catalog = None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return forward(super().headerData(section, orientation, role))
+
     def data(self, index, role=Qt.DisplayRole):
+        if index.column() > 0:
+            return self.rollup_data(index, role)
+
         if role == Qt.DisplayRole:
             source_index = self.mapToSource(index)
             name = self.sourceModel().fileName(source_index)
@@ -58,7 +137,46 @@ class FileFilterProxyModel(QSortFilterProxyModel):
 
             return name
 
-        return super().data(index, role)
+        if role == Qt.ToolTipRole and self.catalog is not None:
+            return self.catalog_tooltip(index)
+
+        return forward(super().data(index, role))
+
+    def catalog_tooltip(self, index):
+        path = self.sourceModel().filePath(self.mapToSource(index))
+        entry = self.catalog.get(path)
+        if entry is None:
+            return no_data()
+        lines = [
+            f"Ukuran: {entry['size'] / 1024:,.1f} KB",
+            "Diubah: " + _format_time(entry["mtime"]),
+        ]
+        if entry["entries"] is not None:
+            lines.insert(0, f"Barang: {entry['entries']:,}")
+        if entry["opened"]:
+            lines.append("Terakhir dibuka: " + _format_time(entry["opened"]))
+        return "\n".join(lines)
+
+    def rollup_data(self, index, role):
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        if role != Qt.DisplayRole or self.rollups is None:
+            return no_data()
+
+        source_index = self.mapToSource(index)
+        path = self.sourceModel().filePath(source_index)
+        if self.sourceModel().isDir(source_index):
+            summary = self.rollups.folder_summary(path)
+        else:
+            summary = self.rollups.file_summary(path)
+        if summary is None:
+            return "..."
+
+        if index.column() == 1:
+            return f"{summary['entries']:,}"
+        if index.column() == 2:
+            return f"Rp {summary['totals']['total_idr']:,}"
+        return f"Rp {summary['totals']['harga_idr']:,}"
 
 
 class BeaCukaiApp(QMainWindow):
@@ -86,10 +204,28 @@ class ConfigDialog(QDialog):
         self.kurs_input = QLineEdit()
         self.batas_input = QLineEdit()
         self.npwp_checkbox = QCheckBox("Memiliki NPWP")
+        self.riwayat_input = QPlainTextEdit()
+        self.riwayat_input.setPlaceholderText("2025-02-10 16275\n2025-02-17 16320")
+        self.aritmetika_combo = QComboBox()
+        self.aritmetika_combo.addItem("Float (desimal biasa)", engine.ARITMETIKA_FLOAT)
+        self.aritmetika_combo.addItem(
+            "Titik tetap (rupiah bulat, pasti)", engine.ARITMETIKA_TETAP
+        )
+        self.satuan_input = QLineEdit()
+        self.arah_combo = QComboBox()
+        for arah in engine.ARAH_PEMBULATAN:
+            self.arah_combo.addItem(arah.capitalize(), arah)
+        self.aritmetika_combo.currentIndexChanged.connect(self.update_pembulatan)
 
         form_layout.addRow("Kurs Pajak (IDR):", self.kurs_input)
         form_layout.addRow("Batas Pembebasan (USD):", self.batas_input)
         form_layout.addRow(self.npwp_checkbox)
+        form_layout.addRow(
+            "Riwayat Kurs\n(mulai berlaku, kurs):", self.riwayat_input
+        )
+        form_layout.addRow("Aritmetika:", self.aritmetika_combo)
+        form_layout.addRow("Pembulatan ke (IDR):", self.satuan_input)
+        form_layout.addRow("Arah Pembulatan:", self.arah_combo)
 
         buttons = QDialogButtonBox(
             QDialogButtonBox.Ok | QDialogButtonBox.Cancel, Qt.Horizontal, self
@@ -100,18 +236,186 @@ class ConfigDialog(QDialog):
         layout.addLayout(form_layout)
         layout.addWidget(buttons)
 
+    def set_riwayat(self, riwayat):
+        self.riwayat_input.setPlainText(
+            "\n".join(f"{format_tanggal(mulai)} {kurs}" for mulai, kurs in riwayat)
+        )
+
+    def set_aritmetika(self, aritmetika, pembulatan):
+        self.aritmetika_combo.setCurrentIndex(
+            self.aritmetika_combo.findData(aritmetika)
+        )
+        self.satuan_input.setText(str(pembulatan.satuan))
+        self.arah_combo.setCurrentIndex(self.arah_combo.findData(pembulatan.arah))
+        self.update_pembulatan()
+
+    def aritmetika(self):
+        return self.aritmetika_combo.currentData()
+
+    def pembulatan(self):
+        return engine.parse_pembulatan(
+            {"satuan": self.satuan_input.text(), "arah": self.arah_combo.currentData()}
+        )
+
+    def update_pembulatan(self):
+        # Pembulatan hanya berlaku di mode titik tetap
+        tetap = self.aritmetika() == engine.ARITMETIKA_TETAP
+        self.satuan_input.setEnabled(tetap)
+        self.arah_combo.setEnabled(tetap)
+
+    def riwayat(self):
+        entries = []
+        for line in self.riwayat_input.toPlainText().splitlines():
+            if not line.strip():
+                continue
+            mulai, kurs = line.split()
+            entries.append((parse_tanggal(mulai), parse_kurs(kurs)))
+        return tuple(sorted(entries))
+
     def validate(self):
         try:
             float(self.kurs_input.text())
             float(self.batas_input.text())
-            self.accept()
         except ValueError:
             QMessageBox.warning(self, "Error", "Input harus berupa angka!")
+            return
+        if float(self.kurs_input.text()) <= 0:
+            QMessageBox.warning(self, "Error", "Kurs pajak harus lebih dari 0!")
+            return
+        try:
+            self.riwayat()
+        except ValueError:
+            QMessageBox.warning(
+                self,
+                "Error",
+                "Riwayat kurs harus berisi baris 'YYYY-MM-DD kurs' dengan kurs > 0!",
+            )
+            return
+        try:
+            self.pembulatan()
+        except ValueError:
+            QMessageBox.warning(
+                self, "Error", "Pembulatan harus berupa bilangan bulat positif!"
+            )
+            return
+        self.accept()
+
+
+class TraceDialog(QDialog):
+    """Panel debug: p50/p95/maks per span dari modul tracing."""
+
+    COLUMNS = ["Span", "Jumlah", "p50 (ms)", "p95 (ms)", "Maks (ms)", "Total (ms)"]
+    REFRESH_MS = 1000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Waktu Proses")
+        self.setWindowIcon(QIcon("./favicon.ico"))
+        self.resize(760, 420)
+        self.setup_ui()
+        # Diperbarui selama panel terbuka
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(self.REFRESH_MS)
+        self.refresh()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        self.status_label = QLabel()
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset)
+        export_button = QPushButton("Ekspor Trace...")
+        export_button.clicked.connect(self.export)
+        close_button = QPushButton("Tutup")
+        close_button.clicked.connect(self.close)
+        buttons = QHBoxLayout()
+        buttons.addWidget(reset_button)
+        buttons.addWidget(export_button)
+        buttons.addStretch()
+        buttons.addWidget(close_button)
+
+        layout.addWidget(self.status_label)
+        layout.addWidget(self.table)
+        layout.addLayout(buttons)
+
+    def refresh(self):
+        if tracing.enabled():
+            self.status_label.setText("Perekaman aktif.")
+        else:
+            self.status_label.setText(
+                "Perekaman mati. Nyalakan lewat Konfigurasi > Rekam Waktu Proses."
+            )
+        stats = sorted(tracing.stats().items(), key=lambda item: -item[1]["total"])
+        self.table.setRowCount(len(stats))
+        for row, (name, span) in enumerate(stats):
+            values = [
+                name,
+                f"{span['count']:,}",
+                f"{span['p50']:,.3f}",
+                f"{span['p95']:,.3f}",
+                f"{span['max']:,.3f}",
+                f"{span['total']:,.1f}",
+            ]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column > 0:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+
+    def reset(self):
+        tracing.reset()
+        self.refresh()
+
+    def export(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Ekspor Trace", "trace.json", "Chrome Trace (*.json)"
+        )
+        if not path:
+            return
+        try:
+            tracing.export(path)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Gagal mengekspor trace: {str(e)}")
+
+
+class StartupProfile:
+    """Waktu tiap fase startup, dicetak ke stderr dengan --profile-startup.
+
+    `mark` menutup fase berurutan di thread GUI dan mencetak durasinya;
+    `event` mencatat pekerjaan latar belakang yang selesai belakangan
+    (isi tree, database besar, indeks pencarian) tanpa durasi.
+    """
+
+    def __init__(self, started=None, enabled=False):
+        self.enabled = enabled
+        self.started = time.perf_counter() if started is None else started
+        self._last = self.started
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self._print(now, f"{(now - self._last) * 1000:8.1f} ms  {phase}")
+        self._last = now
+
+    def event(self, phase):
+        self._print(time.perf_counter(), f"{'':11}  {phase}")
+
+    def _print(self, now, text):
+        if self.enabled:
+            elapsed = (now - self.started) * 1000
+            print(f"[startup] {elapsed:8.1f} ms {text}", file=sys.stderr, flush=True)
 
 
 class BeaCukaiApp(QMainWindow):
-    def __init__(self):
+    def __init__(self, profile=None):
         super().__init__()
+        self.profile = profile or StartupProfile()
         self.current_edit_name = None
         self.setWindowTitle("Kalkulator Pajak Bea Cukai")
         self.setMinimumSize(1400, 900)
@@ -128,53 +432,113 @@ class BeaCukaiApp(QMainWindow):
 
         self.config_path = os.path.join(self.script_dir, "config.json")
 
-        self.file_model = QFileSystemModel()
-        self.file_model.setRootPath(self.script_dir)
-        self.file_model.setFilter(QDir.AllDirs | QDir.Files | QDir.NoDotAndDotDot)
-        self.file_model.setNameFilters(["*.json"])
-        self.file_model.setNameFilterDisables(False)
+        # Isi folder baru dibaca di attach_tree setelah jendela tampil
+        self.file_model = FileTreeModel(self.script_dir, self)
 
         self.proxy_model = FileFilterProxyModel()
         self.proxy_model.setSourceModel(self.file_model)
 
+        self.table_model = DataTableModel(self)
+        self.storage = None
+        self.loader = None
+        self.reprice_job = None
+        self.pending_select = None
+        self.search_index = SearchIndex()
+        self.search_thread = None
+        # Riwayat edit database yang sedang terbuka
+        self.undo_stack = UndoStack()
+        self.trace_dialog = None
+        # Tree, rekap, dan indeks pencarian menyusul setelah jendela tampil
+        self.tree_ready = False
+        self.scans_started = False
+
         self.load_config()
+        self.load_tariff()
+        self.table_model.set_config(self.pajak_config())
+        self.rollups = RollupCache(self.script_dir, self.pajak_config(), self)
+        self.rollups.updated.connect(self.on_rollup_updated)
+        self.proxy_model.rollups = self.rollups
+        self.catalog = DatabaseCatalog(self.script_dir)
+        self.catalog.load()
+        self.proxy_model.catalog = self.catalog
+        self.profile.mark("konfigurasi, tabel tarif, dan katalog")
         self.init_current_data_file()
+        self.profile.mark("pilih database")
 
         self.setWindowIcon(QIcon("./favicon.ico"))
         self.setup_ui()
         self.setup_menu()
+        self.profile.mark("susun antarmuka")
         self.load_data()
+        self.profile.mark("buka database")
+        QTimer.singleShot(0, self.finish_startup)
 
     def init_current_data_file(self):
-        json_files = [
-            f
-            for f in os.listdir(self.script_dir)
-            if f.endswith(".json") and f != "config.json"
-        ]
+        # Database terakhir langsung dipakai; selain itu pilihan diambil dari
+        # katalog, dan folder hanya dipindai jika katalog belum ada.
+        last_path = os.path.join(self.script_dir, self.LAST_OPENED_FILE)
+        if os.path.exists(last_path):
+            self.current_data_file = last_path
+            self.catalog.opened(last_path)
+            return
 
-        if os.path.exists(os.path.join(self.script_dir, self.LAST_OPENED_FILE)):
-            self.current_data_file = os.path.join(
-                self.script_dir, self.LAST_OPENED_FILE
+        if not len(self.catalog):
+            self.catalog.scan()
+        path = self.next_database()
+        if path is None:
+            path = os.path.join(self.script_dir, "database.json")
+            with open(path, "w") as f:
+                json.dump({}, f)
+            self.catalog.update(path, 0)
+        self.current_data_file = path
+        self.LAST_OPENED_FILE = os.path.relpath(path, self.script_dir)
+        self.catalog.opened(path)
+        self.save_config()
+
+    def next_database(self, exclude=None):
+        """Database terbaru menurut katalog yang masih ada di disk."""
+        while True:
+            path = self.catalog.latest(exclude)
+            if path is None or os.path.exists(path):
+                return path
+            self.catalog.remove_path(path)
+
+    def finish_startup(self):
+        # Dipanggil sekali lewat event loop, jadi jendela dan database aktif
+        # sudah tergambar sebelum folder mulai dipindai.
+        self.profile.mark("jendela tampil")
+        self.tree_ready = True
+        self.file_model.directoryLoaded.connect(self.on_directory_loaded)
+        self.attach_tree()
+        self.profile.mark("pasang tree")
+        if self.loader is None:
+            self.start_background_scans()
+
+    def attach_tree(self):
+        self.file_model.fetchMore(QModelIndex())
+        self.tree_view.setModel(self.proxy_model)
+        self.tree_view.setColumnWidth(0, 120)
+        for column in range(1, 4):
+            self.tree_view.header().setSectionResizeMode(
+                column, QHeaderView.ResizeToContents
             )
-        else:
-            if len(json_files) == 0:
-                self.current_data_file = os.path.join(self.script_dir, "database.json")
-                with open(self.current_data_file, "w") as f:
-                    json.dump({}, f)
-                self.LAST_OPENED_FILE = "database.json"
-                self.save_config()
-            elif len(json_files) == 1:
-                self.current_data_file = os.path.join(self.script_dir, json_files[0])
-                self.LAST_OPENED_FILE = json_files[0]
-                self.save_config()
-            else:
-                most_recent = max(
-                    json_files,
-                    key=lambda f: os.path.getmtime(os.path.join(self.script_dir, f)),
-                )
-                self.current_data_file = os.path.join(self.script_dir, most_recent)
-                self.LAST_OPENED_FILE = most_recent
-                self.save_config()
+
+    def on_directory_loaded(self, path):
+        if path == self.script_dir:
+            self.file_model.directoryLoaded.disconnect(self.on_directory_loaded)
+            self.profile.event("isi tree termuat")
+
+    def start_background_scans(self):
+        # Rekap tree dan indeks pencarian membaca semua database; keduanya
+        # menunggu database aktif selesai dimuat supaya tidak berebut disk
+        # dan GIL dengan database yang sedang ditunggu pengguna.
+        if not self.tree_ready or self.scans_started:
+            return
+        self.scans_started = True
+        self.rollups.start()
+        self.start_search_index()
+        # Mencocokkan katalog dengan perubahan di luar aplikasi
+        threading.Thread(target=self.catalog.scan, daemon=True).start()
 
     def setup_menu(self):
         menu_bar = self.menuBar()
@@ -195,6 +559,7 @@ class BeaCukaiApp(QMainWindow):
             """
         )
         file_menu = menu_bar.addMenu("File")
+        edit_menu = menu_bar.addMenu("Edit")
         config_menu = menu_bar.addMenu("Konfigurasi")
 
         file_action = QAction("Buat Database Baru", self)
@@ -205,47 +570,144 @@ class BeaCukaiApp(QMainWindow):
 
         config_action = QAction("Pengaturan", self)
         config_action.triggered.connect(self.show_config_dialog)
+
+        self.reprice_action = QAction("Hitung Ulang Semua Database", self)
+        self.reprice_action.triggered.connect(self.reprice_all_databases)
+
+        tariff_action = QAction("Muat Tabel Tarif HS...", self)
+        tariff_action.triggered.connect(self.import_tariff)
+
+        # Juga bisa dinyalakan sejak awal dengan BEA_CUKAI_TRACE=1
+        trace_action = QAction("Rekam Waktu Proses", self)
+        trace_action.setCheckable(True)
+        trace_action.setChecked(tracing.enabled())
+        trace_action.toggled.connect(tracing.set_enabled)
+
+        trace_panel_action = QAction("Panel Waktu Proses...", self)
+        trace_panel_action.triggered.connect(self.show_trace_dialog)
+
+        # Saat kolom input fokus, Ctrl+Z tetap milik teks di kolom itu
+        self.undo_action = QAction("Urungkan", self)
+        self.undo_action.setShortcut(QKeySequence.Undo)
+        self.undo_action.triggered.connect(self.undo)
+
+        self.redo_action = QAction("Ulangi", self)
+        self.redo_action.setShortcut(QKeySequence.Redo)
+        self.redo_action.triggered.connect(self.redo)
+
         config_menu.addAction(config_action)
+        config_menu.addAction(tariff_action)
+        config_menu.addAction(self.reprice_action)
+        config_menu.addSeparator()
+        config_menu.addAction(trace_action)
+        config_menu.addAction(trace_panel_action)
+        edit_menu.addAction(self.undo_action)
+        edit_menu.addAction(self.redo_action)
+        self.update_undo_actions()
         file_menu.addAction(file_action)
         file_menu.addAction(folder_action)
+        # Diisi dari katalog setiap kali menu dibuka
+        self.recent_menu = file_menu.addMenu("Buka Terakhir")
+        self.recent_menu.aboutToShow.connect(self.update_recent_menu)
+
+    def show_trace_dialog(self):
+        if self.trace_dialog is None:
+            self.trace_dialog = TraceDialog(self)
+        self.trace_dialog.show()
+        self.trace_dialog.raise_()
+        self.trace_dialog.activateWindow()
 
     def show_config_dialog(self):
         dialog = ConfigDialog(self)
         dialog.kurs_input.setText(str(self.KURS_PAJAK))
         dialog.batas_input.setText(str(self.PEMBEBASAN))
         dialog.npwp_checkbox.setChecked(self.NPWP)
+        dialog.set_riwayat(self.RIWAYAT_KURS)
+        dialog.set_aritmetika(self.ARITMETIKA, self.PEMBULATAN)
 
         if dialog.exec() == QDialog.Accepted:
             try:
-                new_config = {
-                    "KURS_PAJAK": int(dialog.kurs_input.text()),
-                    "PEMBEBASAN": int(dialog.batas_input.text()),
-                    "NPWP": dialog.npwp_checkbox.isChecked(),
-                    "LAST_OPENED_FILE": self.LAST_OPENED_FILE,
-                }
-
-                self.KURS_PAJAK = new_config["KURS_PAJAK"]
-                self.PEMBEBASAN = new_config["PEMBEBASAN"]
-                self.NPWP = new_config["NPWP"]
-
-                with open(self.config_path, "w") as f:
-                    json.dump(new_config, f, indent=4)
+                # Semua nilai dibaca dulu agar input yang gagal tidak
+                # meninggalkan konfigurasi setengah berubah
+                kurs = int(dialog.kurs_input.text())
+                pembebasan = int(dialog.batas_input.text())
+                riwayat = dialog.riwayat()
+                pembulatan = dialog.pembulatan()
+
+                self.KURS_PAJAK = kurs
+                self.PEMBEBASAN = pembebasan
+                self.NPWP = dialog.npwp_checkbox.isChecked()
+                self.RIWAYAT_KURS = riwayat
+                self.ARITMETIKA = dialog.aritmetika()
+                self.PEMBULATAN = pembulatan
+
+                # Lewat penulis yang sama dengan perubahan config lain agar
+                # job lama yang masih antre tidak menimpa nilai baru
+                self.save_config()
 
-                self.setup_ui()
-                self.data = {}
-                self.load_data()
+                # Data di memori hanya berisi input; kolom pajak dihitung
+                # ulang dari cache turunan tanpa membaca ulang file.
+                self.table_model.set_config(self.pajak_config())
+                self.rollups.set_config(self.pajak_config())
+                self.update_config_labels()
+                self.update_preview()
 
             except Exception as e:
                 QMessageBox.critical(
                     self, "Error", f"Gagal menyimpan konfigurasi: {str(e)}"
                 )
 
+    def pajak_config(self):
+        return engine.PajakConfig(
+            self.KURS_PAJAK,
+            self.PEMBEBASAN,
+            self.NPWP,
+            self.RIWAYAT_KURS,
+            self.TARIF,
+            self.ARITMETIKA,
+            self.PEMBULATAN,
+        )
+
+    def load_tariff(self):
+        try:
+            self.TARIF = load_tariff(self.script_dir)
+        except (OSError, ValueError, KeyError) as e:
+            QMessageBox.warning(self, "Peringatan", f"Tabel tarif HS rusak: {str(e)}")
+            self.TARIF = TariffTable()
+
+    def import_tariff(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Pilih Tabel Tarif HS", "", "Tabel tarif (*.csv *.json)"
+        )
+        if not path:
+            return
+        try:
+            table = read_tariff(path)
+            storage.write_json_atomic(
+                os.path.join(self.script_dir, TARIFF_FILE), dump_tariff(table)
+            )
+        except (OSError, ValueError, KeyError) as e:
+            QMessageBox.critical(self, "Error", f"Gagal memuat tabel tarif: {str(e)}")
+            return
+
+        self.TARIF = table
+        self.table_model.set_config(self.pajak_config())
+        self.rollups.set_config(self.pajak_config())
+        self.update_preview()
+        QMessageBox.information(
+            self, "Tabel Tarif HS", f"{len(table):,} awalan kode HS dimuat."
+        )
+
     def load_config(self):
         default_config = {
             "KURS_PAJAK": 16275,
             "PEMBEBASAN": 500,
             "NPWP": True,
+            "RIWAYAT_KURS": [],
+            "ARITMETIKA": engine.ARITMETIKA_FLOAT,
+            "PEMBULATAN": engine.dump_pembulatan(engine.PEMBULATAN_DEFAULT),
             "LAST_OPENED_FILE": "database.json",
+            "STORAGE_MODE": "journal",
         }
 
         try:
@@ -253,32 +715,48 @@ class BeaCukaiApp(QMainWindow):
                 with open(self.config_path, "r") as f:
                     config = json.load(f)
 
-                self.KURS_PAJAK = int(
+                self.KURS_PAJAK = parse_kurs(
                     config.get("KURS_PAJAK", default_config["KURS_PAJAK"])
                 )
                 self.PEMBEBASAN = int(
                     config.get("PEMBEBASAN", default_config["PEMBEBASAN"])
                 )
                 self.NPWP = bool(config.get("NPWP", default_config["NPWP"]))
+                self.RIWAYAT_KURS = parse_riwayat(
+                    config.get("RIWAYAT_KURS", default_config["RIWAYAT_KURS"])
+                )
+                self.ARITMETIKA = engine.parse_aritmetika(config.get("ARITMETIKA"))
+                self.PEMBULATAN = engine.parse_pembulatan(config.get("PEMBULATAN"))
                 self.LAST_OPENED_FILE = config.get(
                     "LAST_OPENED_FILE", default_config["LAST_OPENED_FILE"]
                 )
+                self.STORAGE_MODE = config.get(
+                    "STORAGE_MODE", default_config["STORAGE_MODE"]
+                )
+                if self.STORAGE_MODE not in storage.STORAGE_MODES:
+                    self.STORAGE_MODE = default_config["STORAGE_MODE"]
             else:
                 self.KURS_PAJAK = default_config["KURS_PAJAK"]
                 self.PEMBEBASAN = default_config["PEMBEBASAN"]
                 self.NPWP = default_config["NPWP"]
+                self.RIWAYAT_KURS = ()
+                self.ARITMETIKA = engine.ARITMETIKA_FLOAT
+                self.PEMBULATAN = engine.PEMBULATAN_DEFAULT
                 self.LAST_OPENED_FILE = default_config["LAST_OPENED_FILE"]
-                with open(self.config_path, "w") as f:
-                    json.dump(default_config, f, indent=4)
+                self.STORAGE_MODE = default_config["STORAGE_MODE"]
+                self.save_config()
 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Gagal memuat konfigurasi: {str(e)}")
             self.KURS_PAJAK = default_config["KURS_PAJAK"]
             self.PEMBEBASAN = default_config["PEMBEBASAN"]
             self.NPWP = default_config["NPWP"]
+            self.RIWAYAT_KURS = ()
+            self.ARITMETIKA = engine.ARITMETIKA_FLOAT
+            self.PEMBULATAN = engine.PEMBULATAN_DEFAULT
             self.LAST_OPENED_FILE = default_config["LAST_OPENED_FILE"]
-            with open(self.config_path, "w") as f:
-                json.dump(default_config, f, indent=4)
+            self.STORAGE_MODE = default_config["STORAGE_MODE"]
+            self.save_config()
 
     def setup_ui(self):
         # Main container
@@ -300,7 +778,7 @@ class BeaCukaiApp(QMainWindow):
         nav_container.setStyleSheet(
             "background-color: white; border: 1px solid #C9CCD3;"
         )
-        nav_container.setMaximumWidth(200)
+        nav_container.setMaximumWidth(420)
         nav_container.setMaximumHeight(280)
         nav_layout = QVBoxLayout(nav_container)
         nav_layout.setContentsMargins(1, 1, 1, 1)
@@ -371,17 +849,24 @@ class BeaCukaiApp(QMainWindow):
 
         nav_layout.addWidget(btn_container)
 
-        self.tree_view = QTreeView()
-        self.tree_view.setHeaderHidden(True)
-        self.tree_view.setModel(self.proxy_model)
-        self.tree_view.setRootIndex(
-            self.proxy_model.mapFromSource(self.file_model.index(self.script_dir))
-        )
+        # Pencarian barang di semua database; hasilnya menggantikan tree
+        # selama kotak pencarian berisi teks.
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Cari barang (mis. iphone >5000000)")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.setStyleSheet("margin: 0px 15px; padding: 3px;")
+        self.search_input.textChanged.connect(self.update_search_results)
+        nav_layout.addWidget(self.search_input)
+
+        self.search_results = QListWidget()
+        self.search_results.setStyleSheet("border: none; margin: 0px;")
+        self.search_results.itemDoubleClicked.connect(self.on_search_result_activated)
+        self.search_results.hide()
+        nav_layout.addWidget(self.search_results)
 
-        self.tree_view.setColumnWidth(0, 120)
-        self.tree_view.hideColumn(1)
-        self.tree_view.hideColumn(2)
-        self.tree_view.hideColumn(3)
+        self.tree_view = QTreeView()
+        if self.tree_ready:
+            self.attach_tree()
         self.tree_view.setContextMenuPolicy(Qt.CustomContextMenu)
         self.tree_view.setStyleSheet("border: none; padding-top: 10px; margin: 0px;")
         self.tree_view.customContextMenuRequested.connect(self.show_context_menu)
@@ -460,8 +945,40 @@ class BeaCukaiApp(QMainWindow):
         harga_layout.addWidget(harga_label)
         harga_layout.addWidget(self.harga_input)
 
+        tanggal_layout = QVBoxLayout()
+        tanggal_label = QLabel("Tanggal Transaksi:")
+        tanggal_label.setFont(QFont("Arial", 10, QFont.Weight.Bold))
+        self.tanggal_input = QLineEdit()
+        self.tanggal_input.setMinimumHeight(35)
+        self.tanggal_input.setFont(QFont("Arial", 10))
+        self.tanggal_input.setPlaceholderText(
+            "YYYY-MM-DD (kosong: kurs pajak saat ini)"
+        )
+        self.tanggal_input.setValidator(
+            QRegularExpressionValidator(QRegularExpression("[0-9-]*"))
+        )
+        self.tanggal_input.textChanged.connect(self.update_preview)
+        tanggal_layout.addWidget(tanggal_label)
+        tanggal_layout.addWidget(self.tanggal_input)
+
+        kode_hs_layout = QVBoxLayout()
+        kode_hs_label = QLabel("Kode HS:")
+        kode_hs_label.setFont(QFont("Arial", 10, QFont.Weight.Bold))
+        self.kode_hs_input = QLineEdit()
+        self.kode_hs_input.setMinimumHeight(35)
+        self.kode_hs_input.setFont(QFont("Arial", 10))
+        self.kode_hs_input.setPlaceholderText("mis. 8517.13.00 (kosong: tarif umum)")
+        self.kode_hs_input.setValidator(
+            QRegularExpressionValidator(QRegularExpression("[0-9. ]*"))
+        )
+        self.kode_hs_input.textChanged.connect(self.update_preview)
+        kode_hs_layout.addWidget(kode_hs_label)
+        kode_hs_layout.addWidget(self.kode_hs_input)
+
         form_layout.addLayout(nama_layout)
         form_layout.addLayout(harga_layout)
+        form_layout.addLayout(tanggal_layout)
+        form_layout.addLayout(kode_hs_layout)
 
         button_layout = QHBoxLayout()
         self.edit_button = QPushButton("Edit")
@@ -533,26 +1050,27 @@ class BeaCukaiApp(QMainWindow):
             "bea_masuk": QLabel("$ 0.00"),
             "ppn": QLabel("Rp 0"),
             "pph": QLabel("Rp 0"),
+            "ppnbm": QLabel("Rp 0"),
             "total_usd": QLabel("$ 0.00"),
             "total_idr": QLabel("Rp 0"),
         }
 
+        # Judul PPh disimpan karena tarifnya bergantung pada status NPWP
+        self.pph_title_label = QLabel()
         preview_items = [
             ("Harga Barang:", self.preview_labels["harga_barang"]),
             ("Selisih Pembebasan:", self.preview_labels["selisih"]),
-            ("Bea Masuk (10%):", self.preview_labels["bea_masuk"]),
+            ("Bea Masuk:", self.preview_labels["bea_masuk"]),
             ("PPN (11%):", self.preview_labels["ppn"]),
-            (
-                "PPh 22 (%s):" % ("10%" if self.NPWP else "20%"),
-                self.preview_labels["pph"],
-            ),
+            (self.pph_title_label, self.preview_labels["pph"]),
+            ("PPnBM:", self.preview_labels["ppnbm"]),
             ("Total Pajak (USD):", self.preview_labels["total_usd"]),
             ("Total Pajak (IDR):", self.preview_labels["total_idr"]),
         ]
 
         for title, value_label in preview_items:
             item_layout = QHBoxLayout()
-            title_label = QLabel(title)
+            title_label = title if isinstance(title, QLabel) else QLabel(title)
             title_label.setFont(QFont("Arial", 10))
             value_label.setFont(QFont("Arial", 10, QFont.Weight.Bold))
             value_label.setAlignment(
@@ -577,23 +1095,12 @@ class BeaCukaiApp(QMainWindow):
         table_layout.setContentsMargins(0, 0, 0, 0)
         table_layout.setSpacing(10)
 
-        self.table = QTableWidget()
-        self.table.setColumnCount(8)
-        self.table.setHorizontalHeaderLabels(
-            [
-                "Nama Barang",
-                "Harga (IDR)",
-                "Selisih ($)",
-                "Bea Masuk ($)",
-                "PPN (IDR)",
-                "PPh (IDR)",
-                "Total ($)",
-                "Total (IDR)",
-            ]
-        )
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         self.table.setStyleSheet(
             """
-            QTableWidget::horizontalHeader { 
+            QTableView::horizontalHeader { 
               gridline-color: #d0d0d0;
               background: white; 
               border: none; 
@@ -607,7 +1114,7 @@ class BeaCukaiApp(QMainWindow):
               padding-left: 12px;
               padding-right: 12px;
             }
-            QTableWidget::item { 
+            QTableView::item { 
               padding: 0px;
               font-size: 10pt;
             }
@@ -615,30 +1122,35 @@ class BeaCukaiApp(QMainWindow):
         )
 
         header = self.table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.Stretch)
-        for i in range(2, 8):
-            header.setSectionResizeMode(i, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(2, QHeaderView.Fixed)
-        header.resizeSection(1, 150)
-        header.setSectionResizeMode(7, QHeaderView.Fixed)
-        header.resizeSection(7, 150)
-        header.setSectionResizeMode(4, QHeaderView.Fixed)
-        header.resizeSection(4, 150)
-        header.setSectionResizeMode(5, QHeaderView.Fixed)
-        header.resizeSection(5, 150)
-
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SingleSelection)
+        # Lebar kolom diukur dari baris yang terlihat saja; bawaan Qt
+        # mengukur 1000 baris setiap kali batch database besar masuk.
+        header.setResizeContentsPrecision(0)
+        # Indeks kolom dicari dari namanya supaya ikut bergeser saat kolom
+        # baru ditambahkan
+        column = TABLE_HEADERS.index
+        header.setSectionResizeMode(column("Nama Barang"), QHeaderView.Stretch)
+        for name in TABLE_HEADERS[1:]:
+            header.setSectionResizeMode(column(name), QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(column("Harga (IDR)"), QHeaderView.Interactive)
+        header.resizeSection(column("Harga (IDR)"), 150)
+        header.setSectionResizeMode(column("Selisih ($)"), QHeaderView.Fixed)
+        for name in ("PPN (IDR)", "PPh (IDR)", "PPnBM (IDR)", "Total (IDR)"):
+            header.setSectionResizeMode(column(name), QHeaderView.Fixed)
+            header.resizeSection(column(name), 150)
+
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
 
         self.info_layout = QHBoxLayout()
         info_pairs = [
-            ("Kurs Pajak (USD): ", f"Rp {self.KURS_PAJAK:,}"),
-            ("Batas Pembebasan: ", f"$ {self.PEMBEBASAN}"),
-            ("Status NPWP: ", "Ada" if self.NPWP else "Tidak Ada"),
+            ("kurs", "Kurs Pajak (USD): "),
+            ("pembebasan", "Batas Pembebasan: "),
+            ("npwp", "Status NPWP: "),
         ]
 
         self.info_labels = []
-        for label_text, value_text in info_pairs:
+        self.info_values = {}
+        for key, label_text in info_pairs:
             container = QWidget()
             container_layout = QHBoxLayout(container)
             container_layout.setAlignment(Qt.AlignmentFlag.AlignLeft)
@@ -649,16 +1161,31 @@ class BeaCukaiApp(QMainWindow):
             label.setFont(QFont("Arial", 9))
             label.setStyleSheet("color: #666666;")
 
-            value = QLabel(value_text)
+            value = QLabel()
             value.setFont(QFont("Arial", 9, QFont.Weight.Bold))
             value.setStyleSheet("color: #666666;")
 
             container_layout.addWidget(label)
             container_layout.addWidget(value)
             self.info_labels.extend([label, value])
+            self.info_values[key] = value
             container.setMaximumWidth(200)
             self.info_layout.addWidget(container)
 
+        # Progres pemuatan database, hanya tampil selama file dibaca
+        self.info_layout.addStretch()
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, 100)
+        self.load_progress.setMaximumWidth(200)
+        self.load_progress.setMaximumHeight(16)
+        self.load_progress.hide()
+        self.cancel_load_button = QPushButton("Batal")
+        self.cancel_load_button.setCursor(Qt.PointingHandCursor)
+        self.cancel_load_button.clicked.connect(self.abort_loading)
+        self.cancel_load_button.hide()
+        self.info_layout.addWidget(self.load_progress)
+        self.info_layout.addWidget(self.cancel_load_button)
+
         table_layout.addWidget(self.table)
         table_layout.addLayout(self.info_layout)
         main_layout.addWidget(table_container)
@@ -668,9 +1195,18 @@ class BeaCukaiApp(QMainWindow):
         self.edit_button.clicked.connect(self.edit_entry)
         self.delete_button.clicked.connect(self.delete_entry)
 
+        self.update_config_labels()
+
+    def update_config_labels(self):
+        # Satu-satunya teks di jendela yang memuat nilai konfigurasi
+        self.pph_title_label.setText("PPh 22 (%s):" % ("10%" if self.NPWP else "20%"))
+        self.info_values["kurs"].setText(f"Rp {self.KURS_PAJAK:,}")
+        self.info_values["pembebasan"].setText(f"$ {self.PEMBEBASAN}")
+        self.info_values["npwp"].setText("Ada" if self.NPWP else "Tidak Ada")
+
     def update_active_db_label(self):
         base_name = os.path.basename(self.current_data_file)
-        formatted_name = base_name[:-5].replace("_", " ").title()
+        formatted_name = os.path.splitext(base_name)[0].replace("_", " ").title()
         self.active_db_label.setText(formatted_name)
 
     def get_selected_dir(self):
@@ -700,7 +1236,7 @@ class BeaCukaiApp(QMainWindow):
                 try:
                     with open(file_path, "w") as f:
                         json.dump({}, f)
-                    self.file_model.setRootPath(self.file_model.rootPath())
+                    self.file_created(file_path)
                 except Exception as e:
                     QMessageBox.critical(self, "Error", f"Gagal membuat: {str(e)}")
 
@@ -716,7 +1252,7 @@ class BeaCukaiApp(QMainWindow):
                 return
             try:
                 os.mkdir(folder_path)
-                self.file_model.setRootPath(self.file_model.rootPath())
+                self.file_model.add_path(folder_path)
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Gagal membuat: {str(e)}")
 
@@ -737,8 +1273,12 @@ class BeaCukaiApp(QMainWindow):
             counter += 1
 
         try:
-            shutil.copy2(src_path, os.path.join(dest_dir, new_name))
-            self.file_model.setRootPath(self.file_model.rootPath())
+            reopen = src_path == self.current_data_file and self.close_storage()
+            dest_path = os.path.join(dest_dir, new_name)
+            storage.copy_database(src_path, dest_path)
+            if reopen:
+                self.reopen_current_file()
+            self.file_created(dest_path, src_path)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Gagal menyalin: {str(e)}")
 
@@ -747,20 +1287,51 @@ class BeaCukaiApp(QMainWindow):
             source_index = self.proxy_model.mapToSource(index)
             path = self.file_model.filePath(source_index)
 
-            if (
-                os.path.isfile(path)
-                and path.endswith(".json")
-                and os.path.basename(path) != "config.json"
-            ):
-
-                self.current_data_file = path
-                self.LAST_OPENED_FILE = os.path.basename(path)
-                self.save_config()
-                self.load_data()
-                self.update_active_db_label()
+            if os.path.isfile(path) and storage.is_database_file(path):
+                self.open_database(path)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Gagal membuka file: {str(e)}")
 
+    def close_storage(self):
+        """Tutup storage database aktif sebelum filenya disalin, dipindah,
+        atau dihapus; False jika tidak ada yang terbuka (mis. setelah
+        pemuatan dibatalkan), jadi tidak perlu dibuka kembali.
+        """
+        if self.storage is None:
+            return False
+        self.storage.close()
+        self.rollups.release(self.storage.path)
+        return True
+
+    def reopen_current_file(self):
+        # SQLite dan biner membaca langsung dari file yang baru ditutup,
+        # jadi datanya ikut dimuat ulang; JSON sudah ada di memori.
+        self.storage = storage.open_storage(self.current_data_file, self.STORAGE_MODE)
+        if not self.storage.streaming:
+            self.load_data()
+
+    def open_database(self, path):
+        """Buka database lain; False jika ditolak selama hitung ulang."""
+        if self.reprice_job is not None and path != self.current_data_file:
+            # Pekerja hitung ulang hanya melewati file yang terbuka saat job
+            # dimulai; file lain bisa sedang ditulis ulang beserta jurnalnya
+            QMessageBox.warning(
+                self,
+                "Peringatan",
+                "Tunggu hitung ulang semua database selesai sebelum membuka "
+                "database lain.",
+            )
+            return False
+        self.current_data_file = path
+        # Relatif ke folder aplikasi supaya database di subfolder juga
+        # dibuka kembali saat startup
+        self.LAST_OPENED_FILE = os.path.relpath(path, self.script_dir)
+        self.catalog.opened(path)
+        self.save_config()
+        self.load_data()
+        self.update_active_db_label()
+        return True
+
     def show_context_menu(self, pos):
         try:
             index = self.tree_view.indexAt(pos)
@@ -783,11 +1354,27 @@ class BeaCukaiApp(QMainWindow):
                 delete_action.triggered.connect(lambda: self.delete_file(path))
                 rename_action = QAction("Ganti Nama", self)
                 rename_action.triggered.connect(lambda: self.rename_file(path))
+                if path.endswith(".json"):
+                    targets = [
+                        ("Konversi ke SQLite", ".db"),
+                        ("Konversi ke Biner", ".bcdb"),
+                    ]
+                else:
+                    targets = [("Konversi ke JSON", ".json")]
+                convert_actions = []
+                for label, ext in targets:
+                    convert_action = QAction(label, self)
+                    convert_action.triggered.connect(
+                        partial(self.convert_file, path, ext)
+                    )
+                    convert_actions.append(convert_action)
 
                 menu.addAction(copy_action)
                 menu.addAction(move_action)
                 menu.addAction(delete_action)
                 menu.addAction(rename_action)
+                for convert_action in convert_actions:
+                    menu.addAction(convert_action)
 
             elif is_dir:
                 new_file_action = QAction("Buat File Baru", self)
@@ -825,8 +1412,16 @@ class BeaCukaiApp(QMainWindow):
             return
 
         try:
-            shutil.move(src_path, dest_path)
-            self.file_model.setRootPath(self.file_model.rootPath())
+            current = src_path == self.current_data_file
+            reopen = current and self.close_storage()
+            storage.move_database(src_path, dest_path)
+            self.file_renamed(src_path, dest_path)
+            if current:
+                self.current_data_file = dest_path
+                if reopen:
+                    self.reopen_current_file()
+                self.LAST_OPENED_FILE = os.path.relpath(dest_path, self.script_dir)
+                self.save_config()
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Gagal memindahkan file: {str(e)}")
 
@@ -839,8 +1434,10 @@ class BeaCukaiApp(QMainWindow):
         )
         if confirm == QMessageBox.Yes:
             try:
-                os.remove(path)
-                self.file_model.setRootPath(self.file_model.rootPath())
+                if path == self.current_data_file:
+                    self.close_storage()
+                storage.remove_database(path)
+                self.file_removed(path)
                 if path == self.current_data_file:
                     self.handle_current_file_deleted()
             except Exception as e:
@@ -855,23 +1452,53 @@ class BeaCukaiApp(QMainWindow):
             os.path.basename(path),
         )
         if ok and new_name:
-            if not new_name.endswith(".json"):
-                new_name += ".json"
+            ext = os.path.splitext(path)[1]
+            if not new_name.endswith(ext):
+                new_name += ext
             dir_path = os.path.dirname(path)
             new_path = os.path.join(dir_path, new_name)
             if os.path.exists(new_path):
                 QMessageBox.warning(self, "Error", "Nama file sudah ada.")
                 return
             try:
-                os.rename(path, new_path)
-                self.file_model.setRootPath(self.file_model.rootPath())
-                if path == self.current_data_file:
+                current = path == self.current_data_file
+                reopen = current and self.close_storage()
+                storage.move_database(path, new_path)
+                self.file_renamed(path, new_path)
+                if current:
                     self.current_data_file = new_path
-                    self.LAST_OPENED_FILE = os.path.basename(new_path)
+                    if reopen:
+                        self.reopen_current_file()
+                    self.LAST_OPENED_FILE = os.path.relpath(new_path, self.script_dir)
                     self.save_config()
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Gagal mengganti nama: {str(e)}")
 
+    def convert_file(self, path, target_ext):
+        base, ext = os.path.splitext(path)
+        target_path = base + target_ext
+        if os.path.exists(target_path):
+            QMessageBox.warning(self, "Error", "File tujuan sudah ada.")
+            return
+        try:
+            reopen = path == self.current_data_file and self.close_storage()
+            import sqlite_storage
+            import binary_storage
+
+            if ext == ".db":
+                sqlite_storage.sqlite_to_json(path, target_path)
+            elif ext == ".bcdb":
+                binary_storage.binary_to_json(path, target_path)
+            elif target_ext == ".db":
+                sqlite_storage.json_to_sqlite(path, target_path)
+            else:
+                binary_storage.json_to_binary(path, target_path)
+            if reopen:
+                self.reopen_current_file()
+            self.file_created(target_path, path)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Gagal mengonversi: {str(e)}")
+
     def create_new_file(self, parent_dir):
         new_name, ok = QInputDialog.getText(
             self, "Buat File Baru", "Masukkan nama file (tanpa ekstensi):"
@@ -884,7 +1511,7 @@ class BeaCukaiApp(QMainWindow):
             try:
                 with open(new_path, "w") as f:
                     json.dump({}, f)
-                self.file_model.setRootPath(self.file_model.rootPath())
+                self.file_created(new_path)
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Gagal membuat file: {str(e)}")
 
@@ -899,7 +1526,7 @@ class BeaCukaiApp(QMainWindow):
                 return
             try:
                 os.mkdir(new_path)
-                self.file_model.setRootPath(self.file_model.rootPath())
+                self.file_model.add_path(new_path)
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Gagal membuat folder: {str(e)}")
 
@@ -917,9 +1544,20 @@ class BeaCukaiApp(QMainWindow):
             if os.path.exists(new_path):
                 QMessageBox.warning(self, "Error", "Nama folder sudah ada.")
                 return
+            inside = self.current_data_file.startswith(path + os.sep)
             try:
+                reopen = inside and self.close_storage()
                 os.rename(path, new_path)
-                self.file_model.setRootPath(self.file_model.rootPath())
+                self.file_renamed(path, new_path)
+                if inside:
+                    relative = self.current_data_file[len(path) :]
+                    self.current_data_file = new_path + relative
+                    if reopen:
+                        self.reopen_current_file()
+                    self.LAST_OPENED_FILE = os.path.relpath(
+                        self.current_data_file, self.script_dir
+                    )
+                    self.save_config()
             except Exception as e:
                 QMessageBox.critical(
                     self, "Error", f"Gagal mengganti nama folder: {str(e)}"
@@ -936,7 +1574,7 @@ class BeaCukaiApp(QMainWindow):
             if confirm == QMessageBox.Yes:
                 try:
                     os.rmdir(path)
-                    self.file_model.setRootPath(self.file_model.rootPath())
+                    self.file_model.remove_path(path)
                 except Exception as e:
                     QMessageBox.critical(
                         self, "Error", f"Gagal menghapus folder: {str(e)}"
@@ -946,34 +1584,58 @@ class BeaCukaiApp(QMainWindow):
                 self, "Error", "Folder tidak kosong. Tidak bisa dihapus."
             )
 
+    def update_recent_menu(self):
+        self.recent_menu.clear()
+        for path in self.catalog.recent():
+            action = self.recent_menu.addAction(os.path.relpath(path, self.script_dir))
+            action.triggered.connect(partial(self.open_recent, path))
+        if self.recent_menu.isEmpty():
+            self.recent_menu.addAction("(kosong)").setEnabled(False)
+
+    def open_recent(self, path):
+        if not os.path.exists(path):
+            self.catalog.remove_path(path)
+            QMessageBox.warning(self, "Error", "File sudah tidak ada.")
+            return
+        try:
+            self.open_database(path)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Gagal membuka file: {str(e)}")
+
     def handle_current_file_deleted(self):
-        json_files = [
-            f
-            for f in os.listdir(self.script_dir)
-            if f.endswith(".json") and f != "config.json"
-        ]
-        if json_files:
-            self.current_data_file = os.path.join(self.script_dir, json_files[0])
-            self.LAST_OPENED_FILE = json_files[0]
-            self.save_config()
-            self.load_data()
+        # File yang terhapus sudah dikeluarkan dari katalog lewat file_removed.
+        # Database pengganti tidak boleh sedang ditulis pekerja hitung ulang.
+        self.cancel_reprice()
+        path = self.next_database()
+        if path is not None:
+            self.open_database(path)
         else:
             self.current_data_file = os.path.join(self.script_dir, "database.json")
             self.LAST_OPENED_FILE = "database.json"
             with open(self.current_data_file, "w") as f:
                 json.dump({}, f)
+            self.file_created(self.current_data_file)
             self.save_config()
+            self.load_data()
 
     def save_config(self):
         config = {
             "KURS_PAJAK": self.KURS_PAJAK,
             "PEMBEBASAN": self.PEMBEBASAN,
             "NPWP": self.NPWP,
+            "RIWAYAT_KURS": dump_riwayat(self.RIWAYAT_KURS),
+            "ARITMETIKA": self.ARITMETIKA,
+            "PEMBULATAN": engine.dump_pembulatan(self.PEMBULATAN),
             "LAST_OPENED_FILE": self.LAST_OPENED_FILE,
+            "STORAGE_MODE": self.STORAGE_MODE,
         }
-        with open(self.config_path, "w") as f:
-            json.dump(config, f, indent=4)
+        storage.background_writer().submit(
+            self.config_path,
+            lambda: storage.write_json_atomic(self.config_path, config),
+            delay=0.5,
+        )
 
+    @tracing.timed("app.update_preview")
     def update_preview(self):
         try:
             harga_text = self.harga_input.text().strip().replace(",", "")
@@ -986,23 +1648,23 @@ class BeaCukaiApp(QMainWindow):
                 self.clear_preview()
                 return
 
-            harga_usd = harga_idr / self.KURS_PAJAK
-            selisih_pembebasan = max(0, harga_usd - self.PEMBEBASAN)
-            bea_masuk = selisih_pembebasan * 0.10
-            nilai_impor = selisih_pembebasan + bea_masuk
-            ppn_usd = nilai_impor * 0.11
-            pph_usd = nilai_impor * (0.10 if self.NPWP else 0.20)
-            total_usd = bea_masuk + ppn_usd + pph_usd
+            record = {
+                "harga_idr": harga_idr,
+                "tanggal": parse_tanggal(self.tanggal_input.text()),
+                "kode_hs": parse_kode_hs(self.kode_hs_input.text()),
+            }
+            hasil = engine.hitung_pajak_record(record, self.pajak_config())
 
             self.preview_labels["harga_barang"].setText(f"Rp {harga_idr:,}")
-            self.preview_labels["selisih"].setText(f"$ {selisih_pembebasan:,.2f}")
-            self.preview_labels["bea_masuk"].setText(f"$ {bea_masuk:,.2f}")
-            self.preview_labels["ppn"].setText(f"Rp {int(ppn_usd * self.KURS_PAJAK):,}")
-            self.preview_labels["pph"].setText(f"Rp {int(pph_usd * self.KURS_PAJAK):,}")
-            self.preview_labels["total_usd"].setText(f"$ {total_usd:,.2f}")
-            self.preview_labels["total_idr"].setText(
-                f"Rp {int(total_usd * self.KURS_PAJAK):,}"
+            self.preview_labels["selisih"].setText(
+                f"$ {hasil['selisih_pembebasan']:,.2f}"
             )
+            self.preview_labels["bea_masuk"].setText(f"$ {hasil['bea_masuk']:,.2f}")
+            self.preview_labels["ppn"].setText(f"Rp {hasil['ppn_idr']:,}")
+            self.preview_labels["pph"].setText(f"Rp {hasil['pph_idr']:,}")
+            self.preview_labels["ppnbm"].setText(f"Rp {hasil['ppnbm_idr']:,}")
+            self.preview_labels["total_usd"].setText(f"$ {hasil['total_usd']:,.2f}")
+            self.preview_labels["total_idr"].setText(f"Rp {hasil['total_idr']:,}")
 
         except ValueError:
             self.clear_preview()
@@ -1012,28 +1674,29 @@ class BeaCukaiApp(QMainWindow):
             label.setText("Rp0" if "Rp" in label.text() else "$0.00")
 
     def delete_entry(self):
-        selected_row = self.table.currentRow()
+        selected_row = self.table.currentIndex().row()
         if selected_row >= 0:
-            nama = self.table.item(selected_row, 0).text()
+            nama = self.table_model.name_at(selected_row)
             if nama in self.data:
-                del self.data[nama]
-                self.save_data()
-                self.update_table()
+                self.apply_edit(f"Hapus '{nama}'", storage.op_delete(nama))
         else:
             QMessageBox.warning(self, "Peringatan", "Pilih baris yang akan dihapus.")
 
     def edit_entry(self):
-        selected_row = self.table.currentRow()
+        selected_row = self.table.currentIndex().row()
         if selected_row >= 0:
-            original_name = self.table.item(selected_row, 0).text()
+            original_name = self.table_model.name_at(selected_row)
             if original_name in self.data:
                 data = self.data[original_name]
                 self.nama_input.setText(original_name)
                 self.harga_input.setText(str(data["harga_idr"]))
+                self.tanggal_input.setText(format_tanggal(data.get("tanggal", 0)))
+                self.kode_hs_input.setText(format_kode_hs(data.get("kode_hs", 0)))
                 self.current_edit_name = original_name
         else:
             QMessageBox.warning(self, "Peringatan", "Pilih baris yang akan diedit.")
 
+    @tracing.timed("app.hitung_pajak")
     def hitung_pajak(self):
         try:
             nama = self.nama_input.text().strip()
@@ -1050,34 +1713,30 @@ class BeaCukaiApp(QMainWindow):
             if harga_idr <= 0:
                 raise ValueError("Harga harus > 0")
 
-            if self.current_edit_name:
-                if self.current_edit_name in self.data:
-                    del self.data[self.current_edit_name]
-                self.current_edit_name = None
-
-            harga_usd = harga_idr / self.KURS_PAJAK
-            selisih_pembebasan = max(0, harga_usd - self.PEMBEBASAN)
-            bea_masuk = selisih_pembebasan * 0.10
-            nilai_impor = selisih_pembebasan + bea_masuk
-            ppn_usd = nilai_impor * 0.11
-            ppn_idr = int(ppn_usd * self.KURS_PAJAK)
-            pph_usd = nilai_impor * (0.10 if self.NPWP else 0.20)
-            pph_idr = int(pph_usd * self.KURS_PAJAK)
-            total_usd = bea_masuk + ppn_usd + pph_usd
-            total_idr = int(total_usd * self.KURS_PAJAK)
-
-            self.data[nama] = {
-                "harga_idr": harga_idr,
-                "selisih_pembebasan": selisih_pembebasan,
-                "bea_masuk": bea_masuk,
-                "ppn_idr": ppn_idr,
-                "pph_idr": pph_idr,
-                "total_usd": total_usd,
-                "total_idr": total_idr,
-            }
+            try:
+                tanggal = parse_tanggal(self.tanggal_input.text())
+            except ValueError:
+                raise ValueError("Tanggal harus berformat YYYY-MM-DD")
+            try:
+                kode_hs = parse_kode_hs(self.kode_hs_input.text())
+            except ValueError:
+                raise ValueError("Kode HS harus berupa angka, mis. 8517.13.00")
 
-            self.save_data()
-            self.update_table()
+            # Hanya input yang disimpan; kolom pajak diturunkan saat ditampilkan
+            record = {"harga_idr": harga_idr, "tanggal": tanggal, "kode_hs": kode_hs}
+
+            edit_name = self.current_edit_name
+            self.current_edit_name = None
+
+            if edit_name and edit_name != nama and edit_name in self.data:
+                op = storage.op_rename(edit_name, nama, record)
+                label = f"Ganti Nama '{edit_name}'"
+            else:
+                op = storage.op_set(nama, record)
+                label = f"Ubah '{nama}'" if nama in self.data else f"Tambah '{nama}'"
+
+            row = self.apply_edit(label, op)
+            self.table.scrollTo(self.table_model.index(row, 0))
             self.clear_inputs()
 
         except ValueError as e:
@@ -1085,58 +1744,361 @@ class BeaCukaiApp(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Kesalahan sistem: {str(e)}")
 
+    def apply_edit(self, label, *ops):
+        """Terapkan dan simpan ops sebagai satu langkah yang bisa diurungkan."""
+        # Kebalikannya dihitung sebelum data berubah
+        self.undo_stack.push(label, ops, inverse_ops(self.data, ops))
+        row = self.commit_ops(ops)
+        self.update_undo_actions()
+        return row
+
+    def undo(self):
+        self.replay(self.undo_stack.undo())
+
+    def redo(self):
+        self.replay(self.undo_stack.redo())
+
+    def replay(self, ops):
+        # Disimpan sebagai ops biasa: jurnal cukup menambah baris
+        if ops:
+            row = self.commit_ops(ops)
+            if row is not None:
+                self.table.scrollTo(self.table_model.index(row, 0))
+        self.update_undo_actions()
+
+    def commit_ops(self, ops):
+        # Rekap tree dihitung dari record lama, jadi sebelum data berubah
+        self.rollups.apply_ops(self.current_data_file, ops, self.data)
+        row = self.table_model.apply_ops(ops)
+        self.save_data(*ops)
+        return row
+
+    def update_undo_actions(self):
+        editing = self.hitung_button.isEnabled()
+        undo_label = self.undo_stack.undo_label()
+        redo_label = self.undo_stack.redo_label()
+        self.undo_action.setText(f"Urungkan {undo_label}".strip())
+        self.redo_action.setText(f"Ulangi {redo_label}".strip())
+        self.undo_action.setEnabled(editing and self.undo_stack.can_undo())
+        self.redo_action.setEnabled(editing and self.undo_stack.can_redo())
+
+    @tracing.timed("app.update_table")
     def update_table(self):
-        self.table.setRowCount(len(self.data))
-        for row, (nama, data) in enumerate(self.data.items()):
-            items = [
-                QTableWidgetItem(nama),
-                QTableWidgetItem(f"Rp {data['harga_idr']:,}"),
-                QTableWidgetItem(f"$ {data['selisih_pembebasan']:,.2f}"),
-                QTableWidgetItem(f"$ {data['bea_masuk']:,.2f}"),
-                QTableWidgetItem(f"Rp {data['ppn_idr']:,}"),
-                QTableWidgetItem(f"Rp {data['pph_idr']:,}"),
-                QTableWidgetItem(f"$ {data['total_usd']:,.2f}"),
-                QTableWidgetItem(f"Rp {data['total_idr']:,}"),
-            ]
-            for col, item in enumerate(items):
-                item.setTextAlignment(
-                    Qt.AlignRight | Qt.AlignVCenter
-                    if col > 0
-                    else Qt.AlignLeft | Qt.AlignVCenter
-                )
-                self.table.setItem(row, col, item)
+        self.table_model.set_data_store(self.data)
         self.table.scrollToBottom()
 
     def clear_inputs(self):
         self.nama_input.clear()
         self.harga_input.clear()
+        self.tanggal_input.clear()
+        self.kode_hs_input.clear()
 
+    @tracing.timed("app.load_data")
     def load_data(self):
+        self.cancel_loading()
+        self.undo_stack.clear()
+        self.close_storage()
+        self.storage = storage.open_storage(self.current_data_file, self.STORAGE_MODE)
+
         try:
+            if not self.storage.streaming:
+                self.data = self.storage.load()
+                self.update_table()
+                self.select_pending_entry()
+                return
+
+            self.data = RecordStore()
+            self.update_table()
             if not os.path.exists(self.current_data_file):
-                self.data = {}
                 self.save_data()
                 return
 
-            with open(self.current_data_file, "r") as f:
-                self.data = json.load(f)
-            self.update_table()
-        except json.JSONDecodeError:
+            self.start_loading()
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Gagal memuat data: {str(e)}")
+            self.data = RecordStore()
+
+    def start_loading(self):
+        loader = DataLoader(self.storage, self)
+        loader.batch_loaded.connect(partial(self.on_batch_loaded, loader))
+        loader.ops_loaded.connect(partial(self.on_ops_loaded, loader))
+        loader.loaded.connect(partial(self.on_loaded, loader))
+        loader.failed.connect(partial(self.on_load_failed, loader))
+        self.loader = loader
+        # Durasi sampai database selesai dimuat di thread latar
+        self.load_started = tracing.now()
+        self.set_loading(True)
+        loader.start()
+
+    # Sinyal dari loader lama yang masih antre diabaikan
+
+    def on_batch_loaded(self, loader, items, progress):
+        if loader is not self.loader:
+            return
+        self.table_model.extend_rows(items)
+        self.load_progress.setValue(int(progress * 100))
+
+    def on_ops_loaded(self, loader, ops):
+        if loader is not self.loader:
+            return
+        self.table_model.apply_ops(ops)
+
+    def on_loaded(self, loader):
+        if loader is not self.loader:
+            return
+        self.loader = None
+        if tracing.enabled():
+            tracing.record("app.load_data.stream", self.load_started)
+        self.set_loading(False)
+        if self.storage.needs_snapshot:
+            self.save_data()
+        self.table.scrollToBottom()
+        self.select_pending_entry()
+        if not self.scans_started:
+            self.profile.event("database aktif termuat")
+        self.start_background_scans()
+
+    def on_load_failed(self, loader, error):
+        if loader is not self.loader:
+            return
+        self.loader = None
+        self.set_loading(False)
+        if isinstance(error, json.JSONDecodeError):
             QMessageBox.warning(self, "Warning", "File data rusak. Membuat data baru.")
-            self.data = {}
+            self.data = RecordStore()
+            self.update_table()
             self.save_data()
+        else:
+            QMessageBox.critical(self, "Error", f"Gagal memuat data: {str(error)}")
+            self.data = RecordStore()
+            self.update_table()
+        self.start_background_scans()
+
+    def cancel_loading(self):
+        if self.loader is None:
+            return
+        self.loader.cancel()
+        self.loader = None
+        self.set_loading(False)
+
+    def abort_loading(self):
+        # Data yang baru termuat sebagian dibuang agar tidak ikut tersimpan
+        self.cancel_loading()
+        self.close_storage()
+        self.storage = None
+        self.data = RecordStore()
+        self.undo_stack.clear()
+        self.update_table()
+        self.set_editing_enabled(False)
+        self.active_db_label.setText(f"{self.active_db_label.text()} (batal)")
+        self.start_background_scans()
+
+    def set_loading(self, loading):
+        self.load_progress.setValue(0)
+        self.load_progress.setVisible(loading)
+        self.cancel_load_button.setVisible(loading)
+        self.set_editing_enabled(not loading)
+
+    def set_editing_enabled(self, enabled):
+        for btn in [self.hitung_button, self.edit_button, self.delete_button]:
+            btn.setEnabled(enabled)
+        self.update_undo_actions()
+
+    @tracing.timed("app.save_data")
+    def save_data(self, *ops):
+        # Tanpa ops berarti tulis ulang penuh (snapshot). Penulisan ke disk
+        # terjadi di thread latar belakang; kegagalan sebelumnya dilaporkan
+        # pada aksi berikutnya.
+        self.storage.write(self.data, ops)
+        self.search_index.apply_ops(self.current_data_file, ops)
+        if not ops:
+            # Rekap dibaca ulang setelah penulis latar belakang selesai
+            # menulis; edit biasa sudah diperbarui lewat commit_ops
+            self.rollups.invalidate(self.current_data_file, delay=1.0)
+        error = storage.background_writer().take_error()
+        if error is not None:
+            QMessageBox.critical(self, "Error", f"Gagal menyimpan data: {str(error)}")
+
+    # Tree, indeks pencarian, dan rekap tree mengikuti operasi file di
+    # aplikasi tanpa memindai ulang folder
+
+    def file_created(self, path, src_path=None):
+        self.file_model.add_path(path)
+        self.catalog.update(path)
+        if src_path is None:
+            self.search_index.set_file(path, {})
+        else:
+            self.search_index.copy_path(src_path, path)
+        self.rollups.invalidate(path)
+
+    def file_renamed(self, old_path, new_path):
+        self.file_model.rename_path(old_path, new_path)
+        self.catalog.rename_path(old_path, new_path)
+        self.search_index.rename_path(old_path, new_path)
+        self.rollups.rename_path(old_path, new_path)
+
+    def file_removed(self, path):
+        self.file_model.remove_path(path)
+        self.catalog.remove_path(path)
+        self.search_index.remove_path(path)
+        self.rollups.invalidate(path)
+
+    def on_rollup_updated(self, path):
+        # Ringkasan baru berarti file selesai dibaca ulang atau diedit;
+        # jumlah barangnya ikut dicatat di katalog
+        summary = self.rollups.file_summary(path)
+        self.catalog.update(path, summary["entries"] if summary else None)
+        # Baris file dan semua folder di atasnya ikut berubah
+        while len(path) > len(self.script_dir):
+            source_index = self.file_model.path_index(path)
+            if source_index.isValid():
+                first = self.proxy_model.mapFromSource(source_index.siblingAtColumn(1))
+                last = self.proxy_model.mapFromSource(source_index.siblingAtColumn(3))
+                if first.isValid():
+                    emit(self.proxy_model.dataChanged, first, last)
+            path = os.path.dirname(path)
+
+    def start_search_index(self):
+        if self.search_thread is not None:
+            return
+        # Perubahan yang masih antre ditulis dulu supaya ikut terindeks
+        storage.background_writer().flush()
+        self.search_thread = threading.Thread(
+            target=self.build_search_index, daemon=True
+        )
+        self.search_thread.start()
+
+    def build_search_index(self):
+        self.search_index.build(self.script_dir)
+        self.profile.event("indeks pencarian selesai")
+
+    def update_search_results(self, text):
+        self.search_results.clear()
+        searching = bool(text.strip())
+        self.search_results.setVisible(searching)
+        self.tree_view.setVisible(not searching)
+        if not searching:
+            return
+        # Pencarian sebelum pemindaian latar dimulai langsung memicunya
+        self.start_search_index()
+
+        for path, nama, harga in self.search_index.search(text):
+            folder = os.path.relpath(os.path.dirname(path), self.script_dir)
+            location = os.path.splitext(os.path.basename(path))[0]
+            if folder != ".":
+                location = os.path.join(folder, location)
+            item = QListWidgetItem(f"{nama}\nRp {harga:,} - {location}")
+            item.setData(Qt.UserRole, (path, nama))
+            self.search_results.addItem(item)
+
+    def on_search_result_activated(self, item):
+        path, nama = item.data(Qt.UserRole)
+        self.pending_select = nama
+        try:
+            if path != self.current_data_file or self.storage is None:
+                if not self.open_database(path):
+                    self.pending_select = None
+            else:
+                self.select_pending_entry()
         except Exception as e:
-            QMessageBox.critical(self, "Error", f"Gagal memuat data: {str(e)}")
-            self.data = {}
+            QMessageBox.critical(self, "Error", f"Gagal membuka file: {str(e)}")
+
+    def select_pending_entry(self):
+        nama, self.pending_select = self.pending_select, None
+        if nama is None:
+            return
+        row = self.table_model.row_of(nama)
+        if row is not None:
+            self.table.selectRow(row)
+            self.table.scrollTo(self.table_model.index(row, 0))
+
+    def reprice_all_databases(self):
+        if self.reprice_job is not None:
+            return
+        # Perubahan yang masih antre harus sudah di disk sebelum pekerja
+        # membaca; database yang sedang terbuka hanya dibaca, tidak ditulis.
+        storage.background_writer().flush()
+        from reprice_job import RepriceJob
+
+        readonly_paths = []
+        if self.storage is not None:
+            readonly_paths.append(self.current_data_file)
+
+        job = RepriceJob(self.script_dir, self.pajak_config(), readonly_paths, self)
+        job.progress.connect(partial(self.on_reprice_progress, job))
+        job.finished.connect(partial(self.on_reprice_finished, job))
+        job.failed.connect(partial(self.on_reprice_failed, job))
+        self.reprice_job = job
+        self.reprice_action.setEnabled(False)
+        self.statusBar().showMessage("Menghitung ulang semua database...")
+        job.start()
+
+    def on_reprice_progress(self, job, done, total, rows, elapsed):
+        if job is not self.reprice_job:
+            return
+        rate = rows / elapsed if elapsed > 0 else 0.0
+        self.statusBar().showMessage(
+            f"Hitung ulang: {done}/{total} file, {rows:,} baris "
+            f"({rate:,.0f} baris/detik)"
+        )
+
+    def on_reprice_finished(self, job, report):
+        if job is not self.reprice_job:
+            return
+        self.reprice_job = None
+        self.reprice_action.setEnabled(True)
+        self.rollups.merge_report(report)
+        stats = report["stats"]
+        message = (
+            f"{stats['files']} file, {stats['rows']:,} baris dihitung ulang "
+            f"dalam {stats['seconds']:.2f} detik"
+        )
+        self.statusBar().showMessage(message, 10000)
+        if report["errors"]:
+            details = "\n".join(
+                f"{name}: {error}" for name, error in report["errors"].items()
+            )
+            QMessageBox.warning(
+                self, "Warning", f"{message}\n\nGagal diproses:\n{details}"
+            )
+
+    def on_reprice_failed(self, job, error):
+        if job is not self.reprice_job:
+            return
+        self.reprice_job = None
+        self.reprice_action.setEnabled(True)
+        self.statusBar().clearMessage()
+        QMessageBox.critical(
+            self, "Error", f"Gagal menghitung ulang database: {str(error)}"
+        )
+
+    def cancel_reprice(self):
+        # Menunggu pekerja yang sedang berjalan selesai
+        if self.reprice_job is None:
+            return
+        self.reprice_job.cancel()
+        self.reprice_job = None
+        self.reprice_action.setEnabled(True)
+        self.statusBar().clearMessage()
 
-    def save_data(self):
-        with open(self.current_data_file, "w") as f:
-            json.dump(self.data, f, indent=4)
+    def closeEvent(self, event):
+        self.cancel_loading()
+        self.cancel_reprice()
+        self.rollups.close()
+        self.close_storage()
+        storage.background_writer().close()
+        super().closeEvent(event)
 
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    # Wajib untuk process pool di build onefile Windows
+    multiprocessing.freeze_support()
+    profile = StartupProfile(_STARTED, "--profile-startup" in sys.argv)
+    profile.mark("impor modul")
+    app = QApplication([arg for arg in sys.argv if arg != "--profile-startup"])
     app.setStyle("Fusion")
-    window = BeaCukaiApp()
+    profile.mark("QApplication")
+    window = BeaCukaiApp(profile)
     window.show()
+    profile.mark("show()")
     sys.exit(app.exec())
@@ -0,0 +1,372 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+import argparse
+from collections import Counter, deque
+from urllib.parse import urlsplit, parse_qs
+
+import engine
+import storage
+from bulk import config_from_file, default_root
+from kurs_table import parse_tanggal
+from tariff import TARIFF_FILE, parse_kode_hs
+
+
+# Layanan HTTP lokal untuk menghitung pajak dari program lain (POS, alat
+# listing marketplace). Hanya pustaka standar, tanpa PySide6.
+
+MAX_HEADER = 64 << 10
+MAX_BODY = 16 << 20
+MAX_BATCH = 1_000_000
+LATENCY_SAMPLES = 10000
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ServiceStats:
+    """Penghitung permintaan, harga yang dihitung, dan latensi terakhir."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = Counter()
+        self.errors = Counter()
+        self.quotes = 0
+        self.connections = 0
+        self.open_connections = 0
+        # Latensi (detik) permintaan terakhir, untuk persentil
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, path, status, quotes, seconds):
+        self.requests[path] += 1
+        if status >= 400:
+            self.errors[status] += 1
+        self.quotes += quotes
+        self.latencies.append(seconds)
+
+    def snapshot(self):
+        uptime = time.monotonic() - self.started
+        samples = sorted(self.latencies)
+
+        def percentile(p):
+            if not samples:
+                return 0.0
+            return samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+
+        total = sum(self.requests.values())
+        return {
+            "uptime_seconds": uptime,
+            "requests": total,
+            "requests_by_path": dict(self.requests),
+            "errors": {str(status): n for status, n in self.errors.items()},
+            "quotes": self.quotes,
+            "requests_per_second": total / uptime if uptime > 0 else 0.0,
+            "quotes_per_second": self.quotes / uptime if uptime > 0 else 0.0,
+            "connections": self.connections,
+            "open_connections": self.open_connections,
+            "latency_ms": {
+                "samples": len(samples),
+                "p50": percentile(0.50),
+                "p90": percentile(0.90),
+                "p99": percentile(0.99),
+                "max": samples[-1] * 1000 if samples else 0.0,
+            },
+        }
+
+
+class PricingService:
+    """Server HTTP/1.1 asyncio dengan keep-alive dan pipelining.
+
+    Permintaan pada satu koneksi diproses berurutan, jadi permintaan yang
+    dikirim beruntun tanpa menunggu jawaban (pipelining) dijawab dengan
+    urutan yang sama. Konfigurasi dibaca ulang dari `config_path` setiap
+    kali file itu atau tabel tarifnya berubah.
+
+    Endpoint:
+      GET  /quote?harga_idr=N         satu barang, hasil seperti hitung_pajak
+      POST /quote  {"harga_idr": N}
+      POST /batch  {"harga_idr": [N, ...]}  hasil per kolom FIELDS
+      GET  /stats                     penghitung dan latensi
+      GET  /config                    konfigurasi yang sedang dipakai
+
+    /quote dan /batch juga menerima `tanggal` (YYYY-MM-DD, untuk riwayat
+    kurs) dan `kode_hs` (untuk tabel tarif), keduanya opsional; di /batch
+    keduanya berupa list sepanjang harga_idr.
+    """
+
+    def __init__(self, config_path):
+        self.config_path = config_path
+        self.stats = ServiceStats()
+        self._config = None
+        self._config_signature = None
+        # /batch dihitung di thread executor, bersamaan dengan loop utama
+        self._config_lock = threading.Lock()
+
+    def config(self):
+        folder = os.path.dirname(os.path.abspath(self.config_path))
+        signature = []
+        for path in (self.config_path, os.path.join(folder, TARIFF_FILE)):
+            try:
+                signature.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                signature.append(None)
+        with self._config_lock:
+            if self._config is None or signature != self._config_signature:
+                self._config = config_from_file(self.config_path)
+                self._config_signature = signature
+            return self._config
+
+    async def serve(self, host, port):
+        return await asyncio.start_server(
+            self.handle_connection, host, port, limit=MAX_HEADER
+        )
+
+    async def handle_connection(self, reader, writer):
+        self.stats.connections += 1
+        self.stats.open_connections += 1
+        try:
+            while True:
+                keep_alive = await self._handle_request(reader, writer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.stats.open_connections -= 1
+            writer.close()
+
+    async def _handle_request(self, reader, writer):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise
+            return False
+        except asyncio.LimitOverrunError:
+            await self._respond(writer, 431, {"error": "Header terlalu besar"}, False)
+            return False
+        start = time.perf_counter()
+
+        try:
+            method, target, version, headers = _parse_head(head)
+        except HttpError as e:
+            await self._respond(writer, e.status, {"error": str(e)}, False)
+            return False
+
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.0":
+            keep_alive = connection == "keep-alive"
+        else:
+            keep_alive = connection != "close"
+
+        path = urlsplit(target).path
+        quotes = 0
+        body = None
+        try:
+            body = await self._read_body(reader, headers)
+            if path == "/batch":
+                # Ribuan harga dihitung di thread lain agar koneksi lain
+                # tetap dilayani selama batch berjalan
+                loop = asyncio.get_running_loop()
+                status, payload, quotes = await loop.run_in_executor(
+                    None, self.route, method, target, body
+                )
+            else:
+                status, payload, quotes = self.route(method, target, body)
+        except HttpError as e:
+            status, payload = e.status, {"error": str(e)}
+        except Exception as e:
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+        if body is None:
+            # Body yang tidak terbaca membuat permintaan berikutnya rusak
+            keep_alive = False
+
+        await self._respond(writer, status, payload, keep_alive)
+        self.stats.record(path, status, quotes, time.perf_counter() - start)
+        return keep_alive
+
+    async def _read_body(self, reader, headers):
+        if "transfer-encoding" in headers:
+            raise HttpError(411, "Gunakan Content-Length, bukan chunked")
+        length = headers.get("content-length")
+        if length is None:
+            return b""
+        try:
+            length = int(length)
+        except ValueError:
+            raise HttpError(400, "Content-Length tidak valid")
+        if length > MAX_BODY:
+            raise HttpError(413, f"Body melebihi {MAX_BODY} byte")
+        return await reader.readexactly(length)
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode()
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        )
+        writer.write(head.encode() + body)
+        await writer.drain()
+
+    def route(self, method, target, body):
+        """Kembalikan (status, payload, jumlah harga yang dihitung)."""
+        url = urlsplit(target)
+        if url.path == "/quote":
+            if method == "GET":
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            elif method == "POST":
+                query = _parse_json(body)
+            else:
+                raise HttpError(405, "Gunakan GET atau POST")
+            if query.get("harga_idr") is None:
+                raise HttpError(400, "harga_idr wajib diisi")
+            record = {
+                "harga_idr": _parse_price(query["harga_idr"]),
+                "tanggal": _parse_date(query.get("tanggal")),
+                "kode_hs": _parse_kode_hs(query.get("kode_hs")),
+            }
+            return 200, engine.hitung_pajak_record(record, self.config()), 1
+
+        if url.path == "/batch":
+            if method != "POST":
+                raise HttpError(405, "Gunakan POST")
+            payload = _parse_json(body)
+            prices = payload.get("harga_idr")
+            if not isinstance(prices, list):
+                raise HttpError(400, "harga_idr harus berupa list")
+            if len(prices) > MAX_BATCH:
+                raise HttpError(413, f"Paling banyak {MAX_BATCH} harga per batch")
+            inputs = {"harga_idr": [_parse_price(harga) for harga in prices]}
+            for field, parse in (("tanggal", _parse_date), ("kode_hs", _parse_kode_hs)):
+                values = payload.get(field)
+                if values is None:
+                    continue
+                if not isinstance(values, list) or len(values) != len(prices):
+                    raise HttpError(400, f"{field} harus list sepanjang harga_idr")
+                inputs[field] = [parse(value) for value in values]
+            columns = engine.hitung_pajak_kolom(inputs, self.config())
+            if engine.np is not None:
+                columns = {field: columns[field].tolist() for field in engine.FIELDS}
+            return 200, {"count": len(prices), "columns": columns}, len(prices)
+
+        if url.path == "/stats" and method == "GET":
+            return 200, self.stats.snapshot(), 0
+        if url.path == "/config" and method == "GET":
+            return 200, engine.config_dict(self.config()), 0
+        raise HttpError(404, f"Tidak ada endpoint {method} {url.path}")
+
+
+def _parse_head(head):
+    try:
+        lines = head.decode("latin-1").split("\r\n")
+        method, target, version = lines[0].split(" ")
+    except ValueError:
+        raise HttpError(400, "Baris permintaan tidak valid")
+    headers = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, sep, value = line.partition(":")
+        if not sep:
+            raise HttpError(400, "Header tidak valid")
+        headers[name.strip().lower()] = value.strip()
+    return method, target, version, headers
+
+
+def _parse_json(body):
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HttpError(400, "Body harus JSON")
+    if not isinstance(payload, dict):
+        raise HttpError(400, "Body harus objek JSON")
+    return payload
+
+
+def _parse_price(value):
+    # bool adalah turunan int, tapi bukan harga
+    if isinstance(value, int) and not isinstance(value, bool):
+        harga = value
+    elif isinstance(value, str) and value.isdigit():
+        harga = int(value)
+    else:
+        harga = 0
+    if harga <= 0:
+        raise HttpError(400, f"Harga tidak valid: {value!r}")
+    return harga
+
+
+def _parse_date(value):
+    # YYYY-MM-DD atau YYYYMMDD seperti di database; kosong berarti tanpa tanggal
+    if value is None or value == "":
+        return 0
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value) if value.isdigit() else parse_tanggal(value)
+        except ValueError:
+            pass
+    raise HttpError(400, f"Tanggal tidak valid: {value!r}")
+
+
+def _parse_kode_hs(value):
+    if value is None:
+        return 0
+    try:
+        return parse_kode_hs(value)
+    except ValueError:
+        raise HttpError(400, f"Kode HS tidak valid: {value!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="main.py serve",
+        description="Layanan HTTP lokal untuk menghitung pajak impor.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--config",
+        default=os.path.join(default_root(), storage.CONFIG_FILE),
+        help="config.json aplikasi (dibaca ulang saat berubah)",
+    )
+    args = parser.parse_args(argv)
+
+    service = PricingService(args.config)
+
+    async def run():
+        server = await service.serve(args.host, args.port)
+        print(f"Melayani di http://{args.host}:{args.port}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+import sys
+import ctypes
+
+from PySide6.QtCore import Qt, QObject, Signal, QAbstractTableModel, QModelIndex
+
+
+# Penambal refcount untuk PySide6 6.12. Setiap bug diperiksa sekali saat
+# modul dimuat, jadi versi PySide6 yang sudah benar tidak ikut ditambal.
+# Ketiganya ditemukan di PySide6 6.12.0. Sebuah penambal beserta probe-nya
+# boleh dihapus begitu flag _*_LEAKS-nya bernilai False di versi PySide6
+# terlama yang didukung; pemanggilnya kembali ke `return None`,
+# `return super().data(...)`, dan `signal.emit(...)`.
+
+
+def _restore(obj, lost):
+    for _ in range(max(lost, 0)):
+        ctypes.pythonapi.Py_IncRef(ctypes.py_object(obj))
+
+
+def _none_leaks():
+    # PySide6 6.12 mengurangi refcount None setiap kali override data()
+    # di Python mengembalikan None; lama-lama None "dibebaskan" dan
+    # interpreter berhenti dengan "none_dealloc".
+    class Probe(QAbstractTableModel):
+        def rowCount(self, parent=QModelIndex()):
+            return 1
+
+        def columnCount(self, parent=QModelIndex()):
+            return 1
+
+        def data(self, index, role=Qt.DisplayRole):
+            return None
+
+    model = Probe()
+    index = model.index(0, 0)
+    before = sys.getrefcount(None)
+    for _ in range(64):
+        index.data(Qt.ToolTipRole)
+    lost = before - sys.getrefcount(None)
+    _restore(None, lost)
+    return lost >= 32
+
+
+def _variant_leaks():
+    # Hal yang sama terjadi ke arah sebaliknya: QVariant kosong yang
+    # dikembalikan Qt ke Python (mis. super().headerData() untuk role yang
+    # tidak ditangani) juga kehilangan satu refcount None.
+    class Probe(QAbstractTableModel):
+        def rowCount(self, parent=QModelIndex()):
+            return 1
+
+        def columnCount(self, parent=QModelIndex()):
+            return 1
+
+    model = Probe()
+    before = sys.getrefcount(None)
+    for _ in range(64):
+        model.headerData(0, Qt.Vertical, Qt.ToolTipRole)
+    lost = before - sys.getrefcount(None)
+    _restore(None, lost)
+    return lost >= 32
+
+
+def _emit_leaks():
+    # Signal.emit() mengembalikan True tanpa menambah refcount-nya; setelah
+    # ribuan emit (mis. satu per file di folder besar) True "dibebaskan"
+    # dan interpreter berhenti dengan "bool_dealloc".
+    class Probe(QObject):
+        ping = Signal()
+
+    probe = Probe()
+    before = sys.getrefcount(True)
+    for _ in range(64):
+        probe.ping.emit()
+    lost = before - sys.getrefcount(True)
+    _restore(True, lost)
+    return lost >= 32
+
+
+_NONE_LEAKS = _none_leaks()
+_VARIANT_LEAKS = _variant_leaks()
+_EMIT_LEAKS = _emit_leaks()
+
+
+def no_data():
+    """Nilai kosong untuk data()/headerData(); pengganti `return None`."""
+    if _NONE_LEAKS:
+        ctypes.pythonapi.Py_IncRef(ctypes.py_object(None))
+    return None
+
+
+def forward(value):
+    """Hasil super().data()/headerData() yang diteruskan dari override;
+    pengganti `return super().data(index, role)`.
+    """
+    if value is None:
+        if _VARIANT_LEAKS:
+            ctypes.pythonapi.Py_IncRef(ctypes.py_object(None))
+        return no_data()
+    return value
+
+
+def emit(signal, *args):
+    """Pengganti `signal.emit(*args)`; aman dipanggil dari thread mana pun."""
+    result = signal.emit(*args)
+    if _EMIT_LEAKS:
+        ctypes.pythonapi.Py_IncRef(ctypes.py_object(result))
+    return result
@@ -0,0 +1,150 @@
+from array import array
+
+from engine import INPUT_FIELDS
+
+
+class RecordStore:
+    """Data database dalam bentuk kolom, pengganti dict berisi dict.
+
+    Setiap field input disimpan di satu array bertipe int64 dan nama
+    barang di satu list, ditambah indeks nama -> baris. Satu baris tidak
+    lagi memerlukan dict dan objek int sendiri, dan kolom bisa langsung
+    diolah numpy (lihat DerivedCache). Antarmukanya seperti dict dengan
+    urutan sisip, ditambah antarmuka baris yang dipakai DataTableModel.
+    """
+
+    def __init__(self, items=()):
+        self._names = []
+        self._columns = {field: array("q") for field in INPUT_FIELDS}
+        # Baris yang tercatat hanya dipercaya di bawah _rows_valid_until;
+        # sisanya diperbaiki malas setelah penghapusan menggeser baris.
+        self._rows = {}
+        self._rows_valid_until = 0
+        for nama, record in items:
+            self[nama] = record
+
+    @classmethod
+    def from_columns(cls, names, columns):
+        """Bangun dari list nama unik dan array per field, tanpa disalin ulang."""
+        store = cls()
+        store._names = names
+        store._columns = columns
+        store._rows = {nama: row for row, nama in enumerate(names)}
+        store._rows_valid_until = len(names)
+        return store
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, nama):
+        return nama in self._rows
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __getitem__(self, nama):
+        row = self.row_of(nama)
+        if row is None:
+            raise KeyError(nama)
+        return self._record(row)
+
+    def __setitem__(self, nama, record):
+        row = self.row_of(nama)
+        if row is None:
+            row = len(self._names)
+            self._names.append(nama)
+            for field, column in self._columns.items():
+                column.append(record.get(field, 0))
+            self._rows[nama] = row
+            if self._rows_valid_until == row:
+                self._rows_valid_until = row + 1
+            return
+        for field, column in self._columns.items():
+            column[row] = record.get(field, 0)
+
+    def keys(self):
+        return iter(self._names)
+
+    def values(self):
+        for row in range(len(self._names)):
+            yield self._record(row)
+
+    def items(self):
+        for row, nama in enumerate(self._names):
+            yield nama, self._record(row)
+
+    def get(self, nama, default=None):
+        row = self.row_of(nama)
+        if row is None:
+            return default
+        return self._record(row)
+
+    def pop(self, nama, *default):
+        row = self.row_of(nama)
+        if row is None:
+            if default:
+                return default[0]
+            raise KeyError(nama)
+        record = self._record(row)
+        del self._names[row]
+        for column in self._columns.values():
+            del column[row]
+        del self._rows[nama]
+        self._rows_valid_until = min(self._rows_valid_until, row)
+        return record
+
+    def rename(self, old_name, new_name, record):
+        row = self.row_of(old_name)
+        if row is None or new_name in self:
+            self.pop(old_name, None)
+            self[new_name] = record
+            return
+        # Baris tetap di posisinya
+        self._names[row] = new_name
+        del self._rows[old_name]
+        self._rows[new_name] = row
+        for field, column in self._columns.items():
+            column[row] = record.get(field, 0)
+
+    def copy(self):
+        store = RecordStore()
+        store._names = list(self._names)
+        store._columns = {
+            field: array("q", column) for field, column in self._columns.items()
+        }
+        store._rows = dict(self._rows)
+        store._rows_valid_until = self._rows_valid_until
+        return store
+
+    def column(self, field):
+        """Array int64 untuk satu field, urut sesuai baris."""
+        return self._columns[field]
+
+    # Antarmuka baris untuk DataTableModel
+
+    def row(self, row):
+        return self._names[row], self._record(row)
+
+    def name_at(self, row):
+        return self._names[row]
+
+    def row_of(self, nama):
+        row = self._rows.get(nama)
+        if row is None or row < self._rows_valid_until:
+            return row
+        for i in range(self._rows_valid_until, len(self._names)):
+            self._rows[self._names[i]] = i
+        self._rows_valid_until = len(self._names)
+        return self._rows[nama]
+
+    def appended(self, nama):
+        pass
+
+    def removed(self, row, nama):
+        pass
+
+    def renamed(self, row, old_name, new_name):
+        pass
+
+    def _record(self, row):
+        return {field: column[row] for field, column in self._columns.items()}
@@ -0,0 +1,51 @@
+import threading
+from functools import partial
+
+from PySide6.QtCore import QObject, Signal
+
+import bulk
+from qt_compat import emit
+
+
+class RepriceJob(QObject):
+    """Menjalankan bulk.reprice_all di thread terpisah untuk GUI.
+
+    Perhitungannya sendiri berjalan di process pool; thread ini hanya
+    menunggu hasil shard dan meneruskan progres lewat sinyal.
+    """
+
+    progress = Signal(int, int, int, float)
+    finished = Signal(object)
+    failed = Signal(object)
+
+    def __init__(self, root, config, readonly_paths=(), parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.config = config
+        self.readonly_paths = tuple(readonly_paths)
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def cancel(self):
+        self._cancelled.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def is_running(self):
+        return self._thread.is_alive()
+
+    def _run(self):
+        try:
+            report = bulk.reprice_all(
+                self.root,
+                self.config,
+                readonly_paths=self.readonly_paths,
+                progress=partial(emit, self.progress),
+                cancelled=self._cancelled.is_set,
+            )
+            emit(self.finished, report)
+        except Exception as e:
+            emit(self.failed, e)
@@ -0,0 +1,351 @@
+import os
+import json
+import time
+import threading
+
+from PySide6.QtCore import QObject, Signal
+
+import engine
+import storage
+from qt_compat import emit
+from bulk import REPORT_FILE
+
+
+class RollupCache(QObject):
+    """Ringkasan per file (jumlah barang, total kolom) untuk tree navigasi.
+
+    Ringkasan disimpan bersama signature file (mtime dan ukuran file
+    beserta jurnalnya) di `<root>/.rekap.json`, format yang sama dengan
+    laporan bulk. File hanya dibaca ulang jika signature-nya berubah.
+    Pemeriksaan dan perhitungan berjalan di thread sendiri; `updated`
+    dipancarkan dengan path file yang ringkasannya berubah.
+
+    Ringkasan database yang sedang diedit diperbarui dari ops (apply_ops),
+    bukan dibaca ulang; pembacaan penuh hanya untuk perubahan dari luar.
+    """
+
+    updated = Signal(str)
+
+    SAVE_DELAY = 2.0
+
+    def __init__(self, root, config, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.report_path = os.path.join(root, REPORT_FILE)
+        self._config = config
+        self._files = {}
+        self._folders = {}
+        # File yang sudah dicocokkan dengan disk sejak terakhir diinvalidasi
+        self._valid = set()
+        # File yang ringkasannya diikuti dari ops; disk tidak dibaca ulang
+        self._live = set()
+        # Jumlah apply_ops per file, untuk membuang hasil baca yang tertinggal
+        self._edits = {}
+        self._queue = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self.rescan()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def file_summary(self, path):
+        """Ringkasan terakhir yang diketahui; None jika belum pernah dihitung."""
+        with self._cond:
+            if path not in self._valid and path not in self._queue:
+                self._enqueue(path, 0.0)
+            return self._files.get(path)
+
+    def folder_summary(self, path):
+        with self._cond:
+            summary = self._folders.get(path)
+            if summary is None:
+                summary = self._sum_folder(path)
+                self._folders[path] = summary
+            return summary
+
+    def set_config(self, config):
+        # Total bergantung pada konfigurasi, jadi semua ringkasan dibuang
+        with self._cond:
+            if config == self._config:
+                return
+            self._config = config
+            paths = list(self._files)
+            self._files.clear()
+            self._folders.clear()
+            self._valid.clear()
+            self._live.clear()
+            for path in paths:
+                self._enqueue(path, 0.0)
+
+    def invalidate(self, path, delay=0.0):
+        """Periksa ulang file atau semua file di dalam folder `path`."""
+        with self._cond:
+            prefix = path + os.sep
+            for known in list(self._files):
+                if known == path or known.startswith(prefix):
+                    self._valid.discard(known)
+                    self._live.discard(known)
+                    self._enqueue(known, delay)
+            if not os.path.isdir(path):
+                self._valid.discard(path)
+                self._live.discard(path)
+                self._enqueue(path, delay)
+
+    def apply_ops(self, path, ops, data):
+        """Perbarui ringkasan `path` dari ops storage, dipanggil sebelum ops
+        diterapkan ke `data`.
+
+        Hanya record yang disentuh yang dihitung. Jika ringkasannya belum
+        dicocokkan dengan disk, file dibaca ulang seperti biasa.
+        """
+        with self._cond:
+            config = self._config
+            self._edits[path] = self._edits.get(path, 0) + 1
+            known = path in self._valid or path in self._live
+        if not known:
+            self.invalidate(path, delay=1.0)
+            return
+
+        removed, added = _changed_records(ops, data)
+        delta = {"entries": len(added) - len(removed)}
+        for sign, records in ((1, added), (-1, removed)):
+            if records:
+                totals = engine.hitung_total(engine.input_columns(records), config)
+                for field, value in totals.items():
+                    delta[field] = delta.get(field, 0) + sign * value
+
+        with self._cond:
+            summary = self._files.get(path)
+            if config != self._config or summary is None:
+                return
+            totals = dict(summary["totals"])
+            for field in totals:
+                totals[field] += delta.get(field, 0)
+            # Signature dicap ulang setelah penulis latar belakang selesai
+            self._files[path] = {
+                "signature": summary["signature"],
+                "entries": summary["entries"] + delta["entries"],
+                "totals": totals,
+            }
+            self._live.add(path)
+            self._valid.add(path)
+            self._folders_changed(path)
+        emit(self.updated, path)
+
+    def release(self, path):
+        """Hentikan apply_ops untuk `path` setelah storage-nya ditutup.
+
+        Semua tulisan sudah selesai, jadi signature file saat ini cocok
+        dengan ringkasan yang diikuti dari ops.
+        """
+        with self._cond:
+            if path not in self._live:
+                return
+            self._live.discard(path)
+            summary = self._files.get(path)
+            if summary is not None and os.path.exists(path):
+                summary["signature"] = storage.file_signature(path)
+        self._save()
+
+    def rename_path(self, old_path, new_path):
+        with self._cond:
+            prefix = old_path + os.sep
+            for known in list(self._files):
+                if known == old_path:
+                    moved = new_path
+                elif known.startswith(prefix):
+                    moved = new_path + known[len(old_path) :]
+                else:
+                    continue
+                self._files[moved] = self._files.pop(known)
+                self._valid.discard(known)
+                self._live.discard(known)
+                self._enqueue(moved, 0.0)
+                self._folders_changed(known)
+                self._folders_changed(moved)
+        self._save()
+
+    def rescan(self):
+        """Cari file baru/hilang di seluruh tree, di thread pekerja."""
+        with self._cond:
+            self._enqueue(None, 0.0)
+
+    def merge_report(self, report):
+        # Laporan bulk berisi ringkasan yang baru dihitung dari disk
+        if report["config"] != engine.config_dict(self._config):
+            return
+        with self._cond:
+            for key, summary in report["files"].items():
+                path = os.path.join(self.root, *key.split("/"))
+                self._files[path] = summary
+                self._valid.discard(path)
+                self._enqueue(path, 0.0)
+            self._folders.clear()
+
+    def _load_report(self):
+        # Dibaca di thread pekerja; laporan untuk ribuan file tidak ikut
+        # menahan startup. Ringkasan yang sudah dihitung lebih dulu menang.
+        try:
+            with open(self.report_path, "r") as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._cond:
+            if report.get("config") != engine.config_dict(self._config):
+                return
+            for key, summary in report.get("files", {}).items():
+                path = os.path.join(self.root, *key.split("/"))
+                if "signature" in summary and path not in self._files:
+                    self._files[path] = summary
+            self._folders.clear()
+
+    def _save(self):
+        # Isi laporan baru disusun saat job berjalan, jadi rentetan
+        # perubahan hanya menghasilkan satu kali tulis.
+        storage.background_writer().submit(
+            self.report_path, self._write_report, self.SAVE_DELAY
+        )
+
+    def _write_report(self):
+        with self._cond:
+            report = {
+                "config": engine.config_dict(self._config),
+                "files": {
+                    os.path.relpath(path, self.root).replace(os.sep, "/"): summary
+                    for path, summary in self._files.items()
+                },
+            }
+        storage.write_json_atomic(self.report_path, report)
+
+    def _enqueue(self, path, delay):
+        due = time.monotonic() + delay
+        self._queue[path] = min(due, self._queue.get(path, due))
+        self._cond.notify_all()
+
+    def _sum_folder(self, path):
+        prefix = path + os.sep
+        summary = {"entries": 0, "totals": dict.fromkeys(engine.FIELDS, 0)}
+        for known, file_summary in self._files.items():
+            if known.startswith(prefix):
+                summary["entries"] += file_summary["entries"]
+                for field, value in file_summary["totals"].items():
+                    summary["totals"][field] += value
+        return summary
+
+    def _folders_changed(self, path):
+        # Hanya folder leluhur yang agregatnya ikut berubah
+        folder = os.path.dirname(path)
+        while len(folder) >= len(self.root):
+            self._folders.pop(folder, None)
+            folder = os.path.dirname(folder)
+
+    def _next_path(self):
+        with self._cond:
+            while not self._closed:
+                if self._queue:
+                    path = min(self._queue, key=self._queue.get)
+                    wait = self._queue[path] - time.monotonic()
+                    if wait <= 0:
+                        del self._queue[path]
+                        return path
+                    self._cond.wait(wait)
+                else:
+                    self._cond.wait()
+            return False
+
+    def _run(self):
+        self._load_report()
+        while True:
+            path = self._next_path()
+            if path is False:
+                return
+            if path is None:
+                self._scan()
+                continue
+            try:
+                changed = self._refresh(path)
+            except Exception:
+                # File rusak atau sedang ditulis; dicoba lagi saat berubah
+                changed = False
+            if changed:
+                emit(self.updated, path)
+                self._save()
+
+    def _scan(self):
+        found = set(storage.find_databases(self.root))
+        with self._cond:
+            for path in found.union(self._files):
+                if path not in self._valid:
+                    self._enqueue(path, 0.0)
+
+    def _refresh(self, path):
+        with self._cond:
+            if path in self._live:
+                # Ringkasan diikuti dari ops; disk belum tentu selesai ditulis
+                return False
+            config = self._config
+            cached = self._files.get(path)
+            edits = self._edits.get(path, 0)
+
+        if not os.path.exists(path):
+            with self._cond:
+                self._valid.discard(path)
+                if self._files.pop(path, None) is None:
+                    return False
+                self._folders_changed(path)
+            return True
+
+        signature = storage.file_signature(path)
+        if cached is not None and cached["signature"] == signature:
+            with self._cond:
+                self._valid.add(path)
+            return False
+
+        inputs = engine.input_columns(storage.read_database(path).values())
+        summary = {
+            "signature": signature,
+            "entries": len(inputs["harga_idr"]),
+            "totals": engine.hitung_total(inputs, config),
+        }
+        with self._cond:
+            if config != self._config:
+                return False
+            if self._edits.get(path, 0) != edits:
+                # Diedit selama dibaca; hasilnya sudah tertinggal
+                self._valid.discard(path)
+                self._enqueue(path, 1.0)
+                return False
+            self._files[path] = summary
+            self._valid.add(path)
+            self._folders_changed(path)
+        return True
+
+
+def _changed_records(ops, data):
+    """Record yang hilang dan yang muncul jika `ops` diterapkan ke `data`."""
+    # Keadaan nama yang sudah disentuh ops sebelumnya; None = tidak ada
+    overlay = {}
+    removed = []
+    added = []
+    for op in ops:
+        names = [op["nama"]]
+        if op["op"] == "rename":
+            names.append(op["baru"])
+        for nama in names:
+            old = overlay[nama] if nama in overlay else data.get(nama)
+            if old is not None:
+                removed.append(old)
+            overlay[nama] = None
+        if op["op"] != "delete":
+            overlay[names[-1]] = op["data"]
+            added.append(op["data"])
+    return removed, added
@@ -0,0 +1,293 @@
+import os
+import re
+import heapq
+import threading
+from bisect import bisect_left, insort
+from itertools import islice
+
+import storage
+
+
+_TOKEN = re.compile(r"\w+")
+_PRICE_BOUND = re.compile(r"^(<=|>=|<|>)(\d+)$")
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+
+def parse_query(text):
+    """Pisahkan kata kunci dari batas harga, mis. `iphone >10000000 <20000000`.
+
+    Mengembalikan (kata, harga_min, harga_max); batas yang tidak ada None.
+    """
+    words = []
+    low = high = None
+    for part in text.split():
+        bound = _PRICE_BOUND.match(part)
+        if bound is None:
+            words.extend(tokenize(part))
+            continue
+        op, value = bound.group(1), int(bound.group(2))
+        if op == ">":
+            low = value + 1
+        elif op == ">=":
+            low = value
+        elif op == "<":
+            high = value - 1
+        else:
+            high = value
+    return words, low, high
+
+
+class SearchIndex:
+    """Indeks nama barang dan harga untuk semua database di satu folder.
+
+    Setiap barang mendapat id bilangan bulat yang terus naik; kata di nama
+    barang dipetakan ke daftar id yang karenanya selalu terurut, dan daftar
+    kata yang terurut dipakai untuk pencarian awalan dengan bisect. Barang
+    yang dihapus hanya ditandai None lalu dibersihkan sekaligus ketika
+    jumlahnya melebihi barang yang hidup.
+    Semua method aman dipanggil dari thread mana pun.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        # id -> (file_id, nama, harga_idr) atau None jika sudah dihapus
+        self._entries = []
+        self._dead = 0
+        self._tokens = {}
+        self._sorted_tokens = []
+        self._prices = []
+        self._paths = {}
+        self._file_ids = {}
+        self._file_entries = {}
+        self._next_file_id = 0
+
+    def build(self, root):
+        """Indeks semua database di bawah root; dipanggil dari thread latar."""
+        indexed = set()
+        # File yang muncul atau berganti nama selama pembangunan diambil
+        # pada putaran berikutnya.
+        while True:
+            paths = [p for p in storage.find_databases(root) if p not in indexed]
+            if not paths:
+                break
+            for path in paths:
+                indexed.add(path)
+                try:
+                    data = storage.read_database(path)
+                except Exception:
+                    continue
+                with self._lock:
+                    if path not in self._file_ids and os.path.exists(path):
+                        self._set_file(path, data)
+
+        # Urutan disiapkan sekarang supaya ketikan pertama tidak menunggu
+        with self._lock:
+            self._sorted_token_list()
+            self._sorted_prices()
+
+    def __len__(self):
+        return len(self._entries) - self._dead
+
+    def set_file(self, path, data):
+        with self._lock:
+            self._set_file(path, data)
+
+    def copy_path(self, src_path, dest_path):
+        with self._lock:
+            file_id = self._file_ids.get(src_path)
+            if file_id is None:
+                return
+            names = self._file_entries[file_id]
+            data = {
+                nama: {"harga_idr": self._entries[i][2]} for nama, i in names.items()
+            }
+            self._set_file(dest_path, data)
+
+    def rename_path(self, old_path, new_path):
+        """Ganti path file, atau semua file di dalam folder old_path."""
+        with self._lock:
+            prefix = old_path + os.sep
+            for path in list(self._file_ids):
+                if path == old_path:
+                    moved = new_path
+                elif path.startswith(prefix):
+                    moved = new_path + path[len(old_path) :]
+                else:
+                    continue
+                file_id = self._file_ids.pop(path)
+                self._file_ids[moved] = file_id
+                self._paths[file_id] = moved
+
+    def remove_path(self, path):
+        with self._lock:
+            prefix = path + os.sep
+            for indexed in list(self._file_ids):
+                if indexed == path or indexed.startswith(prefix):
+                    self._remove_file(indexed)
+            self._maybe_compact()
+
+    def apply_ops(self, path, ops):
+        """Ikuti operasi storage pada file yang sedang dibuka."""
+        with self._lock:
+            file_id = self._file_ids.get(path)
+            if file_id is None:
+                return
+            for op in ops:
+                kind = op["op"]
+                self._remove_entry(file_id, op["nama"])
+                if kind == "set":
+                    self._add_entry(file_id, op["nama"], op["data"]["harga_idr"])
+                elif kind == "rename":
+                    self._remove_entry(file_id, op["baru"])
+                    self._add_entry(file_id, op["baru"], op["data"]["harga_idr"])
+            self._maybe_compact()
+
+    def search(self, text, limit=200):
+        """Cari barang; hasilnya list (path, nama, harga_idr)."""
+        words, low, high = parse_query(text)
+        with self._lock:
+            if words:
+                hits = self._match_words(words, low, high, limit)
+            elif low is not None or high is not None:
+                hits = self._match_prices(low, high, limit)
+            else:
+                hits = []
+            return [
+                (self._paths[file_id], nama, harga) for file_id, nama, harga in hits
+            ]
+
+    def _match_words(self, words, low, high, limit):
+        tokens = self._sorted_token_list()
+        postings = []
+        for word in set(words):
+            start = bisect_left(tokens, word)
+            lists = []
+            for token in islice(tokens, start, None):
+                if not token.startswith(word):
+                    break
+                lists.append(self._tokens[token])
+            if not lists:
+                return []
+            postings.append((sum(map(len, lists)), word, lists))
+
+        # Id kata yang paling selektif ditelusuri berurutan, jadi berhenti
+        # setelah `limit` hasil; kata lain dicocokkan dengan nama barangnya
+        _, driver, lists = min(postings)
+        others = [word for _, word, _ in postings if word != driver]
+        hits = []
+        previous = None
+        for i in heapq.merge(*lists):
+            # Satu barang bisa muncul di beberapa kata dengan awalan sama
+            if i == previous:
+                continue
+            previous = i
+            entry = self._entries[i]
+            if entry is None:
+                continue
+            harga = entry[2]
+            if (low is not None and harga < low) or (high is not None and harga > high):
+                continue
+            if others:
+                name_tokens = tokenize(entry[1])
+                if not all(
+                    any(token.startswith(word) for token in name_tokens)
+                    for word in others
+                ):
+                    continue
+            hits.append(entry)
+            if len(hits) >= limit:
+                break
+        return hits
+
+    def _match_prices(self, low, high, limit):
+        prices = self._sorted_prices()
+        start = 0 if low is None else bisect_left(prices, (low, -1))
+        hits = []
+        for harga, i in islice(prices, start, None):
+            if high is not None and harga > high:
+                break
+            entry = self._entries[i]
+            if entry is not None:
+                hits.append(entry)
+                if len(hits) >= limit:
+                    break
+        return hits
+
+    def _sorted_prices(self):
+        if self._prices is None:
+            self._prices = sorted(
+                (entry[2], i) for i, entry in enumerate(self._entries) if entry
+            )
+        return self._prices
+
+    def _sorted_token_list(self):
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self._tokens)
+        return self._sorted_tokens
+
+    def _set_file(self, path, data):
+        if path in self._file_ids:
+            self._remove_file(path)
+        file_id = self._next_file_id
+        self._next_file_id += 1
+        self._file_ids[path] = file_id
+        self._paths[file_id] = path
+        self._file_entries[file_id] = {}
+        # Banyak barang sekaligus: urutan kata dan harga dibangun ulang
+        # sekali saat dibutuhkan, bukan disisipkan satu per satu.
+        if len(data) > 64:
+            self._sorted_tokens = None
+            self._prices = None
+        for nama, record in data.items():
+            self._add_entry(file_id, nama, record["harga_idr"])
+        self._maybe_compact()
+
+    def _remove_file(self, path):
+        file_id = self._file_ids.pop(path)
+        del self._paths[file_id]
+        for nama in list(self._file_entries[file_id]):
+            self._remove_entry(file_id, nama)
+        del self._file_entries[file_id]
+
+    def _add_entry(self, file_id, nama, harga):
+        i = len(self._entries)
+        self._entries.append((file_id, nama, harga))
+        self._file_entries[file_id][nama] = i
+        for token in set(tokenize(nama)):
+            ids = self._tokens.get(token)
+            if ids is None:
+                ids = self._tokens[token] = []
+                if self._sorted_tokens is not None:
+                    insort(self._sorted_tokens, token)
+            ids.append(i)
+        if self._prices is not None:
+            insort(self._prices, (harga, i))
+
+    def _remove_entry(self, file_id, nama):
+        i = self._file_entries[file_id].pop(nama, None)
+        if i is None:
+            return
+        # Id-nya tetap di daftar kata sampai dipadatkan; entry None dilewati
+        self._entries[i] = None
+        self._dead += 1
+
+    def _maybe_compact(self):
+        if self._dead <= 1024 or self._dead <= len(self._entries) - self._dead:
+            return
+        files = {
+            self._paths[file_id]: {
+                nama: {"harga_idr": self._entries[i][2]} for nama, i in names.items()
+            }
+            for file_id, names in self._file_entries.items()
+        }
+        self._clear()
+        self._sorted_tokens = None
+        self._prices = None
+        for path, data in files.items():
+            self._set_file(path, data)
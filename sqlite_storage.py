@@ -0,0 +1,269 @@
+import os
+import sqlite3
+from collections import OrderedDict
+from urllib.request import pathname2url
+
+from engine import INPUT_FIELDS
+from storage import JsonStorage, read_database, write_json_atomic
+
+
+# Hanya input yang disimpan; kolom turunan dihitung saat dibaca
+COLUMN_DEFS = {
+    "harga_idr": "INTEGER NOT NULL DEFAULT 0",
+    "tanggal": "INTEGER NOT NULL DEFAULT 0",
+    "kode_hs": "INTEGER NOT NULL DEFAULT 0",
+}
+
+_COLUMNS = ", ".join(INPUT_FIELDS)
+_PLACEHOLDERS = ", ".join("?" for _ in INPUT_FIELDS)
+_UPSERT = (
+    f"INSERT INTO barang (nama, {_COLUMNS}) VALUES (?, {_PLACEHOLDERS}) "
+    "ON CONFLICT (nama) DO UPDATE SET "
+    + ", ".join(f"{field} = excluded.{field}" for field in INPUT_FIELDS)
+)
+
+
+def _create_table_sql(table):
+    columns = "".join(f", {field} {COLUMN_DEFS[field]}" for field in INPUT_FIELDS)
+    return f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, nama TEXT NOT NULL{columns})"
+
+
+def connect(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    _migrate(conn)
+    return conn
+
+
+def _migrate(conn):
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(barang)")]
+    wanted = ["id", "nama", *INPUT_FIELDS]
+
+    with conn:
+        if not columns:
+            conn.execute(_create_table_sql("barang"))
+        elif set(columns) - set(wanted):
+            # Skema lama menyimpan kolom turunan; salin input-nya saja
+            kept = ", ".join(c for c in wanted if c in columns)
+            conn.execute("DROP INDEX IF EXISTS idx_barang_total_idr")
+            conn.execute("DROP INDEX IF EXISTS idx_barang_nama")
+            conn.execute("ALTER TABLE barang RENAME TO barang_lama")
+            conn.execute(_create_table_sql("barang"))
+            conn.execute(f"INSERT INTO barang ({kept}) SELECT {kept} FROM barang_lama")
+            conn.execute("DROP TABLE barang_lama")
+        else:
+            for field in INPUT_FIELDS:
+                if field not in columns:
+                    conn.execute(
+                        f"ALTER TABLE barang ADD COLUMN {field} {COLUMN_DEFS[field]}"
+                    )
+
+        conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_barang_nama ON barang (nama)"
+        )
+        # Tidak dipakai lagi; hanya memperlambat setiap tulis
+        conn.execute("DROP INDEX IF EXISTS idx_barang_harga_idr")
+
+
+def read_records(path):
+    """Semua record file .db, dibuka read-only dan tanpa migrasi skema."""
+    uri = f"file:{pathname2url(os.path.abspath(path))}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True)
+    try:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(barang)")}
+        if not columns:
+            return {}
+        # Skema lama bisa belum punya semua kolom input; nilainya 0
+        fields = [field for field in INPUT_FIELDS if field in columns]
+        selected = "".join(f", {field}" for field in fields)
+        cursor = conn.execute(f"SELECT nama{selected} FROM barang ORDER BY id")
+        return {row[0]: _record(_values(dict(zip(fields, row[1:])))) for row in cursor}
+    finally:
+        conn.close()
+
+
+def _record(values):
+    return dict(zip(INPUT_FIELDS, values))
+
+
+def _values(record):
+    return tuple(record.get(field, 0) for field in INPUT_FIELDS)
+
+
+class SqliteRecords:
+    """Data database SQLite dengan antarmuka seperti dict.
+
+    Isi tabel tidak dimuat ke memori; baris dibaca per halaman sesuai
+    kebutuhan tabel. Perubahan berjalan di dalam transaksi yang baru
+    di-commit oleh SqliteStorage.write, jadi satu aksi = satu transaksi.
+    Juga menyediakan antarmuka baris yang dipakai DataTableModel.
+    """
+
+    PAGE_SIZE = 256
+    PAGE_CACHE_SIZE = 64
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._count = None
+        self._pages = OrderedDict()
+
+    def __len__(self):
+        if self._count is None:
+            self._count = self.conn.execute("SELECT COUNT(*) FROM barang").fetchone()[0]
+        return self._count
+
+    def __contains__(self, nama):
+        row = self.conn.execute(
+            "SELECT 1 FROM barang WHERE nama = ?", (nama,)
+        ).fetchone()
+        return row is not None
+
+    def __getitem__(self, nama):
+        row = self.conn.execute(
+            f"SELECT {_COLUMNS} FROM barang WHERE nama = ?", (nama,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(nama)
+        return _record(row)
+
+    def __setitem__(self, nama, record):
+        self.conn.execute(_UPSERT, (nama, *_values(record)))
+        self._invalidate()
+
+    def __iter__(self):
+        for (nama,) in self.conn.execute("SELECT nama FROM barang ORDER BY id"):
+            yield nama
+
+    def get(self, nama, default=None):
+        try:
+            return self[nama]
+        except KeyError:
+            return default
+
+    def items(self):
+        cursor = self.conn.execute(f"SELECT nama, {_COLUMNS} FROM barang ORDER BY id")
+        for row in cursor:
+            yield row[0], _record(row[1:])
+
+    def pop(self, nama, *default):
+        record = self.get(nama)
+        if record is None:
+            if default:
+                return default[0]
+            raise KeyError(nama)
+        self.conn.execute("DELETE FROM barang WHERE nama = ?", (nama,))
+        self._invalidate()
+        return record
+
+    def rename(self, old_name, new_name, record):
+        if new_name in self or old_name not in self:
+            self.pop(old_name, None)
+            self[new_name] = record
+            return
+        # id tetap sama sehingga posisi baris tidak berubah
+        self.conn.execute(
+            "UPDATE barang SET nama = ?, "
+            + ", ".join(f"{field} = ?" for field in INPUT_FIELDS)
+            + " WHERE nama = ?",
+            (new_name, *_values(record), old_name),
+        )
+        self._invalidate()
+
+    # Antarmuka baris untuk DataTableModel
+
+    def row(self, row):
+        page, offset = divmod(row, self.PAGE_SIZE)
+        rows = self._pages.get(page)
+        if rows is None:
+            cursor = self.conn.execute(
+                f"SELECT nama, {_COLUMNS} FROM barang ORDER BY id LIMIT ? OFFSET ?",
+                (self.PAGE_SIZE, page * self.PAGE_SIZE),
+            )
+            rows = [(values[0], _record(values[1:])) for values in cursor]
+            self._pages[page] = rows
+            if len(self._pages) > self.PAGE_CACHE_SIZE:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(page)
+        return rows[offset]
+
+    def name_at(self, row):
+        return self.row(row)[0]
+
+    def row_of(self, nama):
+        found = self.conn.execute(
+            "SELECT id FROM barang WHERE nama = ?", (nama,)
+        ).fetchone()
+        if found is None:
+            return None
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM barang WHERE id < ?", found
+        ).fetchone()[0]
+
+    def appended(self, nama):
+        pass
+
+    def removed(self, row, nama):
+        pass
+
+    def renamed(self, row, old_name, new_name):
+        pass
+
+    def _invalidate(self):
+        self._count = None
+        self._pages.clear()
+
+
+class SqliteStorage(JsonStorage):
+    # Data dibaca per halaman, tidak perlu dimuat di latar belakang
+    streaming = False
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.conn = None
+
+    def load(self):
+        if self.conn is None:
+            self.conn = connect(self.path)
+        return SqliteRecords(self.conn)
+
+    def write(self, data, ops=()):
+        if self.conn is None:
+            self.conn = connect(self.path)
+        if not isinstance(data, SqliteRecords):
+            # Tulis ulang penuh dari dict biasa dalam satu transaksi
+            self.conn.execute("DELETE FROM barang")
+            self.conn.executemany(
+                _UPSERT,
+                ((nama, *_values(record)) for nama, record in data.items()),
+            )
+        self.conn.commit()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def json_to_sqlite(json_path, db_path):
+    # Perubahan yang masih di jurnal ikut terbawa; sumbernya tidak ditulis
+    data = read_database(json_path)
+
+    tmp_path = f"{db_path}.{os.getpid()}.tmp"
+    conn = connect(tmp_path)
+    try:
+        with conn:
+            conn.executemany(
+                _UPSERT,
+                ((nama, *_values(record)) for nama, record in data.items()),
+            )
+        conn.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        conn.close()
+    os.replace(tmp_path, db_path)
+
+
+def sqlite_to_json(db_path, json_path):
+    # Dibuka read-only: migrasi skema tidak boleh mengubah file sumber
+    write_json_atomic(json_path, read_records(db_path))
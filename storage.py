@@ -0,0 +1,602 @@
+import os
+import json
+import codecs
+import shutil
+import threading
+import time
+import traceback
+
+from engine import input_record
+
+
+JOURNAL_SUFFIX = ".journal"
+# Jurnal yang sedang dipadatkan ke snapshot oleh thread latar belakang
+JOURNAL_ROTATED_SUFFIX = ".journal.1"
+
+STORAGE_MODES = ("json", "journal")
+
+DATABASE_EXTENSIONS = (".json", ".db", ".bcdb")
+CONFIG_FILE = "config.json"
+
+
+def op_set(nama, record):
+    return {"op": "set", "nama": nama, "data": record}
+
+
+def op_delete(nama):
+    return {"op": "delete", "nama": nama}
+
+
+def op_rename(old_name, new_name, record):
+    return {"op": "rename", "nama": old_name, "baru": new_name, "data": record}
+
+
+def apply_op(data, op):
+    kind = op["op"]
+    if kind == "set":
+        data[op["nama"]] = op["data"]
+    elif kind == "delete":
+        data.pop(op["nama"], None)
+    elif kind == "rename":
+        old_name, new_name = op["nama"], op["baru"]
+        if hasattr(data, "rename"):
+            data.rename(old_name, new_name, op["data"])
+            return
+        if old_name not in data or new_name in data:
+            data.pop(old_name, None)
+            data[new_name] = op["data"]
+            return
+        items = list(data.items())
+        data.clear()
+        for nama, record in items:
+            if nama == old_name:
+                data[new_name] = op["data"]
+            else:
+                data[nama] = record
+    else:
+        raise ValueError(f"Operasi jurnal tidak dikenal: {kind}")
+
+
+def apply_ops(data, ops):
+    """Terapkan beberapa op sekaligus.
+
+    Ganti nama di dict biasa menyusun ulang seluruh dict agar urutannya
+    tetap, O(N) per op. Di sini dict itu disusun ulang sekali saja.
+    """
+    if not isinstance(data, dict) or not any(op["op"] == "rename" for op in ops):
+        for op in ops:
+            apply_op(data, op)
+        return
+
+    # Setiap barang punya slot tetap; ganti nama tidak memindah slotnya
+    slots = dict(enumerate(data.items()))
+    where = {nama: slot for slot, nama in enumerate(data)}
+    next_slot = len(slots)
+    for op in ops:
+        kind = op["op"]
+        nama = op["nama"]
+        if kind == "rename":
+            new_name = op["baru"]
+            slot = where.get(nama)
+            if slot is not None and new_name not in where:
+                del where[nama]
+                where[new_name] = slot
+                slots[slot] = (new_name, op["data"])
+                continue
+            # Sama dengan apply_op: hapus nama lama lalu set nama baru
+            kind, nama = "set", new_name
+            old_slot = where.pop(op["nama"], None)
+            if old_slot is not None:
+                del slots[old_slot]
+        if kind == "set":
+            slot = where.get(nama)
+            if slot is None:
+                slot = where[nama] = next_slot
+                next_slot += 1
+            slots[slot] = (nama, op["data"])
+        elif kind == "delete":
+            slot = where.pop(nama, None)
+            if slot is not None:
+                del slots[slot]
+        else:
+            raise ValueError(f"Operasi jurnal tidak dikenal: {kind}")
+    data.clear()
+    data.update(slots.values())
+
+
+def is_database_file(name):
+    name = os.path.basename(name)
+    return name.endswith(DATABASE_EXTENSIONS) and name != CONFIG_FILE
+
+
+def related_paths(path):
+    """File pendamping database yang harus ikut disalin/dipindah/dihapus."""
+    return [
+        path + suffix
+        for suffix in (JOURNAL_SUFFIX, JOURNAL_ROTATED_SUFFIX, "-wal", "-shm")
+        if os.path.exists(path + suffix)
+    ]
+
+
+def file_signature(path):
+    """[mtime_ns, ukuran] file database dan jurnalnya, untuk validasi cache.
+
+    File -shm SQLite tidak ikut karena berubah walau hanya dibaca.
+    """
+    paths = [path] + [p for p in related_paths(path) if not p.endswith("-shm")]
+    signature = []
+    for p in paths:
+        stat = os.stat(p)
+        signature.append([stat.st_mtime_ns, stat.st_size])
+    return signature
+
+
+def find_databases(root):
+    """Semua file database di bawah root, melewati file/folder tersembunyi."""
+    paths = []
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names[:] = sorted(d for d in dir_names if not d.startswith("."))
+        for name in sorted(file_names):
+            if not name.startswith(".") and is_database_file(name):
+                paths.append(os.path.join(dir_path, name))
+    return paths
+
+
+def iter_json_object(f, chunk_size=1 << 20):
+    """Urai objek JSON tingkat atas `{nama: record, ...}` sedikit demi sedikit.
+
+    `f` adalah file biner; setiap pasangan kunci/nilai di-yield begitu
+    selesai dibaca sehingga file besar tidak perlu dimuat utuh dulu.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buf = buf[pos:] + utf8.decode(chunk, final=eof)
+        pos = 0
+
+    def skip_ws():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    def expect(chars):
+        nonlocal pos
+        skip_ws()
+        if pos >= len(buf) or buf[pos] not in chars:
+            raise json.JSONDecodeError(f"Diharapkan {chars!r}", buf, pos)
+        pos += 1
+        return buf[pos - 1]
+
+    def value():
+        nonlocal pos
+        skip_ws()
+        while True:
+            try:
+                result, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            # Angka di ujung buffer mungkin masih terpotong
+            if end == len(buf) and not eof:
+                fill()
+                continue
+            pos = end
+            return result
+
+    fill()
+    expect("{")
+    skip_ws()
+    if pos < len(buf) and buf[pos] == "}":
+        return
+    while True:
+        nama = value()
+        expect(":")
+        yield nama, value()
+        if expect(",}") == "}":
+            return
+
+
+def write_atomic(path, write, mode="w"):
+    """Tulis lewat `write(f)` ke file sementara, fsync, lalu ganti `path`."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, mode) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_dir(os.path.dirname(path))
+
+
+def write_json_atomic(path, obj, indent=4):
+    def write(f):
+        if isinstance(obj, (dict, list)):
+            json.dump(obj, f, indent=indent)
+        else:
+            _dump_mapping(obj, f, indent)
+
+    write_atomic(path, write)
+
+
+def _dump_mapping(mapping, f, indent):
+    # Sama persis dengan json.dump untuk objek yang hanya punya items(),
+    # mis. RecordStore, tanpa membuat dict sementara untuk seluruh isinya.
+    pad = " " * indent
+    first = True
+    for key, value in mapping.items():
+        f.write("{\n" if first else ",\n")
+        first = False
+        record = json.dumps(value, indent=indent).replace("\n", "\n" + pad)
+        f.write(f"{pad}{json.dumps(key)}: {record}")
+    f.write("{}" if first else "\n}")
+
+
+def _fsync_dir(dir_path):
+    # Windows tidak bisa membuka direktori untuk fsync
+    if os.name == "nt":
+        return
+    fd = os.open(dir_path or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class BackgroundWriter:
+    """Satu thread penulis untuk semua file, agar GUI tidak menunggu disk.
+
+    Job dikirim dengan sebuah kunci (biasanya path file). Job yang masih
+    antre dengan kunci yang sama diganti oleh job terbaru, jadi rentetan
+    perubahan cepat cukup menghasilkan satu kali tulis.
+    """
+
+    def __init__(self):
+        self._jobs = {}
+        self._cond = threading.Condition()
+        self._busy = False
+        self._flushing = 0
+        self._closed = False
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, key, job, delay=0.0):
+        with self._cond:
+            due = time.monotonic() + delay
+            if key in self._jobs:
+                # Tenggat tidak diundur agar rentetan panjang tetap tertulis
+                due = min(due, self._jobs[key][0])
+            self._jobs[key] = (due, job)
+            self._cond.notify_all()
+
+    def flush(self):
+        with self._cond:
+            self._flushing += 1
+            self._cond.notify_all()
+            while self._jobs or self._busy:
+                self._cond.wait()
+            self._flushing -= 1
+
+    def close(self):
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def take_error(self):
+        with self._cond:
+            error, self._error = self._error, None
+        return error
+
+    def _next_job(self):
+        with self._cond:
+            while True:
+                if self._jobs:
+                    key = min(self._jobs, key=lambda k: self._jobs[k][0])
+                    due, job = self._jobs[key]
+                    wait = due - time.monotonic()
+                    if wait <= 0 or self._flushing or self._closed:
+                        del self._jobs[key]
+                        self._busy = True
+                        return job
+                    self._cond.wait(wait)
+                elif self._closed:
+                    return None
+                else:
+                    self._cond.wait()
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                job()
+            except Exception as e:
+                traceback.print_exc()
+                with self._cond:
+                    self._error = e
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+
+_writer = None
+
+
+def background_writer():
+    global _writer
+    if _writer is None:
+        _writer = BackgroundWriter()
+    return _writer
+
+
+class JsonStorage:
+    """Tulis ulang seluruh file JSON, ditunda dan digabung di belakang layar."""
+
+    DELAY = 0.5
+    # Bisa dimuat bertahap lewat stream() di thread terpisah
+    streaming = True
+    needs_snapshot = False
+
+    def __init__(self, path):
+        self.path = path
+        # True jika file masih menyimpan kolom turunan format lama
+        self.legacy = False
+        # Salinan yang menunggu ditulis; edit berikutnya diterapkan ke sini
+        self._snapshot = None
+        self._snapshot_lock = threading.Lock()
+
+    def load(self):
+        with open(self.path, "r") as f:
+            raw = json.load(f)
+        # Kolom turunan format lama bisa basi; dibuang saat dimuat
+        data = {nama: input_record(record) for nama, record in raw.items()}
+        self.legacy = any(len(raw[nama]) != len(data[nama]) for nama in data)
+        return data
+
+    def stream(self, batch_size=5000):
+        """Yield (items, ops, progres 0..1) per batch sambil membaca file.
+
+        `items` adalah list (nama, record) dari snapshot, `ops` adalah
+        operasi jurnal yang harus diterapkan setelah semua items.
+        """
+        size = os.path.getsize(self.path) or 1
+        with open(self.path, "rb") as f:
+            batch = []
+            for nama, record in iter_json_object(f):
+                batch.append((nama, input_record(record)))
+                if len(batch) >= batch_size:
+                    yield batch, [], min(f.tell() / size, 1.0)
+                    batch = []
+        yield batch, [], 1.0
+
+    def write(self, data, ops=()):
+        # Data disalin sekali per tulis yang diantrekan; edit yang datang
+        # sebelum job berjalan cukup diterapkan ke salinan itu. Record
+        # tidak pernah diubah di tempat, salinan dangkal sudah cukup.
+        with self._snapshot_lock:
+            if self._snapshot is not None and ops:
+                apply_ops(self._snapshot, ops)
+                return
+            self._snapshot = data.copy()
+        background_writer().submit(self.path, self._write_snapshot, self.DELAY)
+
+    def _write_snapshot(self):
+        # Berjalan di thread BackgroundWriter
+        with self._snapshot_lock:
+            snapshot, self._snapshot = self._snapshot, None
+        if snapshot is not None:
+            write_json_atomic(self.path, snapshot)
+
+    def close(self):
+        background_writer().flush()
+
+
+class JournalStorage(JsonStorage):
+    """Snapshot JSON ditambah log perubahan yang hanya di-append.
+
+    Setiap perubahan menjadi satu baris JSON di `<file>.journal`, jadi
+    biayanya tidak bergantung pada ukuran database. Baris-baris ditulis dan
+    di-fsync oleh BackgroundWriter; perubahan yang datang beruntun
+    digabung dalam satu fsync. Saat jurnal melewati ambang batas, jurnal
+    diputar ke `.journal.1` lalu snapshot baru ditulis secara atomik.
+    """
+
+    COMPACT_MIN_BYTES = 1024 * 1024
+
+    def __init__(self, path, readonly=False):
+        super().__init__(path)
+        # Mode baca saja untuk file yang mungkin sedang ditulis proses lain
+        self.readonly = readonly
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.rotated_path = path + JOURNAL_ROTATED_SUFFIX
+        self._journal = None
+        self._journal_size = 0
+        self._snapshot_size = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        # Ada sisa pemadatan yang terputus; pemanggil perlu menulis snapshot
+        self.needs_snapshot = False
+
+    def load(self):
+        data = super().load()
+        self._snapshot_size = os.path.getsize(self.path)
+        apply_ops(data, self._read_journal_ops())
+        if self.needs_snapshot and not self.readonly:
+            self.write(data)
+        return data
+
+    def stream(self, batch_size=5000):
+        self._snapshot_size = os.path.getsize(self.path)
+        for items, _, progress in super().stream(batch_size):
+            yield items, [], progress
+        yield [], self._read_journal_ops(), 1.0
+
+    def write(self, data, ops=()):
+        if not ops:
+            # Snapshot penuh menggantikan semua baris yang belum ditulis
+            with self._lock:
+                self._pending = [("snapshot", data.copy())]
+            self._journal_size = 0
+        else:
+            payload = "".join(
+                json.dumps(op, separators=(",", ":")) + "\n" for op in ops
+            ).encode("utf-8")
+            self._journal_size += len(payload)
+            threshold = max(self.COMPACT_MIN_BYTES, self._snapshot_size // 2)
+            with self._lock:
+                self._pending.append(payload)
+                if self._journal_size > threshold:
+                    # Salinan penuh hanya saat pemadatan diantrekan, sekali
+                    # per ambang jurnal, jadi biayanya terbagi ke banyak edit
+                    self._pending.append(("compact", data.copy()))
+                    self._journal_size = 0
+
+        background_writer().submit(self.journal_path, self._drain)
+
+    def close(self):
+        background_writer().flush()
+        self._close_journal()
+
+    def _drain(self):
+        # Berjalan di thread BackgroundWriter
+        with self._lock:
+            pending, self._pending = self._pending, []
+
+        for item in pending:
+            if isinstance(item, bytes):
+                self._open_journal().write(item)
+                continue
+
+            kind, snapshot = item
+            if kind == "compact":
+                self._sync_journal()
+                self._close_journal()
+                os.replace(self.journal_path, self.rotated_path)
+            else:
+                self._close_journal()
+            write_json_atomic(self.path, snapshot)
+            if kind == "snapshot" and os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            if os.path.exists(self.rotated_path):
+                os.remove(self.rotated_path)
+            self._snapshot_size = os.path.getsize(self.path)
+
+        self._sync_journal()
+
+    def _read_journal_ops(self):
+        # Jurnal yang diputar tapi belum dipadatkan diputar ulang lebih dulu;
+        # aman karena setiap operasi menulis nilai akhir kuncinya.
+        self.needs_snapshot = os.path.exists(self.rotated_path)
+        ops = []
+        if self.needs_snapshot:
+            self._read_ops(self.rotated_path, ops)
+        self._journal_size = self._read_ops(self.journal_path, ops)
+        return ops
+
+    def _read_ops(self, path, ops):
+        if not os.path.exists(path):
+            return 0
+
+        valid_size = 0
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    op = json.loads(line)
+                except ValueError:
+                    # Baris terakhir yang terpotong karena crash
+                    break
+                if "data" in op:
+                    op["data"] = input_record(op["data"])
+                ops.append(op)
+                valid_size += len(line)
+
+        if valid_size < os.path.getsize(path) and not self.readonly:
+            with open(path, "r+b") as f:
+                f.truncate(valid_size)
+        return valid_size
+
+    def _open_journal(self):
+        if self._journal is None:
+            self._journal = open(self.journal_path, "ab")
+        return self._journal
+
+    def _sync_journal(self):
+        if self._journal is not None:
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+def copy_database(src_path, dest_path):
+    shutil.copy2(src_path, dest_path)
+    for related in related_paths(src_path):
+        shutil.copy2(related, dest_path + related[len(src_path) :])
+
+
+def move_database(src_path, dest_path):
+    shutil.move(src_path, dest_path)
+    for related in related_paths(src_path):
+        shutil.move(related, dest_path + related[len(src_path) :])
+
+
+def remove_database(path):
+    os.remove(path)
+    for related in related_paths(path):
+        os.remove(related)
+
+
+def read_database(path):
+    """Muat isi database tanpa mengubah file-nya.
+
+    File SQLite dibuka read-only dan skemanya tidak dimigrasikan.
+    """
+    if path.endswith(".json"):
+        return JournalStorage(path, readonly=True).load()
+    if path.endswith(".db"):
+        from sqlite_storage import read_records
+
+        return read_records(path)
+    db = open_storage(path)
+    try:
+        return dict(db.load().items())
+    finally:
+        db.close()
+
+
+def open_storage(path, mode="journal"):
+    if path.endswith(".db"):
+        from sqlite_storage import SqliteStorage
+
+        return SqliteStorage(path)
+    if path.endswith(".bcdb"):
+        from binary_storage import BinaryStorage
+
+        return BinaryStorage(path)
+    if mode == "journal":
+        return JournalStorage(path)
+    return JsonStorage(path)
@@ -0,0 +1,269 @@
+from collections import OrderedDict
+
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+import engine
+import storage
+from qt_compat import no_data, forward, emit
+from kurs_table import format_tanggal
+from tariff import format_kode_hs
+
+
+HEADERS = [
+    "Nama Barang",
+    "Tanggal",
+    "Kode HS",
+    "Harga (IDR)",
+    "Selisih ($)",
+    "Bea Masuk ($)",
+    "PPN (IDR)",
+    "PPh (IDR)",
+    "PPnBM (IDR)",
+    "Total ($)",
+    "Total (IDR)",
+]
+
+
+def format_row(nama, record, data):
+    """Teks satu baris tabel dari record input dan kolom turunannya."""
+    return (
+        nama,
+        format_tanggal(record.get("tanggal", 0)) or "-",
+        format_kode_hs(record.get("kode_hs", 0)) or "-",
+        f"Rp {data['harga_idr']:,}",
+        f"$ {data['selisih_pembebasan']:,.2f}",
+        f"$ {data['bea_masuk']:,.2f}",
+        f"Rp {data['ppn_idr']:,}",
+        f"Rp {data['pph_idr']:,}",
+        f"Rp {data['ppnbm_idr']:,}",
+        f"$ {data['total_usd']:,.2f}",
+        f"Rp {data['total_idr']:,}",
+    )
+
+
+class DictRows:
+    """Urutan baris untuk data berbentuk dict biasa.
+
+    Store lain (mis. SQLite) menyediakan method yang sama langsung:
+    __len__, name_at, row_of, row, serta hook appended/removed/renamed
+    yang dipanggil model setelah operasi diterapkan ke data.
+    """
+
+    def __init__(self, data):
+        self._data = data
+        self._names = list(data)
+        self._rows = {}
+        self._rows_valid_until = 0
+
+    def __len__(self):
+        return len(self._names)
+
+    def name_at(self, row):
+        return self._names[row]
+
+    def row(self, row):
+        nama = self._names[row]
+        return nama, self._data[nama]
+
+    def row_of(self, nama):
+        row = self._rows.get(nama)
+        if row is not None and row < self._rows_valid_until:
+            return row
+
+        # Indeks nama -> baris hanya dibangun ulang mulai dari baris pertama
+        # yang bergeser karena penghapusan, dan hanya saat dibutuhkan.
+        for i in range(self._rows_valid_until, len(self._names)):
+            self._rows[self._names[i]] = i
+        self._rows_valid_until = len(self._names)
+        return self._rows.get(nama)
+
+    def appended(self, nama):
+        row = len(self._names)
+        self._names.append(nama)
+        if self._rows_valid_until == row:
+            self._rows[nama] = row
+            self._rows_valid_until = row + 1
+
+    def removed(self, row, nama):
+        del self._names[row]
+        self._rows.pop(nama, None)
+        self._rows_valid_until = min(self._rows_valid_until, row)
+
+    def renamed(self, row, old_name, new_name):
+        self._names[row] = new_name
+        self._rows.pop(old_name, None)
+        self._rows[new_name] = row
+
+
+class DataTableModel(QAbstractTableModel):
+    # Jumlah baris terformat yang disimpan; view hanya meminta baris yang
+    # terlihat, jadi cache ini cukup kecil dan tidak ikut tumbuh dengan data.
+    CACHE_SIZE = 4096
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._data = {}
+        self._rows = DictRows(self._data)
+        self._cache = OrderedDict()
+        self._config = None
+        self._derived = engine.DerivedCache()
+
+    def set_data_store(self, data):
+        self.beginResetModel()
+        self._data = data
+        self._rows = DictRows(data) if isinstance(data, dict) else data
+        self._cache.clear()
+        self._derived.reset(data)
+        self.endResetModel()
+
+    def set_config(self, config):
+        # Kolom turunan dihitung ulang malas untuk fingerprint baru; view
+        # hanya akan meminta ulang baris yang sedang terlihat.
+        if config == self._config:
+            return
+        self._config = config
+        self._cache.clear()
+        if len(self._rows):
+            emit(
+                self.dataChanged,
+                self.index(0, 0),
+                self.index(len(self._rows) - 1, len(HEADERS) - 1),
+            )
+
+    def name_at(self, row):
+        if 0 <= row < len(self._rows):
+            return self._rows.name_at(row)
+        return None
+
+    def row_of(self, nama):
+        return self._rows.row_of(nama)
+
+    def extend_rows(self, items):
+        """Tambahkan sekumpulan (nama, record) dengan satu notifikasi insert."""
+        new_names = []
+        seen = set()
+        for nama, _ in items:
+            if nama not in self._data and nama not in seen:
+                seen.add(nama)
+                new_names.append(nama)
+
+        first = len(self._rows)
+        if new_names:
+            self.beginInsertRows(QModelIndex(), first, first + len(new_names) - 1)
+        for nama, record in items:
+            self._data[nama] = record
+            self._cache.pop(nama, None)
+            self._derived.invalidate(nama)
+        for nama in new_names:
+            self._rows.appended(nama)
+        if new_names:
+            self.endInsertRows()
+        if len(new_names) < len(items) and first > 0:
+            # Nama ganda menimpa baris yang sudah tampil
+            emit(
+                self.dataChanged,
+                self.index(0, 0),
+                self.index(first - 1, len(HEADERS) - 1),
+            )
+
+    def apply_ops(self, ops):
+        """Terapkan operasi storage ke data sambil memberi tahu view.
+
+        Hanya baris yang tersentuh yang diberitahukan, jadi biayanya tidak
+        bergantung pada jumlah baris. Mengembalikan baris operasi terakhir.
+        """
+        row = None
+        for op in ops:
+            row = self._apply_op(op)
+        return row
+
+    def _apply_op(self, op):
+        kind = op["op"]
+        nama = op["nama"]
+        row = self._rows.row_of(nama)
+        self._derived.invalidate(nama)
+        if kind == "rename":
+            self._derived.invalidate(op["baru"])
+
+        if kind == "set" and row is None:
+            row = len(self._rows)
+            self.beginInsertRows(QModelIndex(), row, row)
+            storage.apply_op(self._data, op)
+            self._rows.appended(nama)
+            self.endInsertRows()
+            return row
+
+        if kind == "delete" or (kind == "rename" and op["baru"] in self._data):
+            # Rename ke nama yang sudah ada = hapus lama lalu timpa yang ada
+            if row is not None:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                if kind == "delete":
+                    storage.apply_op(self._data, op)
+                else:
+                    self._data.pop(nama, None)
+                self._rows.removed(row, nama)
+                self._derived.rows_removed()
+                self._cache.pop(nama, None)
+                self.endRemoveRows()
+            if kind == "delete":
+                return row
+            return self._apply_op(storage.op_set(op["baru"], op["data"]))
+
+        storage.apply_op(self._data, op)
+        if kind == "rename":
+            if row is None:
+                return self._apply_op(storage.op_set(op["baru"], op["data"]))
+            self._rows.renamed(row, nama, op["baru"])
+        self._cache.pop(nama, None)
+        self._emit_row_changed(row)
+        return row
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return no_data()
+
+        if role == Qt.DisplayRole:
+            return self._formatted_row(index.row())[index.column()]
+
+        if role == Qt.TextAlignmentRole:
+            if index.column() > 0:
+                return int(Qt.AlignRight | Qt.AlignVCenter)
+            return int(Qt.AlignLeft | Qt.AlignVCenter)
+
+        return no_data()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return forward(super().headerData(section, orientation, role))
+
+    def _emit_row_changed(self, row):
+        emit(
+            self.dataChanged, self.index(row, 0), self.index(row, len(HEADERS) - 1)
+        )
+
+    def _formatted_row(self, row):
+        # Cache memakai nama sebagai kunci supaya tetap valid ketika baris
+        # lain disisipkan atau dihapus.
+        nama, record = self._rows.row(row)
+        cached = self._cache.get(nama)
+        if cached is not None:
+            self._cache.move_to_end(nama)
+            return cached
+
+        derived = self._derived.get(nama, record, self._config)
+        formatted = format_row(nama, record, derived)
+        self._cache[nama] = formatted
+        if len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return formatted
@@ -0,0 +1,180 @@
+import os
+import csv
+import json
+import hashlib
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy opsional, klasifikasi jatuh ke memo per kode
+    np = None
+
+
+# Tabel tarif disimpan di samping config.json; diawali titik supaya tidak
+# tampil di tree dan tidak dianggap database.
+TARIFF_FILE = ".tarif.json"
+
+# bea_masuk dan ppnbm berupa pecahan (0.10 = 10%); bebas berarti barang
+# dibebaskan dari bea masuk dan semua pajak impor.
+Tarif = namedtuple("Tarif", ["bea_masuk", "ppnbm", "bebas"])
+
+TARIF_UMUM = Tarif(0.10, 0.0, False)
+
+# Kode HS disimpan sebagai int di kolom int64 dengan digit "1" di depan,
+# supaya angka nol di awal kode (mis. bab 01) tidak hilang; 0 = tanpa kode.
+
+
+def parse_kode_hs(text):
+    """`"8517.13.00"` -> 185171300; teks kosong -> 0."""
+    digits = "".join(ch for ch in str(text) if ch not in ". -")
+    if not digits:
+        return 0
+    if not digits.isdigit() or len(digits) > 12:
+        raise ValueError(f"Kode HS tidak valid: {text!r}")
+    return int("1" + digits)
+
+
+def kode_hs_digits(kode_hs):
+    return str(kode_hs)[1:] if kode_hs else ""
+
+
+def format_kode_hs(kode_hs):
+    digits = kode_hs_digits(kode_hs)
+    parts = [digits[:4]] + [digits[i : i + 2] for i in range(4, len(digits), 2)]
+    return ".".join(part for part in parts if part)
+
+
+class TariffTable:
+    """Tarif per awalan kode HS, dicari dengan awalan terpanjang lewat trie.
+
+    Setiap simpul trie adalah dict digit -> simpul, dengan tarif awalan itu
+    di kunci "". Kode yang tidak cocok dengan awalan mana pun memakai
+    TARIF_UMUM. Hasil per kode dimemo; satu kolom kode diklasifikasikan
+    per kode unik lalu disebar kembali dengan numpy. Tabel tidak berubah
+    setelah dibuat dan dibandingkan lewat sidik jari isinya, sehingga bisa
+    menjadi bagian PajakConfig.
+    """
+
+    def __init__(self, entries=()):
+        # entries: (awalan_digit, Tarif)
+        self.entries = tuple(
+            sorted((prefix, Tarif(*tarif)) for prefix, tarif in entries)
+        )
+        self._root = {}
+        for prefix, tarif in self.entries:
+            node = self._root
+            for digit in prefix:
+                node = node.setdefault(digit, {})
+            node[""] = tarif
+        self.fingerprint = hashlib.blake2b(
+            repr(self.entries).encode(), digest_size=8
+        ).hexdigest()
+        self._memo = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, TariffTable) and self.fingerprint == other.fingerprint
+        )
+
+    def __hash__(self):
+        return hash(self.fingerprint)
+
+    def __getstate__(self):
+        # Trie dibangun ulang di proses pekerja, yang dikirim hanya entri
+        return self.entries
+
+    def __setstate__(self, entries):
+        self.__init__(entries)
+
+    def lookup(self, kode_hs):
+        tarif = self._memo.get(kode_hs)
+        if tarif is not None:
+            return tarif
+        tarif = TARIF_UMUM
+        node = self._root
+        for digit in kode_hs_digits(kode_hs):
+            node = node.get(digit)
+            if node is None:
+                break
+            tarif = node.get("", tarif)
+        self._memo[kode_hs] = tarif
+        return tarif
+
+    def lookup_column(self, kode_hs):
+        """Tarif untuk satu kolom kode HS, sebagai Tarif berisi tiga kolom.
+
+        Tanpa entri hasilnya TARIF_UMUM (skalar) supaya perhitungan tetap
+        memakai jalur skalar.
+        """
+        if not self.entries:
+            return TARIF_UMUM
+        if np is None:
+            tarifs = [self.lookup(kode) for kode in kode_hs]
+            return Tarif(*(list(column) for column in zip(*tarifs)))
+        codes, inverse = np.unique(
+            np.asarray(kode_hs, dtype=np.int64), return_inverse=True
+        )
+        tarifs = [self.lookup(int(kode)) for kode in codes]
+        return Tarif(
+            np.array([t.bea_masuk for t in tarifs], dtype=np.float64)[inverse],
+            np.array([t.ppnbm for t in tarifs], dtype=np.float64)[inverse],
+            np.array([t.bebas for t in tarifs], dtype=bool)[inverse],
+        )
+
+
+def _entry(kode_hs, bea_masuk, ppnbm=0, bebas=False):
+    # Persen di file (10 = 10%), pecahan di memori
+    digits = kode_hs_digits(parse_kode_hs(kode_hs))
+    if not digits:
+        raise ValueError("Kode HS wajib diisi")
+    return digits, Tarif(float(bea_masuk) / 100, float(ppnbm or 0) / 100, bebas)
+
+
+def _flag(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "ya", "true", "y")
+    return bool(value)
+
+
+def read_tariff(path):
+    """Baca tabel tarif dari JSON (list objek) atau CSV dengan kolom
+    kode_hs, bea_masuk, ppnbm, bebas; tarif dalam persen.
+    """
+    if path.lower().endswith(".csv"):
+        with open(path, "r", newline="", encoding="utf-8-sig") as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            rows = json.load(f)
+    return TariffTable(
+        _entry(
+            row["kode_hs"],
+            row.get("bea_masuk") or 0,
+            row.get("ppnbm") or 0,
+            _flag(row.get("bebas", False)),
+        )
+        for row in rows
+    )
+
+
+def dump_tariff(table):
+    return [
+        {
+            "kode_hs": format_kode_hs(int("1" + prefix)),
+            "bea_masuk": round(tarif.bea_masuk * 100, 6),
+            "ppnbm": round(tarif.ppnbm * 100, 6),
+            "bebas": tarif.bebas,
+        }
+        for prefix, tarif in table.entries
+    ]
+
+
+def load_tariff(folder):
+    """Tabel tarif di folder aplikasi; tabel kosong jika belum ada."""
+    path = os.path.join(folder, TARIFF_FILE)
+    if not os.path.exists(path):
+        return TariffTable()
+    return read_tariff(path)
@@ -0,0 +1,168 @@
+import os
+import inspect
+import threading
+import functools
+from time import perf_counter_ns
+from collections import deque
+
+
+# Pengukur waktu ringan untuk jalur panas. Mati secara default: timed()
+# hanya memeriksa satu flag global dan traced() tidak membungkus apa pun.
+# Dinyalakan lewat variabel lingkungan BEA_CUKAI_TRACE=1 atau menu
+# Konfigurasi.
+
+ENV_VAR = "BEA_CUKAI_TRACE"
+# Sampel durasi terakhir per span, untuk persentil
+SAMPLES = 10000
+# Event terakhir untuk ekspor trace
+EVENTS = 200000
+
+_enabled = os.environ.get(ENV_VAR, "") not in ("", "0")
+_samples = {}
+_events = deque(maxlen=EVENTS)
+_origin = perf_counter_ns()
+# (globals modul, nama, fungsi asli, wrapper) dari traced()
+_traced = []
+
+
+def enabled():
+    return _enabled
+
+
+def set_enabled(flag):
+    global _enabled
+    _enabled = bool(flag)
+    for namespace, attr, func, wrapper in _traced:
+        namespace[attr] = wrapper if _enabled else func
+
+
+def now():
+    return perf_counter_ns()
+
+
+def record(name, start, end=None):
+    """Catat satu span dari `start` (hasil now()) sampai `end` atau sekarang.
+
+    Untuk pekerjaan yang mulai dan selesai di event berbeda, mis. pemuatan
+    database di thread latar.
+    """
+    if end is None:
+        end = perf_counter_ns()
+    samples = _samples.get(name)
+    if samples is None:
+        samples = _samples.setdefault(name, deque(maxlen=SAMPLES))
+    samples.append(end - start)
+    _events.append((name, start, end - start, threading.get_ident()))
+
+
+def traced(name):
+    """Dekorator untuk fungsi tingkat modul yang panas, mis. rumus pajak.
+
+    Saat mati nama fungsi di modulnya menunjuk ke fungsi asli, jadi tidak
+    ada biaya sama sekali; set_enabled menukarnya dengan wrapper pengukur.
+    Hanya berlaku untuk pemanggil yang memakai `modul.fungsi` atau nama
+    global di modul itu sendiri, bukan `from modul import fungsi`. Method
+    dan slot Qt memakai timed().
+    """
+
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, start)
+
+        _traced.append((func.__globals__, func.__name__, func, wrapper))
+        return wrapper if _enabled else func
+
+    return decorate
+
+
+def timed(name):
+    """Dekorator untuk method, termasuk slot Qt.
+
+    Memeriksa flag di setiap panggilan, jadi tidak untuk fungsi yang
+    dipanggil jutaan kali (pakai traced()). Argumen posisi yang tidak
+    diterima method dibuang, seperti yang dilakukan PySide untuk slot
+    yang mengabaikan argumen sinyal (mis. textChanged ke update_preview).
+    """
+
+    def decorate(func):
+        code = func.__code__
+        limit = None if code.co_flags & inspect.CO_VARARGS else code.co_argcount
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args[:limit], **kwargs)
+            start = perf_counter_ns()
+            try:
+                return func(*args[:limit], **kwargs)
+            finally:
+                record(name, start)
+
+        return wrapper
+
+    return decorate
+
+
+def reset():
+    _samples.clear()
+    _events.clear()
+
+
+def stats():
+    """Ringkasan per span: jumlah, p50, p95, maks, dan total dalam ms.
+
+    Jumlah dan total hanya mencakup SAMPLES sampel terakhir per span.
+    """
+    result = {}
+    for name, samples in list(_samples.items()):
+        durations = sorted(samples)
+        if not durations:
+            continue
+
+        def percentile(p):
+            return durations[min(len(durations) - 1, int(len(durations) * p))] / 1e6
+
+        result[name] = {
+            "count": len(durations),
+            "p50": percentile(0.50),
+            "p95": percentile(0.95),
+            "max": durations[-1] / 1e6,
+            "total": sum(durations) / 1e6,
+        }
+    return result
+
+
+def chrome_trace():
+    """Event terakhir dalam format Chrome Trace (chrome://tracing, Perfetto)."""
+    pid = os.getpid()
+    threads = {}
+    events = []
+    for name, start, duration, thread in list(_events):
+        tid = threads.setdefault(thread, len(threads) + 1)
+        events.append(
+            {
+                "name": name,
+                "ph": "X",
+                "ts": (start - _origin) / 1000,
+                "dur": duration / 1000,
+                "pid": pid,
+                "tid": tid,
+            }
+        )
+    return {
+        "traceEvents": events,
+        "displayTimeUnit": "ms",
+        "otherData": {"stats": stats()},
+    }
+
+
+def export(path):
+    # storage mengimpor engine, yang mengimpor modul ini
+    import storage
+
+    storage.write_json_atomic(path, chrome_trace(), indent=None)
@@ -0,0 +1,113 @@
+from collections import deque
+
+import storage
+
+
+def inverse_ops(data, ops):
+    """Operasi storage yang membatalkan `ops`, dihitung sebelum `ops`
+    diterapkan ke `data`.
+
+    Hanya record yang disentuh yang dibaca, jadi biayanya tidak bergantung
+    pada ukuran database. Record tidak pernah diubah di tempat sehingga
+    record lama cukup dirujuk, tidak disalin.
+    """
+    # Keadaan nama yang sudah disentuh ops sebelumnya; None = tidak ada
+    overlay = {}
+
+    def current(nama):
+        if nama in overlay:
+            return overlay[nama]
+        return data.get(nama)
+
+    inverse = []
+    for op in ops:
+        kind = op["op"]
+        nama = op["nama"]
+        old = current(nama)
+        if kind == "set":
+            undo = [
+                storage.op_delete(nama) if old is None else storage.op_set(nama, old)
+            ]
+            overlay[nama] = op["data"]
+        elif kind == "delete":
+            undo = [] if old is None else [storage.op_set(nama, old)]
+            overlay[nama] = None
+        elif kind == "rename":
+            new_name = op["baru"]
+            replaced = current(new_name)
+            if old is None:
+                # Sama dengan set ke nama baru
+                undo = [
+                    storage.op_delete(new_name)
+                    if replaced is None
+                    else storage.op_set(new_name, replaced)
+                ]
+            elif replaced is None:
+                # Baris tetap di posisinya, begitu juga saat dibatalkan
+                undo = [storage.op_rename(new_name, nama, old)]
+            else:
+                # Menimpa record yang sudah ada: keduanya dikembalikan
+                undo = [storage.op_set(new_name, replaced), storage.op_set(nama, old)]
+            overlay[nama] = None
+            overlay[new_name] = op["data"]
+        else:
+            raise ValueError(f"Operasi jurnal tidak dikenal: {kind}")
+        # Dibatalkan dari operasi terakhir ke yang pertama
+        inverse[:0] = undo
+    return inverse
+
+
+class UndoStack:
+    """Riwayat urungkan/ulangi untuk satu database yang terbuka.
+
+    Setiap langkah menyimpan operasi storage maju dan kebalikannya (lihat
+    inverse_ops), bukan salinan data, jadi memorinya sebanding dengan
+    perubahan. Mengurungkan atau mengulangi hanya menghasilkan operasi
+    yang diterapkan dan disimpan seperti edit biasa, sehingga jurnal cukup
+    menambah satu baris tanpa menulis ulang file.
+    """
+
+    LIMIT = 1000
+
+    def __init__(self, limit=LIMIT):
+        # (label, ops, kebalikan)
+        self._undo = deque(maxlen=limit)
+        self._redo = []
+
+    def push(self, label, ops, inverse):
+        if not ops:
+            return
+        self._undo.append((label, tuple(ops), tuple(inverse)))
+        self._redo.clear()
+
+    def undo(self):
+        """Operasi untuk mengurungkan langkah terakhir; () jika kosong."""
+        if not self._undo:
+            return ()
+        step = self._undo.pop()
+        self._redo.append(step)
+        return step[2]
+
+    def redo(self):
+        """Operasi untuk mengulangi langkah yang terakhir diurungkan."""
+        if not self._redo:
+            return ()
+        step = self._redo.pop()
+        self._undo.append(step)
+        return step[1]
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def undo_label(self):
+        return self._undo[-1][0] if self._undo else ""
+
+    def redo_label(self):
+        return self._redo[-1][0] if self._redo else ""